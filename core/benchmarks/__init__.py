@@ -0,0 +1,50 @@
+"""
+性能基准用例（通过 `python Main.py benchmark <case>` 运行）
+
+每个用例是本包下的一个模块，提供 run(stdout, options)。用例写入的测试数据
+都在 rollback() 中创建，结束时回滚，不会残留在数据库里。
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+CASES = [
+    "tokens",
+    "password_hashing",
+    "task_cards",
+    "pagination",
+    "keyword_search",
+    "task_hall_sorts",
+    "match_scoring",
+    "sampling",
+    "eligibility",
+    "serialization",
+    "task_stream",
+    "deadline_expiry",
+    "fill_submission",
+    "skip_logic",
+    "fill_drafts",
+    "fill_counters",
+    "fill_retries",
+]
+
+
+@contextmanager
+def rollback():
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def measure(fn, iterations):
+    """执行 fn iterations 次，返回 (每秒次数, 平均毫秒)"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - started
+    return iterations / elapsed, elapsed * 1000 / iterations
+
+
+def report(stdout, label, per_second, avg_ms):
+    stdout.write(f"{label:<40} {per_second:>12,.0f}/s {avg_ms:>10.3f} ms")
@@ -0,0 +1,53 @@
+"""截止调度：批量关闭过期问卷的耗时与查询次数（每批应为固定几条，与批内问卷数无关）"""
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.benchmarks import rollback
+from core.managers.task_card_manager import TaskCardManager
+from core.models import AppUser, Survey, TaskCard
+from core.services.deadline_scheduler import DeadlineScheduler
+
+
+def run(stdout, options):
+    expired = options["iterations"] or 5000
+    upcoming = 100
+    now = timezone.now()
+    with rollback():
+        owner = AppUser.objects.create(email="bench-deadline@example.com", nickname="bench")
+        surveys = Survey.objects.bulk_create(
+            [
+                Survey(owner=owner, title=f"expired {i}", status="published", deadline=now - timedelta(seconds=i + 1))
+                for i in range(expired)
+            ]
+            + [
+                Survey(
+                    owner=owner, title=f"upcoming {i}", status="published", deadline=now + timedelta(seconds=30 * (i + 1))
+                )
+                for i in range(upcoming)
+            ]
+        )
+        TaskCardManager.sync([survey.id for survey in surveys])
+
+        for batch_size in (100, 500):
+            scheduler = DeadlineScheduler(batch_size=batch_size, lookahead=3600, max_pending=expired + upcoming)
+            # 嵌套的 rollback() 回滚到保存点，每种批大小在同一份数据上跑
+            with rollback():
+                started = time.perf_counter()
+                pending = scheduler.load(now)
+                with CaptureQueriesContext(connection) as queries:
+                    closed = scheduler.run_once(now)
+                elapsed = time.perf_counter() - started
+                batches = -(-expired // batch_size)
+                stdout.write(
+                    f"batch_size={batch_size:<4} loaded={pending} closed={closed} in {elapsed * 1000:.1f} ms "
+                    f"queries={len(queries)} ({len(queries) / batches:.1f}/batch) pending={len(scheduler)}"
+                )
+                if closed != expired or len(scheduler) != upcoming:
+                    raise AssertionError(f"expected {expired} closed and {upcoming} pending")
+                if TaskCard.objects.filter(status="published").count() != upcoming:
+                    raise AssertionError("task cards were not closed with their surveys")
+
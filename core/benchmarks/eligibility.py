@@ -0,0 +1,47 @@
+"""任务大厅资格过滤：已填写问卷数不同的用户，列表首页与深页的耗时应基本一致"""
+import time
+
+from django.utils import timezone
+
+from core.benchmarks import rollback
+from core.managers.task_card_manager import TaskCardManager
+from core.managers.task_hall_manager import TaskHallManager
+from core.models import AppUser, Questionnaire, Response, Survey
+
+SURVEYS = 20000
+
+
+def _timed(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) * 1000 / rounds
+
+
+def run(stdout, options):
+    rounds = options["iterations"] or 20
+    with rollback():
+        owner = AppUser.objects.create(email="bench-eligible-owner@example.com", nickname="bench")
+        surveys = Survey.objects.bulk_create(
+            (Survey(owner=owner, title=f"bench survey {i}", status="published") for i in range(SURVEYS)),
+            batch_size=5000,
+        )
+        TaskCardManager.rebuild(batch_size=5000)
+        questionnaire = Questionnaire.objects.create(survey=surveys[0], title="bench")
+        now = timezone.now()
+        for fills in (0, 100, 5000):
+            user = AppUser.objects.create(email=f"bench-eligible-{fills}@example.com", nickname="bench")
+            # 填写记录均匀分布在全部问卷中
+            filled = surveys[:: SURVEYS // fills] if fills else []
+            Response.objects.bulk_create(
+                (
+                    Response(survey=survey, questionnaire=questionnaire, user=user, status="submitted", submitted_at=now)
+                    for survey in filled
+                ),
+                batch_size=5000,
+            )
+            first = _timed(lambda: TaskHallManager.list_tasks({"page": 1, "page_size": 20}, user), rounds)
+            cursor = _timed(
+                lambda: TaskHallManager.list_tasks_by_cursor({"cursor": "", "page_size": 20}, user), rounds
+            )
+            stdout.write(f"fills={fills:<5} offset page 1 {first:>8.2f} ms   cursor page 1 {cursor:>8.2f} ms")
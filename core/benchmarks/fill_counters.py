@@ -0,0 +1,98 @@
+"""
+完成计数：卡片直接读 Survey.completed 与按答卷表 COUNT 的耗时对比，
+达到 target 时恰好关闭（多出的提交被拒绝），以及对账找出并修复偏差
+"""
+import json
+import random
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.benchmarks import measure, report, rollback
+from core.benchmarks.fill_submission import _build_survey
+from core.managers.survey_counter_manager import SurveyCounterManager
+from core.managers.task_card_manager import TaskCardManager
+from core.models import AppUser, Questionnaire, Response, Survey, TaskCard
+from core.services.fill_submission import submit_response
+from core.services.questionnaire_schema import AnswerError
+
+SURVEYS = 200
+
+
+def run(stdout, options):
+    fillers_count = options["iterations"] or 100
+    rng = random.Random(20261018)
+    with rollback():
+        owner = AppUser.objects.create(email="bench-counter@example.com", nickname="bench")
+        fillers = AppUser.objects.bulk_create(
+            [AppUser(email=f"bench-counter-{i}@example.com", nickname=f"c{i}") for i in range(fillers_count)]
+        )
+        surveys = Survey.objects.bulk_create(
+            [Survey(owner=owner, title=f"bench counter {i}", status="published", target=10_000) for i in range(SURVEYS)]
+        )
+        questionnaires = Questionnaire.objects.bulk_create(
+            [Questionnaire(survey=survey, status="published", title=survey.title) for survey in surveys]
+        )
+        now = timezone.now()
+        responses = []
+        for survey, questionnaire in zip(surveys, questionnaires):
+            for user in rng.sample(fillers, rng.randint(0, fillers_count)):
+                responses.append(
+                    Response(survey=survey, questionnaire=questionnaire, user=user, status="submitted", submitted_at=now)
+                )
+        Response.objects.bulk_create(responses, batch_size=500)
+        ids = [survey.id for survey in surveys]
+        # bulk_create 不走提交流程，先对账把计数补上
+        for survey_id, _, _ in SurveyCounterManager.find_drift():
+            SurveyCounterManager.repair(survey_id)
+        stdout.write(f"surveys={SURVEYS} responses={len(responses)}")
+
+        report(stdout, "COUNT over responses", *measure(lambda: TaskCardManager.get_filled_counts(ids), 50))
+        report(
+            stdout,
+            "read Survey.completed",
+            *measure(lambda: dict(Survey.objects.filter(id__in=ids).values_list("id", "completed")), 50),
+        )
+        with CaptureQueriesContext(connection) as queries:
+            TaskCardManager.build_cards(ids)
+        if any("COUNT(" in query["sql"] for query in queries):
+            raise AssertionError("building task cards still aggregates responses")
+        stdout.write(f"build_cards: {len(queries)} queries, no COUNT")
+
+        # 满额关闭：target 份之后的提交被拒绝
+        target = min(20, fillers_count - 1)
+        survey, body = _build_survey(owner, 5, target=target)
+        answers = json.loads(body)["answers"]
+        survey = Survey.objects.select_related("active_questionnaire").get(id=survey.id)
+        accepted = rejected = 0
+        started = time.perf_counter()
+        for user in fillers[: target + 1]:
+            try:
+                submit_response(survey, user, answers)
+                accepted += 1
+            except AnswerError:
+                rejected += 1
+        avg_ms = (time.perf_counter() - started) * 1000 / (target + 1)
+        survey.refresh_from_db()
+        card = TaskCard.objects.get(survey_id=survey.id)
+        if (accepted, rejected, survey.completed, survey.status, card.status) != (target, 1, target, "closed", "closed"):
+            raise AssertionError(
+                f"auto-close failed: accepted={accepted} rejected={rejected} "
+                f"completed={survey.completed} status={survey.status} card={card.status}"
+            )
+        stdout.write(f"target={target}: {accepted} accepted, {rejected} rejected after auto-close, avg={avg_ms:.2f} ms")
+
+        # 对账：打乱一部分计数后找出并修复
+        broken = rng.sample(ids, 10)
+        for survey_id in broken:
+            Survey.objects.filter(id=survey_id).update(completed=rng.randint(10_000, 20_000))
+        started = time.perf_counter()
+        drift = SurveyCounterManager.find_drift()
+        for survey_id, _, _ in drift:
+            SurveyCounterManager.repair(survey_id)
+        elapsed = (time.perf_counter() - started) * 1000
+        if sorted(survey_id for survey_id, _, _ in drift) != sorted(broken) or SurveyCounterManager.find_drift():
+            raise AssertionError("reconciliation did not repair exactly the broken counters")
+        stdout.write(f"reconcile: repaired {len(drift)} of {SURVEYS + 1} counters in {elapsed:.1f} ms")
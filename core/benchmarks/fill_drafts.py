@@ -0,0 +1,89 @@
+"""
+填写草稿的合并写入：大量用户反复自动保存时，内存合并的吞吐、一次批量落库的查询数与耗时，
+并核对落库内容与最后一次保存一致、提交后草稿答卷原地转为 submitted
+"""
+import random
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.benchmarks import report, rollback
+from core.benchmarks.fill_submission import _build_survey
+from core.models import Answer, AppUser, Questionnaire, Response
+from core.services.fill_drafts import DraftStore
+from core.services.fill_submission import submit_response
+from core.services.questionnaire_schema import schema_cache
+
+
+def run(stdout, options):
+    users = options["iterations"] or 500
+    saves_per_user = 20
+    rng = random.Random(20261018)
+    # 不开后台线程，由这里显式落库
+    store = DraftStore(max_dirty=users * 2, background=False)
+    with rollback():
+        owner = AppUser.objects.create(email="bench-draft@example.com", nickname="bench")
+        fillers = AppUser.objects.bulk_create(
+            [AppUser(email=f"bench-draft-{i}@example.com", nickname=f"d{i}") for i in range(users)]
+        )
+        survey, _ = _build_survey(owner, 20)
+        questionnaire = Questionnaire.objects.get(id=survey.active_questionnaire_id)
+        schema = schema_cache.get(questionnaire)
+        choices = {
+            "single": lambda: rng.choice(["o1", "o2", "o3", "o4"]),
+            "multi": lambda: rng.sample(["o1", "o2", "o3", "o4"], rng.randint(1, 3)),
+            "text": lambda: rng.choice(["", "菜品丰富", "环境整洁", "价格实惠"]),
+            "multi-text": lambda: ["张三", "13800138000", "zhangsan@example.com", rng.choice(["北京", "上海"])],
+        }
+        saves = []
+        for user in fillers:
+            for _ in range(saves_per_user):
+                question = rng.choice(schema.questions)
+                saves.append((user.id, [{"question_id": str(question.id), "value": choices[question.type]()}]))
+        rng.shuffle(saves)
+
+        started = time.perf_counter()
+        for user_id, answers in saves:
+            store.save(user_id, survey.id, questionnaire.id, schema.validate_draft(answers))
+        elapsed = time.perf_counter() - started
+        report(stdout, f"autosave into memory ({len(saves)} saves)", len(saves) / elapsed, elapsed * 1000 / len(saves))
+
+        # MySQL 上每批各一条 INSERT；SQLite 受绑定变量数限制，批量插入会拆成多条
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            written = store.flush()
+            elapsed = time.perf_counter() - started
+        stdout.write(
+            f"flush: {written} drafts from {len(saves)} saves in {len(queries)} queries, {elapsed * 1000:.1f} ms"
+        )
+        expected = sum(len(store.get(user.id, survey.id).answers) for user in fillers)
+        stored = Answer.objects.filter(response__survey=survey, response__status="in_progress").count()
+        if stored != expected:
+            raise AssertionError(f"expected {expected} draft answers in the database, found {stored}")
+
+        # 再改一轮，落库的只有改过的草稿
+        for user in fillers[: users // 10]:
+            question = schema.questions[0]
+            store.save(user.id, survey.id, questionnaire.id, schema.validate_draft(
+                [{"question_id": str(question.id), "value": "o4"}]
+            ))
+        with CaptureQueriesContext(connection) as queries:
+            written = store.flush()
+        stdout.write(f"second flush: {written} changed drafts in {len(queries)} queries")
+        if Answer.objects.filter(response__survey=survey, question=schema.questions[0].id, value_text="o4").count() < written:
+            raise AssertionError("second flush lost updates")
+
+        # 提交时草稿答卷转为 submitted，答案整体替换
+        user = fillers[0]
+        answers = [
+            {"question_id": str(question.id), "value": choices[question.type]() or "ok"}
+            for question in schema.questions
+        ]
+        response = submit_response(survey, user, answers, 120)
+        draft_ids = set(Response.objects.filter(survey=survey, user=user).values_list("id", flat=True))
+        if draft_ids != {response.id} or response.status != "submitted":
+            raise AssertionError("submit did not promote the draft response")
+        if Answer.objects.filter(response=response).count() != len(schema.questions):
+            raise AssertionError("submitted answers were not replaced")
+        stdout.write("submit promoted the in-progress draft and replaced its answers")
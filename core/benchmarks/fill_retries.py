@@ -0,0 +1,76 @@
+"""
+提交答卷的重试：带 Idempotency-Key 的重试重放第一次的结果且不查库，不带 key 的重复提交
+由唯一约束判重返回 already filled（不再是 500），以及重放的吞吐
+"""
+import json
+import secrets
+import uuid
+from datetime import timedelta
+
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.benchmarks import measure, report, rollback
+from core.benchmarks.fill_submission import _build_survey
+from core.models import AppUser, AuthToken, Response
+from core.services.fill_submission import AlreadyFilled, submit_response
+from core.views import submit_fill
+
+
+def run(stdout, options):
+    iterations = options["iterations"] or 1000
+    factory = RequestFactory()
+    with rollback():
+        owner = AppUser.objects.create(email="bench-retry@example.com", nickname="bench")
+        filler = AppUser.objects.create(email="bench-retry-filler@example.com", nickname="filler")
+        other = AppUser.objects.create(email="bench-retry-other@example.com", nickname="other")
+        token = AuthToken.objects.create(
+            user=filler, token=secrets.token_urlsafe(24), expires_at=timezone.now() + timedelta(hours=1)
+        )
+        survey, body = _build_survey(owner, 10)
+        key = str(uuid.uuid4())
+
+        def post(payload, idempotency_key=key):
+            headers = {"HTTP_AUTHORIZATION": f"Bearer {token.token}"}
+            if idempotency_key:
+                headers["HTTP_IDEMPOTENCY_KEY"] = idempotency_key
+            request = factory.post(
+                f"/api/v1/surveys/{survey.id}/fills", payload, content_type="application/json", **headers
+            )
+            return submit_fill(request, str(survey.id))
+
+        with CaptureQueriesContext(connection) as first_queries:
+            first = post(body)
+        if first.status_code != 200:
+            raise AssertionError(f"submit failed: {first.status_code} {first.content!r}")
+        # 第一次请求已经把 token 解析缓存好，重放不应再查库
+        with CaptureQueriesContext(connection) as queries:
+            retry = post(body)
+        if retry.content != first.content or retry.get("Idempotent-Replayed") != "true" or len(queries):
+            raise AssertionError(f"retry was not replayed from cache ({len(queries)} queries)")
+        stdout.write(f"first submit {len(first_queries)} queries, retry replayed with {len(queries)} queries")
+
+        mismatch = post(body.replace("180", "181"))
+        if mismatch.status_code != 422:
+            raise AssertionError(f"key reuse with a different body returned {mismatch.status_code}")
+        duplicate = post(body, idempotency_key=None)
+        if duplicate.status_code != 422 or b"already filled" not in duplicate.content:
+            raise AssertionError(f"duplicate without key returned {duplicate.status_code} {duplicate.content!r}")
+        stdout.write("key reuse with a different body -> 422, duplicate without key -> 422 already filled")
+
+        # 两次提交都通过了前置检查（并发重复点击），第二次在唯一约束上判重
+        survey, body = _build_survey(owner, 10)
+        answers = json.loads(body)["answers"]
+        submit_response(survey, other, answers)
+        try:
+            submit_response(survey, other, answers)
+        except AlreadyFilled as exc:
+            stdout.write(f"racing duplicate resolved by the unique constraint to response {exc.response.id}")
+        else:
+            raise AssertionError("duplicate submission was inserted twice")
+        if Response.objects.filter(survey=survey, user=other).count() != 1:
+            raise AssertionError("duplicate submission left more than one response")
+
+        report(stdout, "replayed retries", *measure(lambda: post(body), iterations))
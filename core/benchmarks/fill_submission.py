@@ -0,0 +1,115 @@
+"""答卷提交：10 题与 100 题问卷的单次提交查询数（应相同）与耗时，以及编译结构校验的吞吐（不查库）"""
+import json
+import secrets
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.benchmarks import measure, report, rollback
+from core.models import Answer, AppUser, AuthToken, Question, QuestionOption, Questionnaire, Survey
+from core.services.questionnaire_schema import schema_cache
+from core.views import submit_fill
+
+QUESTION_TYPES = ["single", "multi", "text", "multi-text"]
+
+
+def _build_survey(owner, question_count, target=1_000_000):
+    # 达到 target 会自动关闭，默认给足
+    survey = Survey.objects.create(
+        owner=owner, title=f"bench fill {question_count}", status="published", target=target
+    )
+    questionnaire = Questionnaire.objects.create(survey=survey, status="published", title=survey.title)
+    survey.active_questionnaire = questionnaire
+    survey.save(update_fields=["active_questionnaire"])
+    Question.objects.bulk_create(
+        [
+            Question(
+                questionnaire=questionnaire,
+                order_no=i + 1,
+                type=QUESTION_TYPES[i % len(QUESTION_TYPES)],
+                title=f"问题 {i + 1}",
+            )
+            for i in range(question_count)
+        ]
+    )
+    # MySQL 的 bulk_create 不回填主键，重新读出
+    questions = list(Question.objects.filter(questionnaire=questionnaire).order_by("order_no"))
+    QuestionOption.objects.bulk_create(
+        [
+            QuestionOption(question=question, order_no=j + 1, label=f"选项{j + 1}", value=f"o{j + 1}")
+            for question in questions
+            if question.type != "text"
+            for j in range(4)
+        ]
+    )
+    answers = []
+    for question in questions:
+        value = {
+            "single": "o2",
+            "multi": ["o1", "o3"],
+            "text": "菜品丰富，环境整洁",
+            "multi-text": ["张三", "13800138000", "zhangsan@example.com", "北京"],
+        }[question.type]
+        answers.append({"question_id": str(question.id), "value": value})
+    return survey, json.dumps({"answers": answers, "duration_seconds": 180})
+
+
+def run(stdout, options):
+    fills = max(options["iterations"] or 100, 2)
+    factory = RequestFactory()
+    with rollback():
+        owner = AppUser.objects.create(email="bench-fill@example.com", nickname="bench")
+        fillers = AppUser.objects.bulk_create(
+            [AppUser(email=f"bench-fill-{i}@example.com", nickname=f"f{i}") for i in range(fills * 2)]
+        )
+        expires_at = timezone.now() + timedelta(hours=1)
+        tokens = AuthToken.objects.bulk_create(
+            [AuthToken(user=user, token=secrets.token_urlsafe(24), expires_at=expires_at) for user in fillers]
+        )
+
+        query_counts = set()
+        for round_no, question_count in enumerate((10, 100)):
+            survey, body = _build_survey(owner, question_count)
+            round_tokens = tokens[round_no * fills:(round_no + 1) * fills]
+            requests = [
+                factory.post(
+                    f"/api/v1/surveys/{survey.id}/fills",
+                    body,
+                    content_type="application/json",
+                    HTTP_AUTHORIZATION=f"Bearer {token.token}",
+                )
+                for token in round_tokens
+            ]
+            # 第一次提交编译问卷结构，之后命中缓存
+            with CaptureQueriesContext(connection) as cold:
+                submit_fill(requests[0], str(survey.id))
+            with CaptureQueriesContext(connection) as queries:
+                response = submit_fill(requests[1], str(survey.id))
+            if response.status_code != 200:
+                raise AssertionError(f"submit failed: {response.status_code} {response.content!r}")
+            query_counts.add(len(queries))
+            started = time.perf_counter()
+            for request in requests[2:]:
+                submit_fill(request, str(survey.id))
+            avg_ms = (time.perf_counter() - started) * 1000 / max(len(requests) - 2, 1)
+            answers = Answer.objects.filter(response__survey=survey).count()
+            if answers != question_count * fills:
+                raise AssertionError(f"expected {question_count * fills} answers, found {answers}")
+            stdout.write(
+                f"questions={question_count:<4} queries={len(queries):<3} (cold {len(cold)}) avg={avg_ms:.2f} ms per submit"
+            )
+
+            schema = schema_cache.get(Questionnaire.objects.get(id=survey.active_questionnaire_id))
+            answers = json.loads(body)["answers"]
+            with CaptureQueriesContext(connection) as queries:
+                schema.validate(answers)
+            if len(queries):
+                raise AssertionError(f"validation ran {len(queries)} queries")
+            report(stdout, f"validate {question_count} answers", *measure(lambda: schema.validate(answers), fills * 10))
+        if len(query_counts) != 1:
+            raise AssertionError(f"query count depends on question count: {sorted(query_counts)}")
+        stdout.write("query count is constant across question counts")
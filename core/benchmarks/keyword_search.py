@@ -0,0 +1,51 @@
+"""关键词检索：icontains 全表扫描 vs FULLTEXT(ngram) 索引检索"""
+import random
+import time
+
+from django.db import connection
+from django.db.models import Q
+
+from core.benchmarks import rollback
+from core.managers.task_card_manager import TaskCardManager
+from core.models import AppUser, Survey, TaskCard
+from core.search import keyword_search
+
+WORDS = ["校园", "食堂", "满意度", "调查", "宿舍", "学习", "习惯", "就业", "意向", "运动",
+         "健康", "图书馆", "社团", "活动", "通勤", "消费", "心理", "睡眠", "课程", "反馈"]
+
+
+def _timed(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) * 1000 / rounds
+
+
+def run(stdout, options):
+    rounds = options["iterations"] or 10
+    count = 100000
+    rng = random.Random(42)
+    stdout.write(f"database: {connection.vendor}, surveys: {count}")
+    with rollback():
+        owner = AppUser.objects.create(email="bench-search@example.com", nickname="bench")
+        Survey.objects.bulk_create(
+            (
+                Survey(
+                    owner=owner,
+                    title="".join(rng.sample(WORDS, 3)),
+                    description="".join(rng.sample(WORDS, 6)),
+                    status="published",
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
+        TaskCardManager.rebuild(batch_size=5000)
+        for keyword in ("食堂满意度", "睡眠"):
+            icontains = TaskCard.objects.filter(Q(title__icontains=keyword) | Q(subtitle__icontains=keyword))
+            indexed = keyword_search(TaskCard.objects.all(), keyword, ["title", "subtitle"])
+            stdout.write(f"keyword={keyword}")
+            stdout.write(f"  icontains, first page   {_timed(lambda: list(icontains.order_by('-created_at')[:20]), rounds):>8.2f} ms")
+            stdout.write(f"  icontains, count        {_timed(icontains.count, rounds):>8.2f} ms")
+            stdout.write(f"  fulltext, ranked page   {_timed(lambda: list(indexed.order_by('-relevance', '-created_at')[:20]), rounds):>8.2f} ms")
+            stdout.write(f"  fulltext, count         {_timed(indexed.count, rounds):>8.2f} ms")
@@ -0,0 +1,46 @@
+"""OFFSET 分页 vs 游标分页：第 1 页与第 1000 页的耗时"""
+import time
+
+from core.benchmarks import rollback
+from core.models import AppUser, Survey
+from core.pagination import encode_cursor, keyset_page
+
+PAGE_SIZE = 20
+ORDERING = ["-created_at", "-id"]
+
+
+def _timed(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) * 1000 / rounds
+
+
+def run(stdout, options):
+    rounds = options["iterations"] or 20
+    pages = 1000
+    with rollback():
+        owner = AppUser.objects.create(email="bench-pages@example.com", nickname="bench")
+        Survey.objects.bulk_create(
+            (Survey(owner=owner, title=f"bench survey {i}", status="published") for i in range(pages * PAGE_SIZE)),
+            batch_size=2000,
+        )
+        queryset = Survey.objects.filter(status="published")
+
+        def offset_page(page):
+            queryset.count()
+            offset = (page - 1) * PAGE_SIZE
+            return list(queryset.order_by(*ORDERING)[offset : offset + PAGE_SIZE])
+
+        # 第 1000 页的游标 = 第 999 页最后一条
+        anchor = queryset.order_by(*ORDERING)[(pages - 1) * PAGE_SIZE - 1]
+        deep_cursor = encode_cursor(anchor, ORDERING)
+        assert keyset_page(queryset, ORDERING, deep_cursor, PAGE_SIZE)[0] == offset_page(pages)
+
+        for label, fn in (
+            ("offset + count, page 1", lambda: offset_page(1)),
+            (f"offset + count, page {pages}", lambda: offset_page(pages)),
+            ("cursor, page 1", lambda: keyset_page(queryset, ORDERING, "", PAGE_SIZE)),
+            (f"cursor, page {pages}", lambda: keyset_page(queryset, ORDERING, deep_cursor, PAGE_SIZE)),
+        ):
+            stdout.write(f"{label:<32} {_timed(fn, rounds):>8.2f} ms")
@@ -0,0 +1,38 @@
+"""登录密码校验吞吐：请求线程内联计算 vs 哈希线程池，输出每核每秒登录数"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import hashers
+
+from core.benchmarks import measure, report
+from core.services.password_hasher import HasherBusy, password_hasher
+
+
+def run(stdout, options):
+    logins = options["iterations"] or password_hasher.workers * 8
+    encoded = hashers.make_password("bench-password")
+    cores = min(password_hasher.workers, os.cpu_count() or 1)
+    stdout.write(f"PBKDF2 iterations: {hashers.get_hasher().iterations}, pool workers: {password_hasher.workers}")
+
+    per_second, avg_ms = measure(lambda: hashers.check_password("bench-password", encoded), max(logins // 4, 1))
+    report(stdout, "inline, 1 request thread", per_second, avg_ms)
+
+    rejected = 0
+
+    def login():
+        nonlocal rejected
+        try:
+            password_hasher.check_password("bench-password", encoded)
+        except HasherBusy:
+            rejected += 1
+
+    # 客户端并发是线程池的两倍，排队上限会让多出的请求快速失败
+    with ThreadPoolExecutor(max_workers=password_hasher.workers * 2) as clients:
+        started = time.perf_counter()
+        list(clients.map(lambda _: login(), range(logins)))
+        elapsed = time.perf_counter() - started
+    completed = logins - rejected
+    report(stdout, "hash pool, total", completed / elapsed, elapsed * 1000 / max(completed, 1))
+    report(stdout, f"hash pool, per core ({cores} cores)", completed / elapsed / cores, elapsed * 1000 * cores / max(completed, 1))
+    stdout.write(f"rejected with 503 (queue full): {rejected}/{logins}")
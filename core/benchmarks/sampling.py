@@ -0,0 +1,70 @@
+"""
+“换一批”加权抽样：别名表构建、单批抽样耗时，以及抽样分布与种子可复现性检查
+"""
+import random
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from core.benchmarks import measure, report
+from core.services.sampling_pool import SamplingPool, build_alias_table
+
+POOL_SIZE = 5000
+BATCH_SIZE = 15
+
+
+def _check_distribution(stdout):
+    weights = np.array([1.0, 2.0, 3.0, 4.0])
+    prob, alias = build_alias_table(weights)
+    rng = np.random.default_rng(7)
+    draws = 200000
+    slots = rng.integers(len(weights), size=draws)
+    rows = np.where(rng.random(draws) < prob[slots], slots, alias[slots])
+    observed = np.bincount(rows, minlength=len(weights)) / draws
+    expected = weights / weights.sum()
+    stdout.write(f"alias table: expected {np.round(expected, 3)} observed {np.round(observed, 3)}")
+    if np.max(np.abs(observed - expected)) > 0.01:
+        raise AssertionError("alias table sampling does not follow the weights")
+
+
+def run(stdout, options):
+    iterations = options["iterations"] or 2000
+    rng = random.Random(42)
+    now = timezone.now()
+    rows = [
+        (
+            survey_id,
+            rng.randint(0, 50),
+            rng.choice([None, 3, 5, 8, 10, 15, 20]),
+            rng.choice([None, now + timedelta(hours=rng.randint(1, 2000))]),
+            rng.randint(0, 200),
+            200,
+            "published",
+            now,
+        )
+        for survey_id in range(1, POOL_SIZE + 1)
+    ]
+
+    def load_rows(since=None, limit=None):
+        return rows[:limit] if since is None else []
+
+    pool = SamplingPool(limit=POOL_SIZE, refresh_interval=3600, reload_interval=3600, load_rows=load_rows)
+    report(stdout, f"full load + alias table ({POOL_SIZE})", *measure(lambda: pool.refresh(force=True), 10))
+
+    generator = np.random.default_rng(1)
+    report(stdout, f"sample batch of {BATCH_SIZE}", *measure(lambda: pool.sample(BATCH_SIZE, rng=generator), iterations))
+
+    seen = set(range(1, POOL_SIZE // 2))
+    report(
+        stdout,
+        f"sample batch of {BATCH_SIZE}, half seen",
+        *measure(lambda: pool.sample(BATCH_SIZE, seen, generator), iterations),
+    )
+
+    first = pool.sample(BATCH_SIZE, rng=np.random.default_rng(123))
+    second = pool.sample(BATCH_SIZE, rng=np.random.default_rng(123))
+    if first != second or len(set(first)) != BATCH_SIZE:
+        raise AssertionError("seeded samples are not reproducible or contain duplicates")
+    stdout.write(f"seed 123 -> {first[:5]} ... (reproducible)")
+    _check_distribution(stdout)
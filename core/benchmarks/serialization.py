@@ -0,0 +1,58 @@
+"""任务大厅一页 50 张卡片的 JSON 序列化：标准库 json 与 orjson 的耗时，gzip / br 压缩后的大小"""
+import gzip
+
+from core import serialization
+from core.benchmarks import measure, report, rollback
+from core.managers.task_card_manager import TaskCardManager
+from core.models import AppUser, Survey, SurveyTag, Tag
+from core.services.task_hall_service import TaskHallService
+
+
+def run(stdout, options):
+    iterations = options["iterations"] or 2000
+    with rollback():
+        owner = AppUser.objects.create(email="bench-json@example.com", nickname="bench")
+        reader = AppUser.objects.create(email="bench-json-reader@example.com", nickname="reader")
+        surveys = Survey.objects.bulk_create(
+            [
+                Survey(
+                    owner=owner,
+                    title=f"大学生消费习惯调查 第{i}期",
+                    description="关于日常消费、理财与兼职收入的问卷，约需十分钟",
+                    reward_points=10 + i % 40,
+                    estimated_minutes=5 + i % 20,
+                    status="published",
+                )
+                for i in range(50)
+            ]
+        )
+        tags = Tag.objects.bulk_create([Tag(name=f"类型{i}", type=Tag.TYPE_SURVEY) for i in range(5)])
+        SurveyTag.objects.bulk_create(
+            [SurveyTag(survey=survey, tag=tags[i % len(tags)]) for i, survey in enumerate(surveys)]
+        )
+        TaskCardManager.sync([survey.id for survey in surveys])
+        payload = TaskHallService.list_tasks(reader, {"page": 1, "page_size": 50})
+    if len(payload["items"]) != 50:
+        raise AssertionError(f"expected 50 cards, got {len(payload['items'])}")
+
+    stdlib_body = serialization.json_dumps(payload)
+    body = serialization.dumps(payload)
+    if serialization.json_loads(body) != serialization.json_loads(stdlib_body):
+        raise AssertionError("orjson and stdlib outputs differ")
+
+    report(stdout, "json (stdlib)", *measure(lambda: serialization.json_dumps(payload), iterations))
+    if serialization.orjson is not None:
+        report(stdout, "orjson", *measure(lambda: serialization.dumps(payload), iterations))
+    else:
+        stdout.write("orjson not installed, dumps() uses the stdlib path")
+
+    stdout.write(f"raw         {len(body):>8,} bytes")
+    gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+    stdout.write(f"gzip (6)    {len(gzipped):>8,} bytes ({len(gzipped) / len(body):.0%})")
+    compress_rounds = iterations // 10 or 1
+    report(stdout, "gzip compress", *measure(lambda: gzip.compress(body, compresslevel=6, mtime=0), compress_rounds))
+    if serialization.brotli is not None:
+        compressed = serialization.brotli.compress(body, quality=5)
+        stdout.write(f"br (5)      {len(compressed):>8,} bytes ({len(compressed) / len(body):.0%})")
+    else:
+        stdout.write("brotli not installed, br is not offered")
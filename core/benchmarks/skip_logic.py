@@ -0,0 +1,187 @@
+"""
+跳题逻辑：编译后的闭包与直接解释 logic_json 的参考实现每秒能走完多少次作答路径（100 题问卷，不查库）
+
+参考实现与随机问卷、随机作答的生成也供 core/tests.py 的 SkipLogicFuzzTests 逐一比对两者结果。
+"""
+import random
+
+from core.benchmarks import measure, report
+from core.models import Question, QuestionOption, Questionnaire
+from core.services.questionnaire_schema import QuestionnaireSchema, _is_blank
+
+OPTIONS = ["o1", "o2", "o3", "o4"]
+QUESTION_TYPES = ["single", "multi", "text"]
+COMPARE_OPS = ["gt", "gte", "lt", "lte"]
+VALUE_OPS = ["answered", "not_answered", "eq", "ne", "in", "not_in", "contains"]
+
+
+# ---- 参考实现：每次作答都直接解释 logic_json ----
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _holds(node, values, ids_by_order):
+    if "all" in node:
+        return all(_holds(child, values, ids_by_order) for child in node["all"])
+    if "any" in node:
+        return any(_holds(child, values, ids_by_order) for child in node["any"])
+    if "not" in node:
+        return not _holds(node["not"], values, ids_by_order)
+    question_id = ids_by_order[node["q"]]
+    op, operand = node["op"], node.get("value")
+    answered = question_id in values
+    value = values.get(question_id)
+    if op == "answered":
+        return answered
+    if op == "not_answered":
+        return not answered
+    if op == "eq":
+        return value == operand
+    if op == "ne":
+        return value != operand
+    if op in ("in", "not_in"):
+        member = isinstance(value, (str, int, float)) and value in operand
+        return member if op == "in" else answered and not member
+    if op == "contains":
+        return isinstance(value, (list, str)) and operand in value
+    number = _number(value)
+    if number is None:
+        return False
+    bound = float(operand)
+    return {"gt": number > bound, "gte": number >= bound, "lt": number < bound, "lte": number <= bound}[op]
+
+
+def reference_route(questions, answers):
+    """questions 为按 order_no 排好的 Question，返回 [(question_id, 是否必答)]"""
+    ids_by_order = {question.order_no: question.id for question in questions}
+    values = {}
+    reached = []
+    index = 0
+    while index < len(questions):
+        question = questions[index]
+        index += 1
+        logic = question.logic_json or {}
+        if logic.get("show_if") and not _holds(logic["show_if"], values, ids_by_order):
+            continue
+        if logic.get("required_if"):
+            required = _holds(logic["required_if"], values, ids_by_order)
+        else:
+            required = question.is_required
+        reached.append((question.id, required))
+        value = answers.get(question.id)
+        if not _is_blank(value):
+            values[question.id] = value
+        for rule in logic.get("jump") or ():
+            if _holds(rule["if"], values, ids_by_order):
+                if rule["to"] == "end":
+                    index = len(questions)
+                else:
+                    index = next((k for k, q in enumerate(questions) if q.order_no >= rule["to"]), len(questions))
+                break
+    return reached
+
+
+# ---- 随机问卷与作答 ----
+
+def _random_condition(rng, orders, depth=0):
+    roll = rng.random()
+    if depth < 2 and roll < 0.15:
+        key = rng.choice(["all", "any"])
+        return {key: [_random_condition(rng, orders, depth + 1) for _ in range(rng.randint(1, 3))]}
+    if depth < 2 and roll < 0.2:
+        return {"not": _random_condition(rng, orders, depth + 1)}
+    q = rng.choice(orders)
+    op = rng.choice(VALUE_OPS + COMPARE_OPS)
+    if op in COMPARE_OPS:
+        value = rng.randint(0, 10)
+    elif op in ("in", "not_in"):
+        value = rng.sample(OPTIONS, rng.randint(1, 3))
+    else:
+        value = rng.choice(OPTIONS)
+    return {"q": q, "op": op, "value": value}
+
+
+def _random_questions(rng, count):
+    # order_no 不连续，跳转目标可能落在两题之间
+    orders = sorted(rng.sample(range(1, count * 3), count))
+    questions = []
+    for index, order in enumerate(orders):
+        logic = {}
+        if rng.random() < 0.3:
+            logic["show_if"] = _random_condition(rng, orders)
+        if rng.random() < 0.2:
+            logic["required_if"] = _random_condition(rng, orders)
+        if index + 1 < count and rng.random() < 0.3:
+            logic["jump"] = [
+                {"if": _random_condition(rng, orders), "to": rng.choice(["end", rng.randint(order + 1, orders[-1] + 2)])}
+                for _ in range(rng.randint(1, 2))
+            ]
+        questions.append(
+            Question(
+                id=index + 1,
+                order_no=order,
+                type=rng.choice(QUESTION_TYPES),
+                title=f"问题 {order}",
+                is_required=rng.random() < 0.5,
+                logic_json=logic or None,
+            )
+        )
+    return questions
+
+
+def _random_answers(rng, questions):
+    answers = {}
+    for question in questions:
+        roll = rng.random()
+        if roll < 0.2:
+            continue
+        if roll < 0.3:
+            answers[question.id] = rng.choice(["", [], None])
+        elif question.type == "single":
+            answers[question.id] = rng.choice(OPTIONS)
+        elif question.type == "multi":
+            answers[question.id] = rng.sample(OPTIONS, rng.randint(1, 4))
+        else:
+            answers[question.id] = rng.choice([str(rng.randint(0, 10)), "o2", "o1 o3", "无"])
+    return answers
+
+
+def _schema(questions):
+    options = {
+        question.id: [
+            QuestionOption(question_id=question.id, order_no=j + 1, label=value, value=value)
+            for j, value in enumerate(OPTIONS)
+        ]
+        for question in questions
+        if question.type != "text"
+    }
+    return QuestionnaireSchema(Questionnaire(id=1, version=1), questions, options)
+
+
+def run(stdout, options):
+    rng = random.Random(20261018)
+    questions = _random_questions(rng, 100)
+    schema = _schema(questions)
+    samples = [_random_answers(rng, questions) for _ in range(100)]
+    evaluations = len(samples) * max(options["iterations"] or 50, 1)
+    cursor = iter(range(evaluations))
+
+    def compiled():
+        schema.route(samples[next(cursor) % len(samples)])
+
+    per_s, avg_ms = measure(compiled, evaluations)
+    report(stdout, "compiled route (100 questions)", per_s, avg_ms)
+    cursor = iter(range(evaluations))
+
+    def reference():
+        reference_route(questions, samples[next(cursor) % len(samples)])
+
+    reference_per_s, reference_ms = measure(reference, evaluations)
+    report(stdout, "reference interpreter (100 questions)", reference_per_s, reference_ms)
+    stdout.write(f"compiled is {per_s / reference_per_s:.1f}x the reference")
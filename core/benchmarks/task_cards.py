@@ -0,0 +1,40 @@
+"""任务大厅列表：不同页大小下的查询次数与耗时；查询次数为常数由 core/tests.py 的 TaskCardQueryTests 保证"""
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.benchmarks import rollback
+from core.managers.task_card_manager import TaskCardManager
+from core.managers.task_hall_manager import TaskHallManager
+from core.models import AppUser, Survey, SurveyTag, Tag
+
+
+def run(stdout, options):
+    rounds = options["iterations"] or 50
+    with rollback():
+        owner = AppUser.objects.create(email="bench-cards@example.com", nickname="bench")
+        surveys = Survey.objects.bulk_create(
+            [Survey(owner=owner, title=f"bench survey {i}", status="published") for i in range(60)]
+        )
+        tags = Tag.objects.bulk_create([Tag(name=f"类型{i}", type=Tag.TYPE_SURVEY) for i in range(5)])
+        SurveyTag.objects.bulk_create(
+            [SurveyTag(survey=survey, tag=tags[i % len(tags)]) for i, survey in enumerate(surveys)]
+        )
+        # bulk_create 不触发信号，手动生成卡片
+        TaskCardManager.sync([survey.id for survey in surveys])
+
+        query_counts = set()
+        for page_size in (1, 10, 20, 50):
+            filters = {"page": 1, "page_size": page_size}
+            with CaptureQueriesContext(connection) as queries:
+                TaskHallManager.list_tasks(filters)
+            query_counts.add(len(queries))
+            started = time.perf_counter()
+            for _ in range(rounds):
+                TaskHallManager.list_tasks(filters)
+            avg_ms = (time.perf_counter() - started) * 1000 / rounds
+            stdout.write(f"page_size={page_size:<3} queries={len(queries):<3} avg={avg_ms:.2f} ms")
+        if len(query_counts) != 1:
+            raise AssertionError(f"query count depends on page size: {sorted(query_counts)}")
+        stdout.write("query count is constant across page sizes")
@@ -0,0 +1,110 @@
+"""
+任务大厅排序：每种 sort 的执行计划与耗时
+
+用 EXPLAIN 检查每种排序都能按索引顺序读取（无 filesort / 临时排序、无全表扫描），
+否则抛出 AssertionError。支持 MySQL 与 SQLite 的执行计划格式；
+MySQL 上的同一检查也在 core/tests.py 的 TaskHallPlanTests 里，随测试运行。
+"""
+import random
+import re
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from core.benchmarks import rollback
+from core.managers.task_hall_manager import TaskHallManager
+from core.models import AppUser, Survey, SurveyTag, Tag, TaskCard
+
+PAGE_SIZE = 20
+
+
+def _timed(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) * 1000 / rounds
+
+
+def _plan_problems(plan):
+    problems = []
+    if connection.vendor == "mysql":
+        # 传统格式每行：id select_type table partitions type possible_keys key ...
+        for line in plan.splitlines():
+            columns = line.split(" ")
+            if len(columns) > 4 and columns[2] == TaskCard._meta.db_table and columns[4] == "ALL":
+                problems.append("full table scan")
+        if "Using filesort" in plan:
+            problems.append("filesort")
+    elif connection.vendor == "sqlite":
+        if re.search(rf"SCAN {TaskCard._meta.db_table}(?! USING)", plan):
+            problems.append("full table scan")
+        if "USE TEMP B-TREE FOR ORDER BY" in plan:
+            problems.append("temp b-tree sort")
+    return problems
+
+
+def _page_queryset(filters):
+    queryset = TaskHallManager._apply_filters(TaskHallManager._base_queryset(), filters)
+    return queryset.order_by(*TaskHallManager._ordering(filters))[:PAGE_SIZE]
+
+
+def run(stdout, options):
+    rounds = options["iterations"] or 20
+    count = 50000
+    rng = random.Random(42)
+    now = timezone.now()
+    stdout.write(f"database: {connection.vendor}, task cards: {count}")
+    with rollback():
+        owner = AppUser.objects.create(email="bench-sorts@example.com", nickname="bench")
+        surveys = Survey.objects.bulk_create(
+            (Survey(owner=owner, title=f"bench survey {i}", status="published") for i in range(count)),
+            batch_size=5000,
+        )
+        statuses = ["published"] * 8 + ["closed", "draft"]
+        TaskCard.objects.bulk_create(
+            (
+                TaskCard(
+                    survey=survey,
+                    owner=owner,
+                    title=survey.title,
+                    sender_nickname="bench",
+                    estimated_minutes=rng.choice([None, 3, 5, 8, 10, 15, 20]),
+                    difficulty=rng.randint(1, 5),
+                    reward=rng.randint(0, 50),
+                    filled_count=rng.randint(0, 200),
+                    target=200,
+                    deadline=rng.choice([None, now + timedelta(hours=rng.randint(1, 2000))]),
+                    status=rng.choice(statuses),
+                    created_at=now - timedelta(seconds=i),
+                )
+                for i, survey in enumerate(surveys)
+            ),
+            batch_size=5000,
+        )
+        tags = Tag.objects.bulk_create([Tag(name=f"类型{i}", type=Tag.TYPE_SURVEY) for i in range(10)])
+        SurveyTag.objects.bulk_create(
+            (SurveyTag(survey=survey, tag=tags[i % len(tags)]) for i, survey in enumerate(surveys)),
+            batch_size=5000,
+        )
+
+        failures = []
+        for sort in TaskHallManager.SORT_ORDERINGS:
+            filters = {"status": "published", "sort": sort}
+            queryset = _page_queryset(filters)
+            problems = _plan_problems(queryset.explain())
+            elapsed = _timed(lambda: list(_page_queryset(filters)), rounds)
+            stdout.write(f"sort={sort:<12} {elapsed:>8.2f} ms  plan: {', '.join(problems) or 'ok'}")
+            if problems:
+                failures.append(sort)
+
+        # 类型筛选走 SurveyTag 的 EXISTS 子查询，驱动表由优化器按类型选择度决定，只展示不断言
+        filters = {"status": "published", "sort": "reward_desc", "type": tags[0].name}
+        problems = _plan_problems(_page_queryset(filters).explain())
+        elapsed = _timed(lambda: list(_page_queryset(filters)), rounds)
+        stdout.write(f"type + reward_desc {elapsed:>8.2f} ms  plan: {', '.join(problems) or 'ok'}")
+
+        if failures:
+            raise AssertionError(f"sort modes without an index-ordered plan: {failures}")
+        stdout.write("every sort mode reads in index order")
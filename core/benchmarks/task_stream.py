@@ -0,0 +1,149 @@
+"""
+任务大厅 SSE 推送的本地压测：通过 ASGI 应用建立大量空闲连接，测每个连接的内存占用、
+发布事件后全部连接收齐的耗时，并检查新任务事件不会推给发布者本人
+"""
+import asyncio
+import secrets
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.core.asgi import get_asgi_application
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.benchmarks import rollback
+from core.models import AppUser, AuthToken, Survey
+from core.services.task_events import task_events
+
+
+class StreamClient:
+    def __init__(self, token):
+        self.token = token
+        self.chunks = []
+        self.ready = asyncio.Event()
+        self.received = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self.expected = 0
+        self.events = 0
+        self.finished_at = None
+        self.sent_request = False
+
+    def scope(self):
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/v1/task-hall/stream",
+            "raw_path": b"/api/v1/task-hall/stream",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"authorization", f"Bearer {self.token}".encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": ("localhost", 80),
+        }
+
+    async def receive(self):
+        if not self.sent_request:
+            self.sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] != "http.response.body":
+            return
+        body = message.get("body", b"")
+        if body.startswith(b"retry:"):
+            self.ready.set()
+        elif body.startswith(b"id:"):
+            self.chunks.append(body)
+            self.events += 1
+            if self.events >= self.expected:
+                self.finished_at = time.perf_counter()
+                self.received.set()
+
+
+def run(stdout, options):
+    connections = options["iterations"] or 2000
+    users = min(connections, 200)
+    # ASGI 处理器在请求前后会关闭“状态异常”的连接，这里整个压测在一个回滚事务里，先摘掉
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        with rollback():
+            accounts = AppUser.objects.bulk_create(
+                [AppUser(email=f"bench-stream-{i}@example.com", nickname=f"s{i}") for i in range(users)]
+            )
+            expires_at = timezone.now() + timedelta(hours=1)
+            tokens = AuthToken.objects.bulk_create(
+                [AuthToken(user=user, token=secrets.token_urlsafe(24), expires_at=expires_at) for user in accounts]
+            )
+            owner = accounts[0]
+            async_to_sync(_load_test)(stdout, connections, tokens, owner)
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+
+
+async def _load_test(stdout, connections, tokens, owner):
+    application = get_asgi_application()
+    published = 20
+    clients = [StreamClient(tokens[i % len(tokens)].token) for i in range(connections)]
+    owner_clients = [client for i, client in enumerate(clients) if tokens[i % len(tokens)].user_id == owner.id]
+    for client in clients:
+        # 每个新任务各一条、最后一条关闭事件
+        client.expected = published + 1
+    for client in owner_clients:
+        # 发布者本人只收得到关闭事件
+        client.expected = 1
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(application(client.scope(), client.receive, client.send)) for client in clients]
+    await asyncio.gather(*(client.ready.wait() for client in clients))
+    connect_seconds = time.perf_counter() - started
+    per_connection = (tracemalloc.get_traced_memory()[0] - baseline) / connections
+    tracemalloc.stop()
+    stdout.write(f"connections={connections} connect={connect_seconds:.2f}s ({connections / connect_seconds:,.0f}/s)")
+    stdout.write(f"memory per idle connection ~{per_connection / 1024:.1f} KiB (tracemalloc)")
+    if task_events.subscriber_count() < connections:
+        raise AssertionError(f"only {task_events.subscriber_count()} of {connections} connections subscribed")
+
+    # 事件从其他线程发布，走与信号相同的跨线程投递路径
+    surveys = [
+        Survey(id=10_000_000 + i, owner_id=owner.id, title=f"stream {i}", reward_points=i) for i in range(published)
+    ]
+
+    def publish():
+        for survey in surveys:
+            task_events.publish(task_events.new_task(survey))
+        task_events.publish(task_events.closed_tasks([survey.id for survey in surveys]))
+
+    started = time.perf_counter()
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    await asyncio.wait_for(asyncio.gather(*(client.received.wait() for client in clients)), timeout=60)
+    publisher.join()
+    latest = max(client.finished_at for client in clients) - started
+    deliveries = sum(client.events for client in clients)
+    stdout.write(f"events={published + 1} deliveries={deliveries:,} all delivered in {latest * 1000:.1f} ms")
+    stdout.write(f"fan-out {deliveries / latest:,.0f} deliveries/s")
+
+    for client in owner_clients:
+        if client.events != 1 or b"\nevent: task.closed\n" not in client.chunks[0]:
+            raise AssertionError("owner received a task.new event for their own survey")
+    stdout.write(f"owner connections={len(owner_clients)} received only task.closed")
+
+    for client in clients:
+        client.disconnect.set()
+    await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=60)
+    if task_events.subscriber_count():
+        raise AssertionError(f"{task_events.subscriber_count()} subscriptions left after disconnect")
+    stdout.write("all subscriptions released after disconnect")
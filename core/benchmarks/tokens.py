@@ -0,0 +1,39 @@
+"""token 校验吞吐：opaque（查表 / token 缓存）对比 signed（HMAC + 吊销集合）"""
+from datetime import timedelta
+
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.benchmarks import measure, report, rollback
+from core.models import AppUser, AuthToken
+from core.services.signed_token import sign_token, verify_token
+from core.services.token_cache import token_cache
+from core.views import get_current_user
+
+
+def run(stdout, options):
+    iterations = options["iterations"] or 2000
+    factory = RequestFactory()
+    with rollback():
+        user = AppUser.objects.create(email="bench-tokens@example.com", nickname="bench")
+        expires_at = timezone.now() + timedelta(hours=1)
+        opaque = AuthToken.objects.create(user=user, token="bench-opaque-token", expires_at=expires_at)
+        record = AuthToken.objects.create(user=user, token="bench-signed-record", expires_at=expires_at)
+        signed = sign_token(user.id, expires_at, record.id)
+
+        opaque_request = factory.get("/", HTTP_AUTHORIZATION=f"Bearer {opaque.token}")
+        signed_request = factory.get("/", HTTP_AUTHORIZATION=f"Bearer {signed}")
+
+        ttl = token_cache.ttl
+        try:
+            token_cache.ttl = 0
+            report(stdout, "opaque, database lookup", *measure(lambda: get_current_user(opaque_request), iterations))
+            token_cache.ttl = ttl or 30
+            token_cache.clear()
+            # 命中时只读版本号和缓存的用户快照，不查库
+            report(stdout, "opaque, token cache", *measure(lambda: get_current_user(opaque_request), iterations))
+        finally:
+            token_cache.ttl = ttl
+            token_cache.clear()
+        report(stdout, "signed, user snapshot", *measure(lambda: get_current_user(signed_request), iterations))
+        report(stdout, "signed, signature check only", *measure(lambda: verify_token(signed), iterations * 10))
@@ -0,0 +1,117 @@
+"""
+条件 GET：ETag / If-None-Match
+
+ETag 由接口名和相关版本号（core/services/versions.py）哈希得到，在执行任何列表查询之前就能算出；
+命中时直接返回 304。响应体被压缩时 ETag 追加编码后缀（"...-gzip"），不同编码的表示不共用同一个强 ETag，
+比较时忽略该后缀。各接口的请求数与 304 数记在 CACHES 别名里，供 `python Main.py conditional_stats` 查看。
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+ENCODINGS = ("gzip", "br")
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def matched_etag(request, etag):
+    """返回 If-None-Match 中与 etag 匹配的那一项（保留编码后缀），没有匹配时返回 None"""
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return None
+    # If-None-Match 用弱比较：忽略 W/ 前缀和压缩编码后缀
+    for tag in parse_etags(header):
+        tag = tag[2:] if tag.startswith("W/") else tag
+        if tag == "*":
+            return etag
+        if _strip_encoding(tag) == etag:
+            return tag
+    return None
+
+
+def _strip_encoding(etag):
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+def _encoded_etag(etag, encoding):
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+class ConditionalMetrics:
+    KEY_PREFIX = "conditional_get:"
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    def _incr(self, key):
+        cache = caches[self.alias]
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    def record(self, endpoint, not_modified):
+        self._incr(f"{self.KEY_PREFIX}{endpoint}:requests")
+        if not_modified:
+            self._incr(f"{self.KEY_PREFIX}{endpoint}:not_modified")
+
+    def stats(self, endpoints):
+        cache = caches[self.alias]
+        result = {}
+        for endpoint in endpoints:
+            requests = cache.get(f"{self.KEY_PREFIX}{endpoint}:requests", 0)
+            not_modified = cache.get(f"{self.KEY_PREFIX}{endpoint}:not_modified", 0)
+            result[endpoint] = {
+                "requests": requests,
+                "not_modified": not_modified,
+                "ratio": not_modified / requests if requests else 0.0,
+            }
+        return result
+
+    def reset(self, endpoints):
+        keys = []
+        for endpoint in endpoints:
+            keys += [f"{self.KEY_PREFIX}{endpoint}:requests", f"{self.KEY_PREFIX}{endpoint}:not_modified"]
+        caches[self.alias].delete_many(keys)
+
+
+# 接入条件 GET 的接口，conditional_stats 命令按此列表汇总
+ENDPOINTS = ["survey_detail", "task_hall_tasks", "task_hall_overview", "user_profile"]
+
+metrics = ConditionalMetrics(alias=getattr(settings, "VERSION_CACHE_ALIAS", "default"))
+
+
+def conditional_response(request, endpoint, etag, build, private=True):
+    """
+    If-None-Match 命中 etag 时返回 304，否则调用 build() 生成响应并带上 ETag
+
+    只有 200 响应才带 ETag；private=True 时响应只允许客户端自己缓存。
+    304 的 ETag 原样回传客户端缓存的那一项，编码后缀与它手里的 200 响应一致。
+    """
+    cache_control = "private, no-cache" if private else "no-cache"
+    cached = matched_etag(request, etag)
+    if cached is not None:
+        metrics.record(endpoint, True)
+        response = HttpResponseNotModified()
+        response["ETag"] = cached
+        response["Cache-Control"] = cache_control
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+    metrics.record(endpoint, False)
+    response = build()
+    if response.status_code == 200:
+        response["ETag"] = _encoded_etag(etag, response.get("Content-Encoding"))
+        response["Cache-Control"] = cache_control
+    return response
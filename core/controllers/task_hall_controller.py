@@ -1,19 +1,25 @@
-import json
+import asyncio
+import time
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
+from core.conditional import conditional_response, make_etag
+from core.serialization import json_response, parse_json
+from core.services.stream_tickets import is_active, stream_tickets
+from core.services.task_events import task_events
 from core.services.task_hall_service import TaskHallService
-from core.views import error, require_auth
+from core.services.versions import versions
+from core.views import error, get_bearer_token, get_token_session, require_auth
 
-
-def parse_json(request):
-    if not request.body:
-        return {}
-    try:
-        return json.loads(request.body.decode("utf-8"))
-    except json.JSONDecodeError:
-        return {}
+# 没有事件时每隔这么多秒发一行注释，防止代理断开空闲连接
+STREAM_HEARTBEAT = getattr(settings, "TASK_EVENTS_HEARTBEAT", 25)
+# 登录会话到期或被吊销时发送后断开，客户端重新换票据再连接
+SESSION_CLOSED = b"event: session.closed\ndata: {}\n\n"
 
 
 def parse_int(value, default=None):
@@ -32,8 +38,13 @@ def task_hall_overview(request):
     user, resp = require_auth(request)
     if resp:
         return resp
-    payload = TaskHallService.get_overview(user)
-    return JsonResponse(payload)
+    etag = make_etag("overview", user.id, *versions.get("surveys", f"user:{user.id}"))
+    return conditional_response(
+        request,
+        "task_hall_overview",
+        etag,
+        lambda: json_response(TaskHallService.get_overview(user), request=request),
+    )
 
 
 @csrf_exempt
@@ -54,9 +65,20 @@ def task_hall_tasks(request):
         "sort": params.get("sort", "").strip(),
         "page": parse_int(params.get("page"), default=1),
         "page_size": parse_int(params.get("page_size"), default=20),
+        "cursor": params.get("cursor"),
     }
-    payload = TaskHallService.list_tasks(user, filters)
-    return JsonResponse(payload)
+
+    def build():
+        try:
+            payload = TaskHallService.list_tasks(user, filters)
+        except ValueError:
+            return error(422, "invalid cursor")
+        return json_response(payload, request=request)
+
+    # 列表结果取决于查询参数、全站问卷集合和用户自己（资格过滤、匹配度）
+    query = sorted(params.lists())
+    etag = make_etag("tasks", user.id, query, *versions.get("surveys", f"user:{user.id}"))
+    return conditional_response(request, "task_hall_tasks", etag, build)
 
 
 @csrf_exempt
@@ -68,6 +90,78 @@ def task_hall_refresh_batch(request):
         return resp
     data = parse_json(request)
     exclude_ids = data.get("exclude_task_ids") or []
-    batch_size = parse_int(data.get("batch_size"), default=15)
-    payload = TaskHallService.refresh_batch(user, exclude_ids, batch_size)
-    return JsonResponse(payload)
+    if not isinstance(exclude_ids, list):
+        return error(422, "exclude_task_ids must be a list")
+    batch_size = min(max(parse_int(data.get("batch_size"), default=15), 0), 50)
+    # 已展示集合按会话区分，未传 session_id 时以当前 token 作为会话
+    session = str(data.get("session_id") or get_bearer_token(request))
+    mode = data.get("mode") or "newest"
+    if mode not in ("newest", "sample"):
+        return error(422, "mode must be newest or sample")
+    seed = data.get("seed")
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        return error(422, "seed must be a non-negative integer")
+    payload = TaskHallService.refresh_batch(user, session, exclude_ids, batch_size, mode, seed)
+    return json_response(payload, request=request)
+
+
+async def _event_stream(session, last_event_id):
+    subscription = task_events.subscribe(session.user_id, last_event_id)
+    check_active = sync_to_async(is_active)
+    try:
+        yield b"retry: 5000\n\n"
+        # 每个心跳间隔至少复查一次会话，事件不断时也不例外；到期时刻一到立即复查
+        next_check = time.monotonic() + STREAM_HEARTBEAT
+        while True:
+            timeout = STREAM_HEARTBEAT
+            if session.expires_at:
+                timeout = max(min(timeout, (session.expires_at - timezone.now()).total_seconds()), 0)
+            try:
+                async with asyncio.timeout(timeout):
+                    event = await subscription.queue.get()
+            except TimeoutError:
+                event = None
+            if event is None or time.monotonic() >= next_check:
+                if not await check_active(session):
+                    yield SESSION_CLOSED
+                    return
+                next_check = time.monotonic() + STREAM_HEARTBEAT
+            yield b": ping\n\n" if event is None else event.message
+    finally:
+        task_events.unsubscribe(subscription)
+
+
+@csrf_exempt
+def task_hall_stream_ticket(request):
+    """换取一次性的 SSE 连接票据，见 core/services/stream_tickets.py"""
+    if request.method != "POST":
+        return error(405, "Method not allowed")
+    resolved = get_token_session(get_bearer_token(request))
+    if not resolved:
+        return error(401, "Unauthorized")
+    ticket = stream_tickets.issue(resolved[1])
+    return json_response({"ticket": ticket, "expires_in": stream_tickets.ttl})
+
+
+@csrf_exempt
+async def task_hall_stream(request):
+    """SSE：推送新任务（task.new）与任务关闭（task.closed）事件，只能在 ASGI 下使用"""
+    if request.method != "GET":
+        return error(405, "Method not allowed")
+    if not isinstance(request, ASGIRequest):
+        return error(501, "task stream requires an ASGI server")
+    # EventSource 不能设置请求头，浏览器用一次性票据（?ticket=）连接，不在 URL 里带 token
+    token = get_bearer_token(request)
+    if token:
+        resolved = await sync_to_async(get_token_session)(token)
+        session = resolved and resolved[1]
+    else:
+        session = await sync_to_async(stream_tickets.redeem)(request.GET.get("ticket"))
+    if not session:
+        return error(401, "Unauthorized")
+    # 断线重连时浏览器会带上 Last-Event-ID，据此补发期间错过的事件
+    last_event_id = parse_int(request.headers.get("Last-Event-ID") or request.GET.get("last_event_id"))
+    response = StreamingHttpResponse(_event_stream(session, last_event_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
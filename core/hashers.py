@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    迭代次数取自 settings.PASSWORD_HASH_ITERATIONS（0 表示使用 Django 默认值）
+
+    算法名仍为 pbkdf2_sha256，已有哈希可以直接校验；迭代次数变化后 must_update 为真，
+    登录成功时会按新参数重新哈希。
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_HASH_ITERATIONS", 0) or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,17 @@
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import CASES
+
+
+class Command(BaseCommand):
+    help = "运行性能基准用例，测试数据在事务内创建并回滚"
+
+    def add_arguments(self, parser):
+        parser.add_argument("case", choices=CASES)
+        parser.add_argument("--iterations", type=int, help="各用例有自己的默认值")
+
+    def handle(self, *args, **options):
+        module = import_module(f"core.benchmarks.{options['case']}")
+        module.run(self.stdout, options)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.deadline_scheduler import deadline_scheduler, process_local_settings
+
+
+class Command(BaseCommand):
+    help = "把已过截止时间的问卷批量改为 closed；--loop 时常驻运行，按最近的截止时间休眠"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="常驻运行")
+        parser.add_argument("--batch-size", type=int, default=None, help="每条 UPDATE 关闭的问卷数")
+        parser.add_argument("--max-sleep", type=float, default=30, help="常驻运行时单次最长休眠秒数")
+
+    def handle(self, *args, **options):
+        local = process_local_settings()
+        if local:
+            # 在这里关闭的问卷，web 进程的 ETag、概览缓存和 SSE 推送都感知不到
+            raise CommandError(
+                f"{', '.join(local)} only take effect inside this process, so web processes would never see "
+                "surveys closed here; point them at shared backends, or set SURVEY_DEADLINE_RUNNER=web "
+                "to close surveys inside the web process"
+            )
+        if options["batch_size"]:
+            deadline_scheduler.batch_size = options["batch_size"]
+        while True:
+            closed = deadline_scheduler.run_once()
+            if closed or not options["loop"]:
+                self.stdout.write(f"closed {closed} expired surveys, {len(deadline_scheduler)} pending")
+            if not options["loop"]:
+                break
+            time.sleep(min(max(deadline_scheduler.seconds_until_next(), 0.05), options["max_sleep"]))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.conditional import ENDPOINTS, metrics
+
+
+class Command(BaseCommand):
+    help = "查看各读接口条件 GET 的请求数与 304 比例"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="输出后清零计数")
+
+    def handle(self, *args, **options):
+        for endpoint, stat in metrics.stats(ENDPOINTS).items():
+            self.stdout.write(
+                f"{endpoint:<20} requests={stat['requests']:<8} "
+                f"not_modified={stat['not_modified']:<8} ratio={stat['ratio']:.1%}"
+            )
+        if options["reset"]:
+            metrics.reset(ENDPOINTS)
+            self.stdout.write("counters reset")
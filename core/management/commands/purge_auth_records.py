@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.managers.maintenance_manager import MaintenanceManager
+
+
+class Command(BaseCommand):
+    help = "分批清理过期的 AuthToken 与已使用/过期的 PasswordResetCode"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="每批删除的行数")
+        parser.add_argument("--sleep", type=float, default=0.1, help="批次之间的休眠秒数")
+        parser.add_argument("--dry-run", action="store_true", help="只统计，不删除")
+        parser.add_argument("--interval", type=int, default=0, help="大于 0 时按该秒数循环执行")
+
+    def handle(self, *args, **options):
+        while True:
+            summaries = MaintenanceManager.purge_auth_records(
+                batch_size=options["batch_size"],
+                sleep_seconds=options["sleep"],
+                dry_run=options["dry_run"],
+            )
+            verb = "would delete" if options["dry_run"] else "deleted"
+            for summary in summaries:
+                size = summary["estimated_bytes"]
+                size_text = f"~{size / 1024:.1f} KiB" if size is not None else "size unknown"
+                self.stdout.write(
+                    f"{summary['table']}: {verb} {summary['rows']} rows "
+                    f"in {summary['batches']} batches ({size_text})"
+                )
+            if options["interval"] <= 0:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.managers.task_card_manager import TaskCardManager
+
+
+class Command(BaseCommand):
+    help = "按问卷源表重建任务大厅卡片（TaskCard），或用 --check 只检查偏差"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="每批覆盖的问卷主键区间大小")
+        parser.add_argument("--check", action="store_true", help="只对比卡片与源表，不写入；有偏差时以非零状态退出")
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            drift = TaskCardManager.find_drift(batch_size=options["batch_size"])
+            for survey_id, field, stored, expected in drift[:50]:
+                self.stdout.write(f"survey {survey_id}: {field} card={stored!r} source={expected!r}")
+            if drift:
+                raise CommandError(f"{len(drift)} drifted fields, run rebuild_task_cards to repair")
+            self.stdout.write("task cards match source tables")
+            return
+        written = TaskCardManager.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(f"rebuilt {written} task cards")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.managers.survey_counter_manager import SurveyCounterManager
+from core.managers.task_card_manager import TaskCardManager
+from core.services.deadline_scheduler import DeadlineScheduler, process_local_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "按答卷表修复问卷的已完成份数（Survey.completed）与卡片计数；--check 只检查偏差，"
+        "--close-full 同时关闭已达到目标份数的问卷"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="每批对比的问卷数")
+        parser.add_argument("--check", action="store_true", help="只对比计数与答卷表，不写入；有偏差时以非零状态退出")
+        parser.add_argument("--close-full", action="store_true", help="修复后关闭已达到目标份数仍在发布中的问卷")
+
+    def handle(self, *args, **options):
+        drift = SurveyCounterManager.find_drift(batch_size=options["batch_size"])
+        for survey_id, stored, actual in drift[:50]:
+            self.stdout.write(f"survey {survey_id}: completed={stored} responses={actual}")
+        if options["check"]:
+            if drift:
+                raise CommandError(f"{len(drift)} drifted counters, run reconcile_fill_counts to repair")
+            self.stdout.write("completion counters match responses")
+            return
+        repaired = [survey_id for survey_id, _, _ in drift]
+        for survey_id in repaired:
+            SurveyCounterManager.repair(survey_id)
+        if repaired:
+            TaskCardManager.sync(repaired)
+        if not options["close_full"]:
+            self.stdout.write(f"repaired {len(repaired)} counters")
+            return
+        closed = SurveyCounterManager.close_full()
+        if closed:
+            DeadlineScheduler.after_close(closed)
+            local = process_local_settings()
+            if local:
+                self.stderr.write(
+                    f"{', '.join(local)} only take effect inside this process: web processes keep serving "
+                    "the closed surveys from cache until their entries expire"
+                )
+        self.stdout.write(f"repaired {len(repaired)} counters, closed {len(closed)} surveys at target")
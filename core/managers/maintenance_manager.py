@@ -0,0 +1,79 @@
+import time
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import AuthToken, PasswordResetCode
+
+
+class MaintenanceManager:
+    @staticmethod
+    def _purge_targets(now):
+        # 签名 token 模式下已吊销但未过期的 AuthToken 仍需参与吊销校验，过期后才删除
+        return [
+            (AuthToken, Q(expires_at__lte=now)),
+            (PasswordResetCode, Q(is_used=True) | Q(expires_at__lte=now)),
+        ]
+
+    @staticmethod
+    def _avg_row_length(model):
+        if connection.vendor != "mysql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT AVG_ROW_LENGTH FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def purge_in_batches(model, condition, batch_size=1000, sleep_seconds=0.1, dry_run=False):
+        """
+        按主键游标分批删除满足 condition 的行
+
+        每批先取 id > 上一批末尾的下 batch_size 个待删主键，再按主键删除，
+        删除只锁住这些行；前面清理过留下的主键空洞不会产生空批次。
+        批次之间休眠 sleep_seconds，避免在 MySQL 上长时间持锁。dry_run 时只统计不删除。
+        """
+        rows = 0
+        batches = 0
+        last_id = 0
+        while True:
+            ids = list(
+                model.objects.filter(condition, id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            batches += 1
+            if dry_run:
+                rows += len(ids)
+            else:
+                # 取出主键之后行可能已被改动，删除时再带上条件
+                count, _ = model.objects.filter(id__in=ids).filter(condition).delete()
+                rows += count
+            if len(ids) < batch_size:
+                break
+            if sleep_seconds and not dry_run:
+                time.sleep(sleep_seconds)
+        avg_row_length = MaintenanceManager._avg_row_length(model)
+        return {
+            "table": model._meta.db_table,
+            "rows": rows,
+            "batches": batches,
+            "estimated_bytes": rows * avg_row_length if avg_row_length is not None else None,
+        }
+
+    @staticmethod
+    def purge_auth_records(batch_size=1000, sleep_seconds=0.1, dry_run=False):
+        """清理过期 token 与已使用/过期的密码重置验证码，可由定时任务直接调用"""
+        now = timezone.now()
+        return [
+            MaintenanceManager.purge_in_batches(model, condition, batch_size, sleep_seconds, dry_run)
+            for model, condition in MaintenanceManager._purge_targets(now)
+        ]
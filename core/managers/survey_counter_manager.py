@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.managers.task_card_manager import TaskCardManager
+from core.models import Survey
+
+
+class SurveyCounterManager:
+    """
+    Survey.completed：已提交的答卷数，提交时在同一事务里 F() 自增，列表直接读这一列
+
+    自增只锁问卷这一行，放在提交事务的最后一步，持锁时间只有提交本身。
+    绕过提交流程（后台改数据、删除答卷）造成的偏差由 `python Main.py reconcile_fill_counts` 修复。
+    """
+
+    @staticmethod
+    def add_completed(survey_id):
+        """只对 published 的问卷自增，返回是否成功；问卷已关闭（如并发提交刚好填满）时返回 False"""
+        return bool(Survey.objects.filter(id=survey_id, status="published").update(completed=F("completed") + 1))
+
+    @staticmethod
+    def remove_completed(survey_id):
+        Survey.objects.filter(id=survey_id, completed__gt=0).update(completed=F("completed") - 1)
+
+    @staticmethod
+    def close_if_full(survey_id):
+        """
+        达到目标份数时关闭问卷，返回是否关闭；不限份数（target 为空）的问卷不关闭
+
+        UPDATE 不触发信号，调用方提交后负责善后。
+        """
+        closed = Survey.objects.filter(
+            id=survey_id, status="published", target__isnull=False, completed__gte=F("target")
+        ).update(status="closed", updated_at=timezone.now())
+        if closed:
+            TaskCardManager.sync_status([survey_id], "closed")
+        return bool(closed)
+
+    @staticmethod
+    def close_full():
+        """关闭所有已达到目标份数仍为 published 的问卷（不含不限份数的），返回关闭的 id"""
+        with transaction.atomic():
+            closed = list(
+                Survey.objects.select_for_update()
+                .filter(status="published", target__isnull=False, completed__gte=F("target"))
+                .values_list("id", flat=True)
+            )
+            if closed:
+                Survey.objects.filter(id__in=closed).update(status="closed", updated_at=timezone.now())
+                TaskCardManager.sync_status(closed, "closed")
+        return closed
+
+    @staticmethod
+    def find_drift(batch_size=500):
+        """按主键分批对比计数与答卷表，返回 [(survey_id, 计数, 实际已提交数)]"""
+        drift = []
+        last_id = 0
+        while True:
+            rows = list(
+                Survey.objects.filter(id__gt=last_id).order_by("id").values_list("id", "completed")[:batch_size]
+            )
+            if not rows:
+                return drift
+            last_id = rows[-1][0]
+            counts = TaskCardManager.get_filled_counts([survey_id for survey_id, _ in rows])
+            drift.extend(
+                (survey_id, completed, counts.get(survey_id, 0))
+                for survey_id, completed in rows
+                if completed != counts.get(survey_id, 0)
+            )
+
+    @staticmethod
+    def repair(survey_id):
+        """
+        按答卷表重算一个问卷的计数，返回重算后的值
+
+        先锁问卷行再计数：进行中的提交要么已提交（计数包含它），要么等这里提交后再自增，不会重复或遗漏。
+        """
+        with transaction.atomic():
+            Survey.objects.select_for_update().filter(id=survey_id).values_list("id", flat=True).first()
+            completed = TaskCardManager.get_filled_counts([survey_id]).get(survey_id, 0)
+            Survey.objects.filter(id=survey_id).update(completed=completed)
+        return completed
@@ -0,0 +1,201 @@
+from django.db import connection
+from django.db.models import Count, F, Max, Min
+from django.utils import timezone
+
+from core.models import Response, Survey, SurveyTag, Tag, TaskCard
+
+
+class TaskCardManager:
+    # 从问卷表同步到卡片的字段，对应关系见 _build_card
+    SURVEY_FIELDS = {
+        "owner",
+        "title",
+        "description",
+        "estimated_minutes",
+        "difficulty",
+        "reward_points",
+        "target",
+        "deadline",
+        "status",
+    }
+    SYNC_FIELDS = [
+        "owner",
+        "title",
+        "subtitle",
+        "sender_nickname",
+        "primary_type",
+        "estimated_minutes",
+        "difficulty",
+        "reward",
+        "filled_count",
+        "target",
+        "deadline",
+        "status",
+        "created_at",
+        "updated_at",
+    ]
+
+    @staticmethod
+    def get_filled_counts(survey_ids):
+        """按答卷表重新计数，只给对账用；卡片直接取 Survey.completed"""
+        if not survey_ids:
+            return {}
+        rows = (
+            Response.objects.filter(survey_id__in=survey_ids, submitted_at__isnull=False)
+            .values("survey_id")
+            .annotate(cnt=Count("id"))
+        )
+        return {row["survey_id"]: row["cnt"] for row in rows}
+
+    @staticmethod
+    def get_primary_types(survey_ids):
+        """一次查询取出每个问卷的第一个 survey_type 标签"""
+        if not survey_ids:
+            return {}
+        rows = (
+            SurveyTag.objects.filter(survey_id__in=survey_ids, tag__type=Tag.TYPE_SURVEY)
+            .order_by("survey_id", "id")
+            .values_list("survey_id", "tag__name")
+        )
+        types = {}
+        for survey_id, name in rows:
+            types.setdefault(survey_id, name)
+        return types
+
+    @staticmethod
+    def _build_card(survey, filled_count, primary_type):
+        return TaskCard(
+            survey_id=survey.id,
+            owner_id=survey.owner_id,
+            title=survey.title,
+            subtitle=survey.description,
+            sender_nickname=survey.owner.nickname,
+            primary_type=primary_type,
+            estimated_minutes=survey.estimated_minutes,
+            difficulty=survey.difficulty,
+            reward=survey.reward_points,
+            filled_count=filled_count,
+            target=survey.target or 0,
+            deadline=survey.deadline,
+            status=survey.status,
+            created_at=survey.created_at,
+        )
+
+    @staticmethod
+    def build_cards(survey_ids):
+        """从源表计算卡片（固定 2 次查询，与问卷数量无关）"""
+        surveys = list(Survey.objects.select_related("owner").filter(id__in=survey_ids))
+        primary_types = TaskCardManager.get_primary_types([survey.id for survey in surveys])
+        return [
+            TaskCardManager._build_card(survey, survey.completed, primary_types.get(survey.id))
+            for survey in surveys
+        ]
+
+    @staticmethod
+    def sync(survey_ids):
+        cards = TaskCardManager.build_cards(survey_ids)
+        if not cards:
+            return 0
+        options = {"update_conflicts": True, "update_fields": TaskCardManager.SYNC_FIELDS}
+        if connection.features.supports_update_conflicts_with_target:
+            options["unique_fields"] = ["survey"]
+        TaskCard.objects.bulk_create(cards, **options)
+        return len(cards)
+
+    @staticmethod
+    def add_filled(survey_id, delta=1):
+        # update() 不会触发 auto_now，增量同步依赖 updated_at，需要手动写
+        TaskCard.objects.filter(survey_id=survey_id).update(
+            filled_count=F("filled_count") + delta, updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def sync_filled(survey_id):
+        # 草稿转为提交时信号先于计数自增触发，这里按答卷表计数，结果与自增后的 Survey.completed 一致
+        filled_count = TaskCardManager.get_filled_counts([survey_id]).get(survey_id, 0)
+        TaskCard.objects.filter(survey_id=survey_id).update(
+            filled_count=filled_count, updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def sync_primary_type(survey_id):
+        primary_type = TaskCardManager.get_primary_types([survey_id]).get(survey_id)
+        TaskCard.objects.filter(survey_id=survey_id).update(
+            primary_type=primary_type, updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def sync_status(survey_ids, status):
+        # 给绕过信号的批量 UPDATE 用（如截止调度器批量关闭）
+        TaskCard.objects.filter(survey_id__in=survey_ids).update(status=status, updated_at=timezone.now())
+
+    @staticmethod
+    def sync_sender(owner_id, nickname):
+        """返回改动的卡片数"""
+        return TaskCard.objects.filter(owner_id=owner_id).exclude(sender_nickname=nickname).update(
+            sender_nickname=nickname, updated_at=timezone.now()
+        )
+
+    @staticmethod
+    def pool_rows(since=None, limit=None):
+        """
+        抽样候选池的原始数据：(survey_id, reward, estimated_minutes, deadline, filled_count, target, status, updated_at)
+
+        since 为空时取最新发布的 limit 张已发布卡片（全量加载），否则取 updated_at >= since 的全部卡片（增量）。
+        """
+        columns = [
+            "survey_id", "reward", "estimated_minutes", "deadline", "filled_count", "target", "status", "updated_at"
+        ]
+        if since is None:
+            queryset = TaskCard.objects.filter(status="published").order_by("-created_at", "-survey_id")
+            return list(queryset.values_list(*columns)[:limit])
+        return list(TaskCard.objects.filter(updated_at__gte=since).values_list(*columns))
+
+    @staticmethod
+    def _id_batches(batch_size):
+        bounds = Survey.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            return
+        for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+            ids = list(
+                Survey.objects.filter(id__gte=start, id__lt=start + batch_size).values_list("id", flat=True)
+            )
+            if ids:
+                yield ids
+
+    @staticmethod
+    def rebuild(batch_size=500):
+        """按主键区间重建全部卡片，并删除源问卷已不存在的卡片，返回写入行数"""
+        written = 0
+        for ids in TaskCardManager._id_batches(batch_size):
+            written += TaskCardManager.sync(ids)
+        TaskCard.objects.exclude(survey_id__in=Survey.objects.values("id")).delete()
+        return written
+
+    @staticmethod
+    def find_drift(batch_size=500):
+        """
+        对比源表与卡片表，返回 [(survey_id, 字段名, 卡片值, 源值)]
+
+        缺失的卡片记为字段 "missing"，多余的卡片记为字段 "orphan"。
+        """
+        compare_fields = [field for field in TaskCardManager.SYNC_FIELDS if field != "updated_at"]
+        drift = []
+        for ids in TaskCardManager._id_batches(batch_size):
+            stored = TaskCard.objects.in_bulk(ids)
+            for expected in TaskCardManager.build_cards(ids):
+                actual = stored.get(expected.survey_id)
+                if actual is None:
+                    drift.append((expected.survey_id, "missing", None, None))
+                    continue
+                for field in compare_fields:
+                    attname = TaskCard._meta.get_field(field).attname
+                    if getattr(actual, attname) != getattr(expected, attname):
+                        drift.append(
+                            (expected.survey_id, field, getattr(actual, attname), getattr(expected, attname))
+                        )
+        orphans = TaskCard.objects.exclude(survey_id__in=Survey.objects.values("id")).values_list(
+            "survey_id", flat=True
+        )
+        drift.extend((survey_id, "orphan", None, None) for survey_id in orphans)
+        return drift
@@ -1,25 +1,87 @@
-from django.db.models import Count, Q
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
-from core.models import Notification, Response, Survey, SurveyTag, Tag
+from core.models import Notification, Response, SurveyTag, Tag, TaskCard, UserTag
+from core.pagination import encode_cursor, keyset_page
+from core.search import keyword_search
+from core.services.match_scoring import Candidates, match_scorer
 
 
 class TaskHallManager:
+    TASK_ORDERING = ["-created_at", "-survey_id"]
+    SEARCH_ORDERING = ["-relevance", "-created_at", "-survey_id"]
+    # sort 参数 -> 排序字段，每种排序在 TaskCard 上有对应的 (status, ...) 复合索引
+    SORT_ORDERINGS = {
+        "newest": TASK_ORDERING,
+        "reward_desc": ["-reward", "-created_at", "-survey_id"],
+        "minutes_asc": ["estimated_minutes", "-created_at", "-survey_id"],
+        "ending": ["deadline", "survey_id"],
+        "filled_asc": ["filled_count", "-created_at", "-survey_id"],
+    }
+    # 匹配度打分的候选池：按最新发布取前 N 张卡片
+    MATCH_CANDIDATE_LIMIT = getattr(settings, "MATCH_CANDIDATE_LIMIT", 2000)
+    MATCH_COLUMNS = ["survey_id", "reward", "estimated_minutes", "deadline", "filled_count", "target"]
+    # “换一批”单次最多扫描的卡片数
+    REFRESH_MAX_SCAN = getattr(settings, "TASK_HALL_REFRESH_MAX_SCAN", 500)
+    # 排序列可为空的排序方式：NULL 无法参与游标比较，未填写该字段的任务不参与此排序
+    NULLABLE_SORT_FIELDS = {"minutes_asc": "estimated_minutes", "ending": "deadline"}
+
     @staticmethod
     def _base_queryset():
-        return Survey.objects.select_related("owner")
+        # 卡片读模型已包含发布者昵称、填写数与类型，列表只读这一张表
+        return TaskCard.objects.all()
+
+    @staticmethod
+    def _eligible_queryset(user):
+        """
+        user 能填写的卡片：只取已发布的，排除自己发布的、已填写过的
+
+        过了截止时间的问卷由截止调度器（core/services/deadline_scheduler.py）改为 closed，
+        这里只按 status 过滤，各排序都能用上 (status, 排序列...) 索引。
+        已填写用 NOT EXISTS 反连接，命中 Response 上的 (user, survey) 唯一索引，
+        代价与用户填过多少问卷无关；只有自动保存草稿（in_progress）的问卷仍然可见。
+        """
+        queryset = TaskHallManager._base_queryset()
+        if user is None:
+            return queryset
+        return queryset.filter(status="published").exclude(owner_id=user.id).filter(
+            ~Exists(
+                Response.objects.filter(
+                    user_id=user.id, survey_id=OuterRef("survey_id"), submitted_at__isnull=False
+                )
+            ),
+        )
 
     @staticmethod
     def _apply_filters(queryset, filters):
         keyword = filters.get("keyword")
         if keyword:
-            queryset = queryset.filter(Q(title__icontains=keyword) | Q(description__icontains=keyword))
+            queryset = keyword_search(queryset, keyword, ["title", "subtitle"])
         status = filters.get("status")
         if status:
             queryset = queryset.filter(status=status)
+        task_type = filters.get("type")
+        if task_type:
+            # 类型以 SurveyTag 为准（卡片上的 primary_type 只是第一个类型）
+            queryset = queryset.filter(
+                Exists(
+                    SurveyTag.objects.filter(
+                        survey_id=OuterRef("survey_id"),
+                        tag__type=Tag.TYPE_SURVEY,
+                        tag__name=task_type,
+                    )
+                )
+            )
+        null_field = TaskHallManager.NULLABLE_SORT_FIELDS.get(filters.get("sort"))
+        if null_field:
+            queryset = queryset.filter(**{f"{null_field}__isnull": False})
         min_reward = filters.get("min_reward")
         if min_reward is not None:
-            queryset = queryset.filter(reward_points__gte=min_reward)
+            queryset = queryset.filter(reward__gte=min_reward)
         max_minutes = filters.get("max_minutes")
         if max_minutes is not None:
             queryset = queryset.filter(estimated_minutes__lte=max_minutes)
@@ -29,91 +91,172 @@ class TaskHallManager:
         return queryset
 
     @staticmethod
-    def _task_type_for_survey(survey_id):
-        tag = (
-            SurveyTag.objects.select_related("tag")
-            .filter(survey_id=survey_id)
-            .order_by("id")
-            .first()
+    def _user_tag_ids(user):
+        if user is None:
+            return set()
+        return set(UserTag.objects.filter(user=user).values_list("tag_id", flat=True))
+
+    @staticmethod
+    def _tag_pairs(survey_ids, user_tag_ids):
+        # 用户没有标签时重合度恒为 0，不必查问卷标签
+        if not user_tag_ids or not survey_ids:
+            return []
+        return list(SurveyTag.objects.filter(survey_id__in=survey_ids).values_list("survey_id", "tag_id"))
+
+    @staticmethod
+    def _to_task_cards(cards, user=None):
+        cards = list(cards)
+        user_tag_ids = TaskHallManager._user_tag_ids(user)
+        tag_pairs = TaskHallManager._tag_pairs([card.survey_id for card in cards], user_tag_ids)
+        scores, parts = match_scorer.score(
+            user_tag_ids, Candidates.from_cards(cards, tag_pairs), timezone.now()
         )
-        return tag.tag.name if tag else "未分类"
-
-    @staticmethod
-    def _to_task_card(survey, filled_count=0):
-        difficulty = survey.difficulty or 3
-        reward = survey.reward_points or 0
-        ratio = reward / difficulty if difficulty else 0
-        if ratio >= 1.5:
-            match_level = "high"
-        elif ratio >= 1:
-            match_level = "medium"
-        else:
-            match_level = "low"
+        return [
+            TaskHallManager._to_task_card(card, scores[row], parts[row]) for row, card in enumerate(cards)
+        ]
+
+    @staticmethod
+    def _to_task_card(card, score, parts):
         return {
-            "id": str(survey.id),
-            "title": survey.title,
-            "subtitle": survey.description or "",
-            "sender": survey.owner.nickname if survey.owner else "匿名",
-            "type": TaskHallManager._task_type_for_survey(survey.id),
-            "estimated": survey.estimated_minutes or 0,
-            "difficulty": difficulty,
-            "reward": reward,
-            "filled": filled_count,
-            "total": survey.target or 0,
-            "deadline": survey.deadline.isoformat().replace("+00:00", "Z") if survey.deadline else None,
-            "status": survey.status,
-            "match_level": match_level,
-            "match_reason": "",
+            "id": str(card.survey_id),
+            "title": card.title,
+            "subtitle": card.subtitle or "",
+            "sender": card.sender_nickname or "匿名",
+            "type": card.primary_type or "未分类",
+            "estimated": card.estimated_minutes or 0,
+            "difficulty": card.difficulty or 3,
+            "reward": card.reward or 0,
+            "filled": card.filled_count,
+            "total": card.target or 0,
+            "deadline": card.deadline,
+            "status": card.status,
+            "match_level": match_scorer.level(score),
+            "match_reason": match_scorer.reason(parts),
         }
 
     @staticmethod
-    def list_tasks(filters):
-        queryset = TaskHallManager._apply_filters(TaskHallManager._base_queryset(), filters)
-        total = queryset.count()
-        page = max(filters.get("page", 1), 1)
-        page_size = min(max(filters.get("page_size", 20), 1), 50)
-        offset = (page - 1) * page_size
-        surveys = list(queryset.order_by("-created_at")[offset : offset + page_size])
-        filled_counts = TaskHallManager._get_filled_counts([survey.id for survey in surveys])
+    def _score_candidates(queryset, user):
+        """对候选池整体打分，返回 (candidates, scores, parts)"""
+        rows = list(
+            queryset.order_by(*TaskHallManager.TASK_ORDERING).values_list(*TaskHallManager.MATCH_COLUMNS)[
+                : TaskHallManager.MATCH_CANDIDATE_LIMIT
+            ]
+        )
+        user_tag_ids = TaskHallManager._user_tag_ids(user)
+        tag_pairs = TaskHallManager._tag_pairs([row[0] for row in rows], user_tag_ids)
+        candidates = Candidates.from_rows(rows, tag_pairs)
+        scores, parts = match_scorer.score(user_tag_ids, candidates, timezone.now())
+        return candidates, scores, parts
+
+    @staticmethod
+    def _list_recommended(queryset, user, offset, page_size):
+        candidates, scores, parts = TaskHallManager._score_candidates(queryset, user)
+        # 稳定排序：同分时保持候选池的最新发布顺序
+        rows = np.argsort(-scores, kind="stable")[offset : offset + page_size]
+        cards = TaskCard.objects.in_bulk(candidates.ids[rows].tolist())
         items = [
-            TaskHallManager._to_task_card(survey, filled_counts.get(survey.id, 0))
-            for survey in surveys
+            TaskHallManager._to_task_card(cards[survey_id], scores[row], parts[row])
+            for row, survey_id in zip(rows, candidates.ids[rows].tolist())
+            if survey_id in cards
         ]
+        total = len(candidates)
+        if total >= TaskHallManager.MATCH_CANDIDATE_LIMIT:
+            # 候选池被截断，另查真实的可填写数量
+            total = queryset.count()
         return items, total
 
     @staticmethod
-    def refresh_batch(exclude_task_ids, batch_size):
-        queryset = TaskHallManager._base_queryset()
-        if exclude_task_ids:
-            queryset = queryset.exclude(id__in=exclude_task_ids)
-        surveys = list(queryset.order_by("-created_at")[: batch_size or 0])
-        filled_counts = TaskHallManager._get_filled_counts([survey.id for survey in surveys])
-        items = [
-            TaskHallManager._to_task_card(survey, filled_counts.get(survey.id, 0))
-            for survey in surveys
-        ]
-        return items
+    def count_high_match(user):
+        queryset = TaskHallManager._eligible_queryset(user).filter(status="published")
+        _, scores, _ = TaskHallManager._score_candidates(queryset, user)
+        return match_scorer.count_high(scores)
+
+    @staticmethod
+    def _ordering(filters):
+        sort = filters.get("sort")
+        if sort in TaskHallManager.SORT_ORDERINGS:
+            return TaskHallManager.SORT_ORDERINGS[sort]
+        # 未指定排序（或 recommend）时，有关键词按相关度排序
+        if filters.get("keyword"):
+            return TaskHallManager.SEARCH_ORDERING
+        return TaskHallManager.TASK_ORDERING
+
+    @staticmethod
+    def _page_size(filters):
+        return min(max(filters.get("page_size", 20), 1), 50)
+
+    @staticmethod
+    def list_tasks(filters, user=None):
+        queryset = TaskHallManager._apply_filters(TaskHallManager._eligible_queryset(user), filters)
+        page = max(filters.get("page", 1), 1)
+        page_size = TaskHallManager._page_size(filters)
+        offset = (page - 1) * page_size
+        if filters.get("sort") == "recommend":
+            return TaskHallManager._list_recommended(queryset, user, offset, page_size)
+        total = queryset.count()
+        ordering = TaskHallManager._ordering(filters)
+        cards = queryset.order_by(*ordering)[offset : offset + page_size]
+        return TaskHallManager._to_task_cards(cards, user), total
+
+    @staticmethod
+    def list_tasks_by_cursor(filters, user=None):
+        """游标分页，游标无效时抛出 ValueError；recommend 排序不支持游标，按默认顺序返回"""
+        queryset = TaskHallManager._apply_filters(TaskHallManager._eligible_queryset(user), filters)
+        cards, next_cursor = keyset_page(
+            queryset,
+            TaskHallManager._ordering(filters),
+            filters.get("cursor") or "",
+            TaskHallManager._page_size(filters),
+        )
+        return TaskHallManager._to_task_cards(cards, user), next_cursor
+
+    @staticmethod
+    def refresh_batch(seen, cursor, batch_size, user=None):
+        """
+        从 cursor 处按最新发布顺序往后取 batch_size 张 seen 中没有的卡片
+
+        返回 (items, next_cursor)，扫到末尾时 next_cursor 为 None。
+        每次最多扫描 REFRESH_MAX_SCAN 张，已看过的卡片再多，单次代价也有上限。
+        """
+        queryset = TaskHallManager._eligible_queryset(user)
+        ordering = TaskHallManager.TASK_ORDERING
+        chunk = max(batch_size * 2, 20)
+        picked = []
+        scanned = 0
+        while len(picked) < batch_size and scanned < TaskHallManager.REFRESH_MAX_SCAN:
+            cards, next_cursor = keyset_page(queryset, ordering, cursor, chunk)
+            for card in cards:
+                scanned += 1
+                cursor = encode_cursor(card, ordering)
+                if card.survey_id not in seen:
+                    picked.append(card)
+                    if len(picked) == batch_size:
+                        break
+            if next_cursor is None and len(picked) < batch_size:
+                cursor = None
+                break
+        return TaskHallManager._to_task_cards(picked, user), cursor
 
     @staticmethod
-    def _get_filled_counts(survey_ids):
-        if not survey_ids:
-            return {}
-        rows = (
-            Response.objects.filter(survey_id__in=survey_ids, submitted_at__isnull=False)
-            .values("survey_id")
-            .annotate(cnt=Count("id"))
+    def cards_by_ids(survey_ids, user=None):
+        """按给定顺序返回卡片，已不存在或 user 不能填写的 id 跳过"""
+        cards = TaskHallManager._eligible_queryset(user).in_bulk(survey_ids)
+        return TaskHallManager._to_task_cards(
+            [cards[survey_id] for survey_id in survey_ids if survey_id in cards], user
         )
-        return {row["survey_id"]: row["cnt"] for row in rows}
 
     @staticmethod
     def get_summary():
-        total = TaskHallManager._base_queryset().count()
-        today = timezone.now().date()
-        new_today = TaskHallManager._base_queryset().filter(created_at__date=today).count()
+        published = TaskHallManager._base_queryset().filter(status="published")
+        total = published.count()
+        # 用区间而不是 created_at__date，才能走 (status, created_at) 索引
+        today_start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        new_today = published.filter(
+            created_at__gte=today_start, created_at__lt=today_start + timedelta(days=1)
+        ).count()
         return {
             "available_tasks": total,
             "new_tasks_today": new_today,
-            "high_match_tasks": 0,
         }
 
     @staticmethod
@@ -129,7 +272,7 @@ class TaskHallManager:
                 "id": str(notice.id),
                 "title": notice.title,
                 "content": notice.content,
-                "created_at": notice.created_at.isoformat().replace("+00:00", "Z"),
+                "created_at": notice.created_at,
             }
             for notice in notices
         ]
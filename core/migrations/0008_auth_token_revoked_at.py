@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_survey_completed_survey_target_alter_tag_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="authtoken",
+            name="revoked_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="authtoken",
+            index=models.Index(
+                fields=["revoked_at", "expires_at"], name="auth_token_revoked_idx"
+            ),
+        ),
+    ]
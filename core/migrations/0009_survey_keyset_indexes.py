@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_auth_token_revoked_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="survey",
+            index=models.Index(fields=["created_at", "id"], name="survey_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="survey",
+            index=models.Index(
+                fields=["status", "created_at", "id"], name="survey_status_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# MySQL FULLTEXT index (ngram parser) for task hall keyword search.
+# Other database backends fall back to icontains, see core/search.py.
+
+from django.db import migrations
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE core_survey "
+        "ADD FULLTEXT INDEX survey_fulltext_idx (title, description) WITH PARSER ngram"
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute("ALTER TABLE core_survey DROP INDEX survey_fulltext_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_survey_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
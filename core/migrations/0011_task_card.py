@@ -0,0 +1,86 @@
+# Generated by Django 6.0 on 2026-10-18 15:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# 关键词检索改为查 core_taskcard，FULLTEXT 索引随之迁移（仅 MySQL）
+def move_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute("ALTER TABLE core_survey DROP INDEX survey_fulltext_idx")
+    schema_editor.execute(
+        "ALTER TABLE core_taskcard "
+        "ADD FULLTEXT INDEX task_card_fulltext_idx (title, subtitle) WITH PARSER ngram"
+    )
+
+
+def restore_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute("ALTER TABLE core_taskcard DROP INDEX task_card_fulltext_idx")
+    schema_editor.execute(
+        "ALTER TABLE core_survey "
+        "ADD FULLTEXT INDEX survey_fulltext_idx (title, description) WITH PARSER ngram"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_survey_fulltext_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskCard",
+            fields=[
+                (
+                    "survey",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="task_card",
+                        serialize=False,
+                        to="core.survey",
+                    ),
+                ),
+                ("title", models.CharField(max_length=200)),
+                ("subtitle", models.TextField(blank=True, null=True)),
+                ("sender_nickname", models.CharField(max_length=64)),
+                (
+                    "primary_type",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                ("estimated_minutes", models.IntegerField(blank=True, null=True)),
+                ("difficulty", models.IntegerField(default=3)),
+                ("reward", models.IntegerField(default=0)),
+                ("filled_count", models.IntegerField(default=0)),
+                ("target", models.IntegerField(default=0)),
+                ("deadline", models.DateTimeField(blank=True, null=True)),
+                ("status", models.CharField(max_length=32)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.appuser",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["created_at", "survey"], name="task_card_created_idx"
+                    ),
+                    models.Index(
+                        fields=["status", "created_at", "survey"],
+                        name="task_card_status_created_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(move_fulltext_index, restore_fulltext_index),
+    ]
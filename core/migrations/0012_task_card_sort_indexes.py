@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_task_card"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tag",
+            index=models.Index(fields=["type", "name"], name="tag_type_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="taskcard",
+            index=models.Index(
+                fields=["status", "reward", "created_at", "survey"],
+                name="task_card_reward_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taskcard",
+            index=models.Index(
+                fields=["status", "estimated_minutes", "-created_at", "-survey"],
+                name="task_card_minutes_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taskcard",
+            index=models.Index(
+                fields=["status", "deadline", "survey"], name="task_card_deadline_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taskcard",
+            index=models.Index(
+                fields=["status", "filled_count", "-created_at", "-survey"],
+                name="task_card_filled_idx",
+            ),
+        ),
+    ]
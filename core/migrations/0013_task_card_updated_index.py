@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_task_card_sort_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="taskcard",
+            index=models.Index(fields=["updated_at"], name="task_card_updated_idx"),
+        ),
+    ]
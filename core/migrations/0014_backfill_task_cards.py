@@ -0,0 +1,61 @@
+# 为迁移前已有的问卷回填任务大厅卡片，字段对应关系与 TaskCardManager._build_card 一致。
+# 迁移里只能用历史模型，不能直接调用 TaskCardManager；已有卡片的问卷跳过，之后的写入由信号同步。
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def backfill_task_cards(apps, schema_editor):
+    Survey = apps.get_model("core", "Survey")
+    SurveyTag = apps.get_model("core", "SurveyTag")
+    TaskCard = apps.get_model("core", "TaskCard")
+    last_id = 0
+    while True:
+        surveys = list(Survey.objects.select_related("owner").filter(id__gt=last_id).order_by("id")[:BATCH_SIZE])
+        if not surveys:
+            return
+        last_id = surveys[-1].id
+        ids = [survey.id for survey in surveys]
+        existing = set(TaskCard.objects.filter(survey_id__in=ids).values_list("survey_id", flat=True))
+        primary_types = {}
+        rows = (
+            SurveyTag.objects.filter(survey_id__in=ids, tag__type="survey_type")
+            .order_by("survey_id", "id")
+            .values_list("survey_id", "tag__name")
+        )
+        for survey_id, name in rows:
+            primary_types.setdefault(survey_id, name)
+        TaskCard.objects.bulk_create(
+            [
+                TaskCard(
+                    survey_id=survey.id,
+                    owner_id=survey.owner_id,
+                    title=survey.title,
+                    subtitle=survey.description,
+                    sender_nickname=survey.owner.nickname,
+                    primary_type=primary_types.get(survey.id),
+                    estimated_minutes=survey.estimated_minutes,
+                    difficulty=survey.difficulty,
+                    reward=survey.reward_points,
+                    filled_count=survey.completed,
+                    target=survey.target,
+                    deadline=survey.deadline,
+                    status=survey.status,
+                    created_at=survey.created_at,
+                )
+                for survey in surveys
+                if survey.id not in existing
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_task_card_updated_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_task_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 16:26
+# 目标份数改为可空，NULL 表示不限份数、不会自动关闭。
+# 此前发布接口不接受 target，已有问卷都是模型默认值 1，并不是发布者设定的目标，一并改为不限，
+# 对应卡片的 target 置为 0（卡片上 0 表示不限）。
+
+from django.db import migrations, models
+
+
+def clear_default_targets(apps, schema_editor):
+    Survey = apps.get_model("core", "Survey")
+    TaskCard = apps.get_model("core", "TaskCard")
+    Survey.objects.filter(target__lte=1).update(target=None)
+    TaskCard.objects.filter(survey__target__isnull=True).update(target=0)
+
+
+def restore_default_targets(apps, schema_editor):
+    # 回滚到非空列之前把不限份数的问卷恢复为原默认值
+    Survey = apps.get_model("core", "Survey")
+    TaskCard = apps.get_model("core", "TaskCard")
+    Survey.objects.filter(target__isnull=True).update(target=1)
+    TaskCard.objects.filter(target=0).update(target=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_backfill_task_cards"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="survey",
+            name="target",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(clear_default_targets, restore_default_targets),
+    ]
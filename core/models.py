@@ -26,8 +26,16 @@ class AuthToken(models.Model):
     user = models.ForeignKey(AppUser, on_delete=models.CASCADE)
     token = models.CharField(max_length=128, unique=True, db_index=True)
     expires_at = models.DateTimeField(blank=True, null=True)
+    revoked_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["revoked_at", "expires_at"], name="auth_token_revoked_idx"
+            ),
+        ]
+
 
 class PasswordResetCode(models.Model):
     """密码重置验证码"""
@@ -74,7 +82,8 @@ class Survey(models.Model):
     reward_points = models.IntegerField(default=0)
     publish_cost_points = models.IntegerField(default=0)
     deadline = models.DateTimeField(blank=True, null=True)
-    target = models.IntegerField(default=1)
+    # 目标份数，达到后自动关闭；NULL 表示不限份数
+    target = models.IntegerField(blank=True, null=True)
     completed = models.IntegerField(default=0)
     status = models.CharField(max_length=32, default="draft")
     active_questionnaire = models.ForeignKey(
@@ -95,6 +104,58 @@ class Survey(models.Model):
             models.Index(
                 fields=["status", "deadline"], name="survey_status_deadline_idx"
             ),
+            # 游标分页 (created_at, id)；Response / PointsLog 的 (user, created_at)
+            # 索引在 InnoDB 中隐含主键后缀，已能支持按 (created_at, id) 定位
+            models.Index(fields=["created_at", "id"], name="survey_created_idx"),
+            models.Index(
+                fields=["status", "created_at", "id"], name="survey_status_created_idx"
+            ),
+        ]
+
+
+class TaskCard(models.Model):
+    """任务大厅卡片读模型：每个问卷一行，在写入路径上同步（core/managers/task_card_manager.py）"""
+
+    survey = models.OneToOneField(
+        Survey, on_delete=models.CASCADE, primary_key=True, related_name="task_card"
+    )
+    owner = models.ForeignKey(AppUser, on_delete=models.CASCADE, related_name="+")
+    title = models.CharField(max_length=200)
+    subtitle = models.TextField(blank=True, null=True)
+    sender_nickname = models.CharField(max_length=64)
+    primary_type = models.CharField(max_length=64, blank=True, null=True)
+    estimated_minutes = models.IntegerField(blank=True, null=True)
+    difficulty = models.IntegerField(default=3)
+    reward = models.IntegerField(default=0)
+    filled_count = models.IntegerField(default=0)
+    # 0 表示不限份数
+    target = models.IntegerField(default=0)
+    deadline = models.DateTimeField(blank=True, null=True)
+    status = models.CharField(max_length=32)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "survey"], name="task_card_created_idx"),
+            models.Index(
+                fields=["status", "created_at", "survey"], name="task_card_status_created_idx"
+            ),
+            # 任务大厅各排序方式（TaskHallManager.SORT_ORDERINGS）各自对应一个索引
+            models.Index(
+                fields=["status", "reward", "created_at", "survey"], name="task_card_reward_idx"
+            ),
+            models.Index(
+                fields=["status", "estimated_minutes", "-created_at", "-survey"],
+                name="task_card_minutes_idx",
+            ),
+            models.Index(fields=["status", "deadline", "survey"], name="task_card_deadline_idx"),
+            # 抽样候选池按 updated_at 增量刷新
+            models.Index(fields=["updated_at"], name="task_card_updated_idx"),
+            models.Index(
+                fields=["status", "filled_count", "-created_at", "-survey"],
+                name="task_card_filled_idx",
+            ),
         ]
 
 
@@ -261,6 +322,11 @@ class Tag(models.Model):
     type = models.CharField(max_length=32, choices=TYPE_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["type", "name"], name="tag_type_name_idx"),
+        ]
+
 
 class SurveyTag(models.Model):
     survey = models.ForeignKey(Survey, on_delete=models.CASCADE)
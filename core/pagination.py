@@ -0,0 +1,88 @@
+"""
+游标（keyset）分页
+
+游标是排序字段在上一页最后一条记录上的取值，经 JSON + base64url 编码后对客户端不透明。
+下一页通过 WHERE (created_at, id) < (...) 直接定位，不需要 OFFSET 和 COUNT(*)，
+深翻页的耗时与第一页相同。排序字段最后一项必须是唯一列（通常是 id）。
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+def _split(ordering):
+    return [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+
+
+def encode_cursor(obj, ordering):
+    values = []
+    for name, _ in _split(ordering):
+        value = getattr(obj, name)
+        values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor, model, ordering):
+    """解析游标，格式不对时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("invalid cursor")
+    fields = _split(ordering)
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError("invalid cursor")
+    decoded = []
+    for (name, _), value in zip(fields, values):
+        # 游标来自客户端，列表、对象等非标量值一律拒绝，不能原样交给 ORM
+        if isinstance(value, (list, dict)):
+            raise ValueError("invalid cursor")
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # annotate 出来的排序字段（如检索相关度）只接受数值
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError("invalid cursor")
+            decoded.append(value)
+            continue
+        if value is None and not field.null:
+            raise ValueError("invalid cursor")
+        try:
+            value = field.to_python(value)
+        except (TypeError, ValidationError):
+            raise ValueError("invalid cursor")
+        if isinstance(field, models.DateTimeField) and value is not None and timezone.is_naive(value):
+            raise ValueError("invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def _after(fields, values):
+    """(f1, f2, ...) 严格排在 values 之后的条件：f1 越过，或 f1 相等且 f2 越过 ..."""
+    condition = Q()
+    for index, (name, descending) in enumerate(fields):
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+        for prev_index, (prev_name, _) in enumerate(fields[:index]):
+            step &= Q(**{prev_name: values[prev_index]})
+        condition |= step
+    # 冗余的首列范围条件，让优化器可以直接对索引前缀做范围扫描
+    first_name, first_descending = fields[0]
+    return Q(**{f"{first_name}__{'lte' if first_descending else 'gte'}": values[0]}) & condition
+
+
+def keyset_page(queryset, ordering, cursor, page_size):
+    """
+    返回 (本页记录, next_cursor)；cursor 为空字符串表示第一页，没有下一页时 next_cursor 为 None
+    """
+    fields = _split(ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(_after(fields, decode_cursor(cursor, queryset.model, ordering)))
+    rows = list(queryset[: page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1], ordering) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
@@ -0,0 +1,35 @@
+"""
+关键词全文检索
+
+MySQL 上使用 FULLTEXT 索引 + ngram 分词器（默认按 2 字切分，适合中文），
+以短语方式 MATCH ... AGAINST，结果带 relevance 相关度；其他数据库（如开发用的 SQLite）
+或短于一个 ngram 的关键词退回 icontains，relevance 恒为 0。
+"""
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# 与 MySQL 的 ngram_token_size 默认值一致
+NGRAM_SIZE = 2
+
+
+def _phrase(keyword):
+    # 短语检索要求各 ngram 连续出现，语义上接近 LIKE '%keyword%'；去掉会破坏短语的双引号
+    return '"{}"'.format(keyword.replace('"', " ").strip())
+
+
+def keyword_search(queryset, keyword, columns):
+    """按关键词过滤 queryset，并标注 relevance 字段供排序使用"""
+    if connection.vendor != "mysql" or len(keyword) < NGRAM_SIZE:
+        condition = Q()
+        for column in columns:
+            condition |= Q(**{f"{column}__icontains": keyword})
+        return queryset.filter(condition).annotate(relevance=Value(0.0, output_field=FloatField()))
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    column_sql = ", ".join(f"{table}.{connection.ops.quote_name(column)}" for column in columns)
+    relevance = RawSQL(
+        f"MATCH ({column_sql}) AGAINST (%s IN BOOLEAN MODE)",
+        [_phrase(keyword)],
+        output_field=FloatField(),
+    )
+    return queryset.annotate(relevance=relevance).filter(relevance__gt=0)
@@ -0,0 +1,115 @@
+"""
+JSON 序列化与 JSON 响应
+
+安装了 orjson 时用 orjson，否则回退到标准库 json，两者输出一致：UTF-8 原文、紧凑分隔符，
+datetime 统一转成 UTC 的 ISO 8601 + Z（如 "2026-01-01T08:00:00Z"），调用方直接放 datetime 即可。
+json_response 传入 request 时，响应体超过 JSON_COMPRESS_MIN_BYTES 且客户端接受的话，
+按 br（需要安装 brotli）优先、其次 gzip 压缩。
+"""
+import datetime
+import decimal
+import gzip
+import json
+import uuid
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def _default(obj):
+    if isinstance(obj, datetime.datetime):
+        if obj.tzinfo is not None:
+            obj = obj.astimezone(dt_timezone.utc)
+        return obj.isoformat().replace("+00:00", "Z")
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID, Promise)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(data):
+    """标准库实现，没有 orjson 时使用"""
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_loads(raw):
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8")
+    return json.loads(raw)
+
+
+if orjson is not None:
+
+    def dumps(data):
+        # datetime 交给 _default 处理，与标准库输出保持一致（orjson 默认会保留微秒和 +00:00）
+        return orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+else:
+    dumps = json_dumps
+    loads = json_loads
+
+
+def parse_json(request):
+    """解析请求体，为空或不是合法 JSON 时返回 {}"""
+    if not request.body:
+        return {}
+    try:
+        return loads(request.body)
+    except ValueError:
+        return {}
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress(request, response):
+    """按 Accept-Encoding 就地压缩 response，返回使用的编码（未压缩为 None）"""
+    patch_vary_headers(response, ("Accept-Encoding",))
+    min_bytes = getattr(settings, "JSON_COMPRESS_MIN_BYTES", 1024)
+    if len(response.content) < min_bytes or response.has_header("Content-Encoding"):
+        return None
+    accepted = _accepted_encodings(request)
+    if brotli is not None and "br" in accepted:
+        encoding, body = "br", brotli.compress(response.content, quality=5)
+    elif "gzip" in accepted or "*" in accepted:
+        encoding, body = "gzip", gzip.compress(response.content, compresslevel=6, mtime=0)
+    else:
+        return None
+    response.content = body
+    response["Content-Encoding"] = encoding
+    response["Content-Length"] = str(len(body))
+    return encoding
+
+
+def json_response(data, status=200, request=None):
+    response = HttpResponse(dumps(data), status=status, content_type="application/json")
+    if request is not None:
+        compress(request, response)
+    return response
@@ -0,0 +1,159 @@
+"""
+截止时间调度：把过了 deadline 仍为 published 的问卷批量改为 closed
+
+进程内维护一个 (deadline, survey_id) 最小堆，只装截止时间在 lookahead 秒以内的问卷，
+由 (status, deadline) 索引（survey_status_deadline_idx）按顺序取出；每隔 poll_interval 秒整体重载一次，
+期间新发布或改了截止时间的问卷在下次重载时进堆。到期的问卷每 batch_size 个一条 UPDATE 关闭，
+UPDATE 不触发信号，提交后在这里补做信号里的工作：卡片状态、概览统计、ETag 版本号和 task.closed 推送。
+抽样候选池按卡片的 updated_at 增量刷新，会自动剔除关闭的卡片。列表因此只需按 status 过滤。
+
+善后的版本号、概览缓存与事件推送都要让 web 进程看到，所以调度在哪里运行取决于这些后端（settings.SURVEY_DEADLINE_RUNNER）：
+- web（默认）：web 进程启动时（wsgi.py / asgi.py）在后台线程里运行，适合单进程部署与默认的进程内缓存、进程内事件后端
+- command：由 `python Main.py close_expired_surveys --loop` 单独常驻运行，要求上述后端都是跨进程共享的，
+  否则命令拒绝启动（见 process_local_settings）
+"""
+import heapq
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.managers.task_card_manager import TaskCardManager
+from core.models import Survey
+from core.services.overview_cache import overview_cache
+from core.services.task_events import InProcessBackend, task_events
+from core.services.versions import versions
+
+logger = logging.getLogger(__name__)
+
+# 只在本进程内生效的缓存后端
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def process_local_settings():
+    """
+    after_close 依赖的后端里只在本进程内生效的设置项
+
+    非空时在 web 以外的进程里关闭问卷，web 进程的 ETag 版本号、概览缓存不会变，SSE 客户端也收不到 task.closed。
+    """
+    local = [
+        name
+        for name in ("VERSION_CACHE_ALIAS", "TASK_HALL_CACHE_ALIAS")
+        if settings.CACHES[getattr(settings, name, "default")]["BACKEND"] in LOCAL_CACHE_BACKENDS
+    ]
+    if isinstance(task_events.backend, InProcessBackend):
+        local.append("TASK_EVENTS_BACKEND")
+    return local
+
+
+class DeadlineScheduler:
+    def __init__(self, batch_size=500, lookahead=3600, poll_interval=30, max_pending=10000, runner="web"):
+        self.batch_size = batch_size
+        self.lookahead = lookahead
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self.runner = runner
+        self._heap = []
+        self._loaded_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def load(self, now=None):
+        """重载截止时间在 now + lookahead 之前的已发布问卷（含已经过期的积压）"""
+        now = now or timezone.now()
+        horizon = now + timedelta(seconds=self.lookahead)
+        rows = (
+            Survey.objects.filter(status="published", deadline__lte=horizon)
+            .order_by("deadline")
+            .values_list("deadline", "id")[: self.max_pending]
+        )
+        self._heap = list(rows)
+        heapq.heapify(self._heap)
+        self._loaded_at = time.monotonic()
+        return len(self._heap)
+
+    def __len__(self):
+        return len(self._heap)
+
+    @staticmethod
+    def close_surveys(survey_ids, now):
+        """关闭其中仍为 published 且已过期的问卷，返回实际关闭的 id"""
+        with transaction.atomic():
+            # 加锁后再确认一次：入堆之后截止时间可能被延后，或已被手动关闭
+            closed = list(
+                Survey.objects.select_for_update()
+                .filter(id__in=survey_ids, status="published", deadline__lte=now)
+                .values_list("id", flat=True)
+            )
+            if not closed:
+                return []
+            Survey.objects.filter(id__in=closed).update(status="closed", updated_at=now)
+            TaskCardManager.sync_status(closed, "closed")
+            transaction.on_commit(lambda: DeadlineScheduler.after_close(closed))
+        return closed
+
+    @staticmethod
+    def after_close(closed):
+        """批量 UPDATE 关闭问卷后补做信号里的工作，截止关闭与满额关闭（fill_submission）共用"""
+        overview_cache.invalidate("summary")
+        versions.bump("surveys", *(f"survey:{survey_id}" for survey_id in closed))
+        task_events.publish(task_events.closed_tasks(closed))
+
+    def run_once(self, now=None):
+        """关闭堆中所有已到期的问卷，返回关闭数量"""
+        now = now or timezone.now()
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.poll_interval:
+            self.load(now)
+        closed = 0
+        while self._heap and self._heap[0][0] <= now:
+            batch = []
+            while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self._heap)[1])
+            closed += len(self.close_surveys(batch, now))
+        return closed
+
+    def seconds_until_next(self, now=None):
+        """距下一个截止时间或下次重载的秒数，常驻循环据此休眠"""
+        now = now or timezone.now()
+        until_reload = self.poll_interval - (time.monotonic() - (self._loaded_at or 0))
+        if self._heap:
+            until_reload = min(until_reload, (self._heap[0][0] - now).total_seconds())
+        return max(until_reload, 0)
+
+    def start(self):
+        """runner 为 web 时在本进程的后台线程里常驻运行，由 web 入口（wsgi.py / asgi.py）调用"""
+        if self.runner != "web" or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="survey-deadline", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("closing expired surveys failed")
+                # 出错后下一轮从库里重载
+                self._loaded_at = None
+            finally:
+                # 后台线程有自己的数据库连接，用完即关
+                connection.close()
+            time.sleep(min(max(self.seconds_until_next(), 0.05), self.poll_interval))
+
+
+deadline_scheduler = DeadlineScheduler(
+    batch_size=getattr(settings, "SURVEY_DEADLINE_BATCH_SIZE", 500),
+    lookahead=getattr(settings, "SURVEY_DEADLINE_LOOKAHEAD", 3600),
+    poll_interval=getattr(settings, "SURVEY_DEADLINE_POLL_INTERVAL", 30),
+    runner=getattr(settings, "SURVEY_DEADLINE_RUNNER", "web"),
+)
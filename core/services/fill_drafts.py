@@ -0,0 +1,294 @@
+"""
+填写草稿的合并写入：自动保存先进内存，按间隔批量落库
+
+每个 (user_id, survey_id) 在进程内保留一份最新草稿，多次保存同一题只保留最后一次的值。
+有改动的草稿每 flush_interval 秒由后台线程批量写入 Response(status=in_progress) 与 Answer：
+每批一条 upsert 建立答卷、一条加锁查询取 id、一条 upsert 写答案、一条 DELETE 清掉被清空的题，
+查询数与草稿数、题目数无关。
+
+持久性的上限：进程崩溃最多丢失 flush_interval 秒内的保存；未落库的草稿超过 max_dirty 份时，
+下一次保存直接同步落库。提交答卷时丢弃内存草稿，并把已落库的 in_progress 答卷改为 submitted
+（见 core/services/fill_submission.py），落库时只写仍为 in_progress 的答卷，晚到的草稿不会覆盖提交。
+草稿只在本进程内合并，多进程部署时同一用户的保存落到哪个进程，读到的就是哪个进程的草稿，
+以最后落库的为准。
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Answer, Response
+
+logger = logging.getLogger(__name__)
+
+
+class Draft:
+    __slots__ = ("questionnaire_id", "answers", "pending", "started_at", "saved_at", "dirty_since")
+
+    def __init__(self, questionnaire_id, started_at):
+        self.questionnaire_id = questionnaire_id
+        # {question_id: (value_text, value_json)}，是草稿的完整内容
+        self.answers = {}
+        # 上次落库之后改过的题：{question_id: (value_text, value_json) 或 None（清空）}
+        self.pending = {}
+        self.started_at = started_at
+        self.saved_at = started_at
+        self.dirty_since = None
+
+    def values(self):
+        """按提交格式返回草稿里的答案"""
+        return [
+            {"question_id": str(question_id), "value": value_text if value_text is not None else value_json}
+            for question_id, (value_text, value_json) in self.answers.items()
+        ]
+
+
+class DraftStore:
+    def __init__(self, flush_interval=30, max_dirty=1000, max_drafts=10000, batch_size=500, background=True):
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.max_drafts = max_drafts
+        self.batch_size = batch_size
+        self.background = background
+        self._drafts = OrderedDict()
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.saves = 0
+        self.flushes = 0
+        self.written = 0
+
+    def save(self, user_id, survey_id, questionnaire_id, rows):
+        """
+        合并一次自动保存，rows 为 [(question_id, value_text, value_json)]，两个值都为 None 表示清空该题
+
+        返回草稿；问卷换了版本时旧草稿作废，从空白开始。
+        """
+        now = timezone.now()
+        key = (user_id, survey_id)
+        with self._lock:
+            draft = self._drafts.get(key)
+            if draft is None or draft.questionnaire_id != questionnaire_id:
+                if draft is not None and draft.dirty_since is not None:
+                    self._dirty -= 1
+                draft = Draft(questionnaire_id, now)
+                self._drafts[key] = draft
+            self._drafts.move_to_end(key)
+            for question_id, value_text, value_json in rows:
+                if value_text is None and value_json is None:
+                    draft.answers.pop(question_id, None)
+                    draft.pending[question_id] = None
+                else:
+                    draft.answers[question_id] = draft.pending[question_id] = (value_text, value_json)
+            draft.saved_at = now
+            if draft.dirty_since is None:
+                draft.dirty_since = now
+                self._dirty += 1
+            self.saves += 1
+            self._evict_clean()
+            overflow = self._dirty > self.max_dirty
+        if overflow:
+            self.flush()
+        elif self.background:
+            self._start()
+        return draft
+
+    def get(self, user_id, survey_id):
+        """内存里的草稿；没有时从库里的 in_progress 答卷恢复，都没有返回 None"""
+        key = (user_id, survey_id)
+        with self._lock:
+            draft = self._drafts.get(key)
+            if draft is not None:
+                self._drafts.move_to_end(key)
+                return draft
+        response = Response.objects.filter(user_id=user_id, survey_id=survey_id, status="in_progress").first()
+        if response is None:
+            return None
+        draft = Draft(response.questionnaire_id, response.started_at or response.created_at)
+        draft.saved_at = response.updated_at
+        for question_id, value_text, value_json in Answer.objects.filter(response=response).values_list(
+            "question_id", "value_text", "value_json"
+        ):
+            draft.answers[question_id] = (value_text, value_json)
+        with self._lock:
+            # 读库期间有新的保存时以内存为准
+            draft = self._drafts.setdefault(key, draft)
+            self._evict_clean()
+        return draft
+
+    def discard(self, user_id, survey_id):
+        """提交后丢弃草稿，未落库的改动不再写入"""
+        with self._lock:
+            draft = self._drafts.pop((user_id, survey_id), None)
+            if draft is not None and draft.dirty_since is not None:
+                self._dirty -= 1
+
+    def _evict_clean(self):
+        # 超出 max_drafts 时从最久未用的一端淘汰已落库的草稿；未落库的等下次落库后再淘汰
+        if len(self._drafts) <= self.max_drafts:
+            return
+        for key in [key for key, draft in self._drafts.items() if draft.dirty_since is None]:
+            del self._drafts[key]
+            if len(self._drafts) <= self.max_drafts:
+                return
+
+    def flush(self):
+        """把所有未落库的改动写入数据库，返回写入的草稿数"""
+        with self._lock:
+            batch = []
+            for key, draft in self._drafts.items():
+                if draft.dirty_since is None:
+                    continue
+                batch.append((key, draft.questionnaire_id, draft.started_at, draft.pending))
+                draft.pending = {}
+                draft.dirty_since = None
+            self._dirty = 0
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                self._write(chunk)
+            except Exception:
+                # 写入失败的改动放回去，下次重试；期间的新保存优先
+                self._restore(batch[start:])
+                raise
+        if batch:
+            self.flushes += 1
+            self.written += len(batch)
+        return len(batch)
+
+    def _restore(self, batch):
+        now = timezone.now()
+        with self._lock:
+            for key, questionnaire_id, started_at, pending in batch:
+                draft = self._drafts.get(key)
+                if draft is None or draft.questionnaire_id != questionnaire_id:
+                    continue
+                draft.pending = {**pending, **draft.pending}
+                if draft.dirty_since is None:
+                    draft.dirty_since = now
+                    self._dirty += 1
+
+    @staticmethod
+    def _write(batch):
+        with transaction.atomic():
+            # 已有答卷时只刷新 updated_at，不动 status 与版本，已提交的答卷保持原样
+            DraftStore._upsert(
+                Response,
+                [
+                    Response(
+                        user_id=user_id,
+                        survey_id=survey_id,
+                        questionnaire_id=questionnaire_id,
+                        status="in_progress",
+                        started_at=started_at,
+                    )
+                    for (user_id, survey_id), questionnaire_id, started_at, _ in batch
+                ],
+                unique_fields=["user", "survey"],
+                update_fields=["updated_at"],
+            )
+            # 加锁读状态，与提交互斥：提交先完成时这里读到 submitted，跳过
+            rows = (
+                Response.objects.select_for_update()
+                .filter(reduce(or_, (Q(user_id=key[0], survey_id=key[1]) for key, *_ in batch)))
+                .filter(status="in_progress")
+                .values_list("id", "user_id", "survey_id", "questionnaire_id")
+            )
+            response_ids = {}
+            questionnaires = {key: questionnaire_id for key, questionnaire_id, _, _ in batch}
+            stale = {}
+            for response_id, user_id, survey_id, questionnaire_id in rows:
+                key = (user_id, survey_id)
+                response_ids[key] = response_id
+                if questionnaire_id != questionnaires[key]:
+                    stale.setdefault(questionnaires[key], []).append(response_id)
+            # 问卷换了版本：旧版本的答案作废，答卷改挂到新版本
+            for questionnaire_id, ids in stale.items():
+                Answer.objects.filter(response_id__in=ids).delete()
+                Response.objects.filter(id__in=ids).update(questionnaire_id=questionnaire_id)
+            upserts = []
+            cleared = []
+            for key, _, _, pending in batch:
+                response_id = response_ids.get(key)
+                if response_id is None:
+                    continue
+                for question_id, stored in pending.items():
+                    if stored is None:
+                        cleared.append(Q(response_id=response_id, question_id=question_id))
+                    else:
+                        upserts.append(
+                            Answer(
+                                response_id=response_id,
+                                question_id=question_id,
+                                value_text=stored[0],
+                                value_json=stored[1],
+                            )
+                        )
+            if upserts:
+                DraftStore._upsert(
+                    Answer,
+                    upserts,
+                    unique_fields=["response", "question"],
+                    update_fields=["value_text", "value_json", "updated_at"],
+                )
+            if cleared:
+                Answer.objects.filter(reduce(or_, cleared)).delete()
+
+    @staticmethod
+    def _upsert(model, objs, unique_fields, update_fields):
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不能指定冲突列（传 unique_fields 会报 NotSupportedError），
+        # 按表上任一唯一键冲突更新；这两张表除主键外只有 unique_fields 这一个唯一约束，结果相同
+        options = {"update_conflicts": True, "update_fields": update_fields}
+        if connection.features.supports_update_conflicts_with_target:
+            options["unique_fields"] = unique_fields
+        model.objects.bulk_create(objs, **options)
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="fill-draft-flush", daemon=True)
+            self._thread.start()
+        atexit.register(self._flush_quietly)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("fill draft flush failed")
+        finally:
+            # 后台线程有自己的数据库连接，用完即关，不占用连接池
+            if threading.current_thread() is self._thread:
+                connection.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "drafts": len(self._drafts),
+                "dirty": self._dirty,
+                "saves": self.saves,
+                "flushes": self.flushes,
+                "written": self.written,
+            }
+
+
+fill_drafts = DraftStore(
+    flush_interval=getattr(settings, "FILL_DRAFT_FLUSH_INTERVAL", 30),
+    max_dirty=getattr(settings, "FILL_DRAFT_MAX_DIRTY", 1000),
+    max_drafts=getattr(settings, "FILL_DRAFT_MAX_DRAFTS", 10000),
+)
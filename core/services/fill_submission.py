@@ -0,0 +1,78 @@
+"""
+答卷提交：按问卷当前版本的编译结构校验 answers，在一个事务里写入 Response 与全部 Answer
+
+校验用 core/services/questionnaire_schema.py 的缓存结构，命中时不查库；Answer 一次 bulk_create 写入，
+查询数与题目数量无关。同一事务里 Survey.completed 自增，达到 target 时自动关闭问卷（target 为空表示不限份数）。
+已有自动保存的草稿（core/services/fill_drafts.py）时，草稿答卷原地转为提交。answers 的格式见 doc/api/API-问卷填写.md。
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.managers.survey_counter_manager import SurveyCounterManager
+from core.models import Answer, Response
+from core.services.deadline_scheduler import DeadlineScheduler
+from core.services.fill_drafts import fill_drafts
+from core.services.questionnaire_schema import AnswerError, schema_cache
+from core.services.skip_logic import LogicError
+
+
+class AlreadyFilled(Exception):
+    """该用户已经提交过这份问卷（包括并发的重复提交），response 为已有的答卷"""
+
+    def __init__(self, response):
+        super().__init__("already filled")
+        self.response = response
+
+
+def submit_response(survey, user, answers, duration_seconds=None):
+    """
+    校验并写入一份答卷，答案不合法时抛出 AnswerError，已经提交过时抛出 AlreadyFilled
+
+    survey 需要带上 active_questionnaire（select_related），否则会多一次查询。
+    """
+    questionnaire = survey.active_questionnaire
+    if questionnaire is None:
+        raise AnswerError("survey has no questionnaire")
+    try:
+        schema = schema_cache.get(questionnaire)
+    except LogicError as exc:
+        raise AnswerError(f"invalid questionnaire logic: {exc}")
+    rows = schema.validate(answers)
+    # 提交的答案是完整的，内存里还没落库的草稿直接作废
+    fill_drafts.discard(user.id, survey.id)
+    with transaction.atomic():
+        # 直接插入，靠 (user, survey) 唯一约束判重，不先查一次；冲突时再取出已有的答卷
+        try:
+            with transaction.atomic():
+                response = Response.objects.create(
+                    survey=survey,
+                    questionnaire=questionnaire,
+                    user=user,
+                    duration_seconds=duration_seconds,
+                    status="submitted",
+                    submitted_at=timezone.now(),
+                )
+        except IntegrityError:
+            # 加锁读最新提交的版本，与草稿落库互斥
+            response = Response.objects.select_for_update().get(survey=survey, user=user)
+            if response.status != "in_progress":
+                raise AlreadyFilled(response)
+            # 自动保存已经落库的 in_progress 答卷原地转为提交
+            response.questionnaire = questionnaire
+            response.duration_seconds = duration_seconds
+            response.status = "submitted"
+            response.submitted_at = timezone.now()
+            response.save(update_fields=["questionnaire", "duration_seconds", "status", "submitted_at", "updated_at"])
+            Answer.objects.filter(response=response).delete()
+        Answer.objects.bulk_create(
+            [
+                Answer(response=response, question_id=question_id, value_text=value_text, value_json=value_json)
+                for question_id, value_text, value_json in rows
+            ]
+        )
+        # 计数放在最后：只在提交前短暂锁住问卷行；并发提交已把问卷填满关闭时整个事务回滚
+        if not SurveyCounterManager.add_completed(survey.id):
+            raise AnswerError("survey not published")
+        if SurveyCounterManager.close_if_full(survey.id):
+            transaction.on_commit(lambda: DeadlineScheduler.after_close([survey.id]))
+    return response
@@ -0,0 +1,69 @@
+"""
+Idempotency-Key：客户端重试（重复点击、超时重发）时重放第一次的结果
+
+结果按 (scope, user_id, key) 存在共享缓存（settings.IDEMPOTENCY_CACHE_ALIAS）里，保留 ttl 秒。
+第一次请求先用 cache.add 原子占位，处理完写入 (状态码, 响应体, 请求指纹)：
+重试命中结果时直接重放，不查库；第一次还在处理中时返回占位标记，由调用方回 409；
+同一个 key 配上不同的请求（指纹不同）时由调用方拒绝。5xx 等未完成的请求释放占位，允许重试。
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+IN_FLIGHT = "in-flight"
+
+
+class IdempotencyStore:
+    KEY_PREFIX = "idempotency:"
+
+    def __init__(self, ttl=600, lock_ttl=30, alias="default"):
+        self.ttl = ttl
+        # 占位的有效期：处理中的进程崩溃时，过了这段时间允许重试
+        self.lock_ttl = lock_ttl
+        self.alias = alias
+
+    def _cache(self):
+        return caches[self.alias]
+
+    def _key(self, scope, user_id, key):
+        # key 由客户端生成，长度和字符都不可控，哈希后再作为缓存键
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return f"{self.KEY_PREFIX}{scope}:{user_id}:{digest}"
+
+    @staticmethod
+    def fingerprint(*parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def begin(self, scope, user_id, key):
+        """
+        占位；成功返回 None，表示由本次请求处理
+
+        否则返回 IN_FLIGHT（第一次还在处理中）或保存的 (status, content, fingerprint)。
+        """
+        cache = self._cache()
+        cache_key = self._key(scope, user_id, key)
+        if cache.add(cache_key, IN_FLIGHT, self.lock_ttl):
+            return None
+        saved = cache.get(cache_key)
+        if saved is None:
+            # 读之前恰好过期，再占一次
+            return None if cache.add(cache_key, IN_FLIGHT, self.lock_ttl) else IN_FLIGHT
+        return saved
+
+    def finish(self, scope, user_id, key, fingerprint, status, content):
+        self._cache().set(self._key(scope, user_id, key), (status, content, fingerprint), self.ttl)
+
+    def abandon(self, scope, user_id, key):
+        self._cache().delete(self._key(scope, user_id, key))
+
+
+idempotency = IdempotencyStore(
+    ttl=getattr(settings, "IDEMPOTENCY_TTL", 600),
+    lock_ttl=getattr(settings, "IDEMPOTENCY_LOCK_TTL", 30),
+    alias=getattr(settings, "IDEMPOTENCY_CACHE_ALIAS", "default"),
+)
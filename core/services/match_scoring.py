@@ -0,0 +1,149 @@
+"""
+任务匹配度打分
+
+一批候选卡片整理成列向量后，一次 NumPy 运算算出全部分数，四项特征各自归一到 [0, 1]：
+- tags：用户标签（UserTag）与问卷标签（SurveyTag）的重合数，标签以 (行号, tag_id) 稀疏对表示
+- reward：每分钟奖励积分，半饱和归一
+- urgency：距截止时间越近越高，已截止或未设置为 0
+- room：剩余名额比例
+加权求和得到分数；match_reason 取加权贡献达到该项权重一半的特征，按贡献从大到小排列。
+"""
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+
+FEATURES = ("tags", "reward", "urgency", "room")
+REASONS = {
+    "tags": "与你的标签匹配",
+    "reward": "单位时间奖励高",
+    "urgency": "即将截止",
+    "room": "名额充足",
+}
+
+
+class Candidates:
+    """候选卡片的列存表示，行号与传入顺序一致"""
+
+    def __init__(self, ids, reward, minutes, deadline, filled, target, tag_rows, tag_ids):
+        self.ids = ids
+        self.reward = reward
+        self.minutes = minutes
+        self.deadline = deadline
+        self.filled = filled
+        self.target = target
+        self.tag_rows = tag_rows
+        self.tag_ids = tag_ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows, tag_pairs):
+        """
+        rows: [(survey_id, reward, estimated_minutes, deadline, filled_count, target)]
+        tag_pairs: [(survey_id, tag_id)]，不在 rows 里的问卷会被忽略
+        """
+        if rows:
+            ids, reward, minutes, deadline, filled, target = zip(*rows)
+        else:
+            ids = reward = minutes = deadline = filled = target = ()
+        ids = np.array(ids, dtype=np.int64)
+        # 稀疏标签对按 survey_id 二分查找映射到行号
+        tag_pairs = list(tag_pairs)
+        pairs = np.fromiter(
+            chain.from_iterable(tag_pairs), dtype=np.int64, count=2 * len(tag_pairs)
+        ).reshape(-1, 2)
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+        found = np.searchsorted(sorted_ids, pairs[:, 0])
+        found = np.minimum(found, max(len(ids) - 1, 0))
+        known = sorted_ids[found] == pairs[:, 0] if len(ids) else np.zeros(len(pairs), dtype=bool)
+        return cls(
+            ids=ids,
+            # None 转为 NaN，由 score() 统一处理
+            reward=np.array(reward, dtype=np.float64),
+            minutes=np.array(minutes, dtype=np.float64),
+            deadline=np.array([value and value.timestamp() for value in deadline], dtype=np.float64),
+            filled=np.array(filled, dtype=np.float64),
+            target=np.array(target, dtype=np.float64),
+            tag_rows=order[found[known]],
+            tag_ids=pairs[known, 1],
+        )
+
+    @classmethod
+    def from_cards(cls, cards, tag_pairs):
+        rows = [
+            (card.survey_id, card.reward, card.estimated_minutes, card.deadline, card.filled_count, card.target)
+            for card in cards
+        ]
+        return cls.from_rows(rows, tag_pairs)
+
+
+class MatchScorer:
+    def __init__(
+        self,
+        weights=(0.4, 0.3, 0.15, 0.15),
+        tag_saturation=2,
+        reward_rate_ref=1.0,
+        default_minutes=5,
+        urgency_hours=72,
+        high=0.6,
+        medium=0.35,
+    ):
+        self.weights = np.array(weights, dtype=np.float64)
+        self.tag_saturation = tag_saturation
+        self.reward_rate_ref = reward_rate_ref
+        self.default_minutes = default_minutes
+        self.urgency_hours = urgency_hours
+        self.high = high
+        self.medium = medium
+
+    def score(self, user_tag_ids, candidates, now):
+        """返回 (scores, parts)：scores 形状 (n,)，parts 形状 (n, 4) 为各特征加权后的贡献"""
+        n = len(candidates)
+        tags = np.zeros(n)
+        if user_tag_ids and candidates.tag_ids.size:
+            hit = np.isin(candidates.tag_ids, np.fromiter(user_tag_ids, dtype=np.int64))
+            overlap = np.bincount(candidates.tag_rows[hit], minlength=n)
+            tags = np.minimum(overlap / self.tag_saturation, 1.0)
+
+        minutes = np.where(candidates.minutes > 0, candidates.minutes, self.default_minutes)
+        rate = np.nan_to_num(candidates.reward) / minutes
+        reward = rate / (rate + self.reward_rate_ref)
+
+        with np.errstate(invalid="ignore"):
+            hours_left = (candidates.deadline - now.timestamp()) / 3600
+            urgency = np.where(hours_left > 0, np.exp(-hours_left / self.urgency_hours), 0.0)
+        urgency = np.nan_to_num(urgency)
+
+        # target 为 0 表示不限份数，剩余空间按满额计
+        room = np.where(
+            candidates.target > 0, np.clip(1 - candidates.filled / np.maximum(candidates.target, 1), 0.0, 1.0), 1.0
+        )
+
+        parts = np.column_stack((tags, reward, urgency, room)) * self.weights
+        return parts.sum(axis=1), parts
+
+    def level(self, score):
+        if score >= self.high:
+            return "high"
+        if score >= self.medium:
+            return "medium"
+        return "low"
+
+    def reason(self, part_row):
+        order = np.argsort(-part_row, kind="stable")
+        return "，".join(
+            REASONS[FEATURES[index]] for index in order if part_row[index] >= self.weights[index] / 2
+        )
+
+    def count_high(self, scores):
+        return int(np.count_nonzero(scores >= self.high))
+
+
+match_scorer = MatchScorer(
+    weights=getattr(settings, "MATCH_WEIGHTS", (0.4, 0.3, 0.15, 0.15)),
+    high=getattr(settings, "MATCH_HIGH_SCORE", 0.6),
+    medium=getattr(settings, "MATCH_MEDIUM_SCORE", 0.35),
+)
@@ -0,0 +1,92 @@
+"""
+任务大厅概览缓存：summary / filters 区块，以及按用户区分的 high_match 计数
+
+每个区块带短 TTL，写入路径通过 invalidate() 显式失效（见 core/signals.py）。
+失效只递增代号，不删除旧值：过期后由抢到锁（cache.add）的一个请求重新计算，
+其余并发请求继续返回旧值，避免缓存击穿时所有 worker 同时打到数据库。
+按用户区分的区块用 get_keyed()，键里带上数据的版本号，版本变化即换键，不需要显式失效。
+后端为 CACHES 中的别名（settings.TASK_HALL_CACHE_ALIAS），指向共享后端时跨进程生效。
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class OverviewCache:
+    KEY_PREFIX = "task_hall:"
+
+    def __init__(self, ttls, stale_ttl=300, lock_timeout=10, alias="default"):
+        self.ttls = ttls
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.alias = alias
+
+    def _keys(self, name):
+        key = self.KEY_PREFIX + name
+        return key, key + ":gen", key + ":lock"
+
+    def get(self, name, compute):
+        """返回区块 name 的缓存值，过期或失效时调用 compute() 重新计算"""
+        ttl = self.ttls.get(name, 0)
+        if ttl <= 0:
+            return compute()
+        cache = caches[self.alias]
+        key, gen_key, lock_key = self._keys(name)
+        values = cache.get_many([key, gen_key])
+        entry = values.get(key)
+        generation = values.get(gen_key, 0)
+        if entry is not None:
+            value, entry_generation, fresh_until = entry
+            if entry_generation == generation and fresh_until > time.time():
+                return value
+
+        if not cache.add(lock_key, 1, self.lock_timeout):
+            # 其他请求正在重算：有旧值就先用旧值
+            if entry is not None:
+                return entry[0]
+            return compute()
+
+        try:
+            value = compute()
+            # 记下计算开始前的代号，计算期间发生的失效会让这份结果立刻过期
+            cache.set(key, (value, generation, time.time() + ttl), ttl + self.stale_ttl)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    def get_keyed(self, name, key, compute):
+        """按 key（如用户 id 加版本号）分别缓存的区块；只有本人会算同一个键，不做防击穿"""
+        ttl = self.ttls.get(name, 0)
+        if ttl <= 0:
+            return compute()
+        cache = caches[self.alias]
+        cache_key = f"{self.KEY_PREFIX}{name}:{key}"
+        value = cache.get(cache_key)
+        if value is not None:
+            return value
+        value = compute()
+        cache.set(cache_key, value, ttl)
+        return value
+
+    def invalidate(self, *names):
+        cache = caches[self.alias]
+        for name in names:
+            _, gen_key, _ = self._keys(name)
+            # 代号不设过期；add 保证 incr 之前键存在
+            cache.add(gen_key, 0, None)
+            try:
+                cache.incr(gen_key)
+            except ValueError:
+                cache.set(gen_key, 1, None)
+
+
+overview_cache = OverviewCache(
+    ttls={
+        "summary": getattr(settings, "TASK_HALL_SUMMARY_TTL", 15),
+        "filters": getattr(settings, "TASK_HALL_FILTERS_TTL", 300),
+        "high_match": getattr(settings, "TASK_HALL_HIGH_MATCH_TTL", 60),
+    },
+    stale_ttl=getattr(settings, "TASK_HALL_CACHE_STALE_TTL", 300),
+    alias=getattr(settings, "TASK_HALL_CACHE_ALIAS", "default"),
+)
@@ -0,0 +1,72 @@
+"""
+密码哈希线程池
+
+PBKDF2 计算期间 hashlib 会释放 GIL，放到独立的定长线程池里执行，避免登录高峰占满请求线程。
+排队（执行中 + 等待中）的任务数超过上限时直接抛出 HasherBusy，由视图返回 503。
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHashPool:
+    def __init__(self, workers=0, max_pending=0, timeout=5.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="password-hash"
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HasherBusy()
+
+    def make_password(self, password):
+        return self._run(hashers.make_password, password)
+
+    def check_password(self, password, encoded):
+        """返回 (是否正确, 新哈希)；哈希参数已变化时新哈希不为 None，调用方负责保存"""
+        return self._run(_check_password, password, encoded)
+
+
+def _check_password(password, encoded):
+    rehashed = []
+    is_correct = hashers.check_password(
+        password, encoded, setter=lambda raw: rehashed.append(hashers.make_password(raw))
+    )
+    return is_correct, rehashed[0] if rehashed else None
+
+
+password_hasher = PasswordHashPool(
+    workers=getattr(settings, "PASSWORD_HASH_WORKERS", 0),
+    max_pending=getattr(settings, "PASSWORD_HASH_MAX_PENDING", 0),
+    timeout=getattr(settings, "PASSWORD_HASH_TIMEOUT", 5.0),
+)
@@ -0,0 +1,297 @@
+"""
+编译后的问卷结构：填写页渲染与答卷校验共用
+
+已发布的问卷版本视为不可变，按 (questionnaire_id, version) 编译一次：题目按顺序排好，
+选项值为 frozenset，每题预先生成校验函数并编译跳题逻辑，填写页的题目列表也预先构造好。
+编译结果放在进程内 LRU 里，按估算字节数淘汰（settings.QUESTIONNAIRE_SCHEMA_CACHE_BYTES），
+命中后渲染和校验都不查库。草稿等未发布版本每次重新编译，不进缓存。
+题目或选项被修改时由 core/signals.py 按问卷 id 清除（只影响本进程）。
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from core.models import Question, QuestionOption
+from core.serialization import dumps
+from core.services.skip_logic import compile_logic
+
+
+class AnswerError(ValueError):
+    """答案不合法，错误信息直接作为 422 响应返回"""
+
+
+def _is_str_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _is_blank(value):
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip()
+    if isinstance(value, list):
+        return not value
+    return False
+
+
+# 各题型的校验函数工厂：返回 validate(value) -> (value_text, value_json)，不合法时抛出 AnswerError
+def _single_validator(question_id, values, allow_other):
+    def validate(value):
+        if not isinstance(value, str):
+            raise AnswerError(f"invalid answer for question {question_id}")
+        if value not in values and not allow_other:
+            raise AnswerError(f"invalid option for question {question_id}")
+        return value, None
+
+    return validate
+
+
+def _multi_validator(question_id, values, allow_other):
+    def validate(value):
+        if not _is_str_list(value) or len(set(value)) != len(value):
+            raise AnswerError(f"invalid answer for question {question_id}")
+        if not allow_other and not values.issuperset(value):
+            raise AnswerError(f"invalid option for question {question_id}")
+        return None, value
+
+    return validate
+
+
+def _text_validator(question_id, values, allow_other):
+    def validate(value):
+        if not isinstance(value, str):
+            raise AnswerError(f"invalid answer for question {question_id}")
+        return value, None
+
+    return validate
+
+
+def _multi_text_validator(question_id, values, allow_other):
+    expected = len(values)
+
+    def validate(value):
+        if not _is_str_list(value) or (expected and len(value) != expected):
+            raise AnswerError(f"invalid answer for question {question_id}")
+        return None, value
+
+    return validate
+
+
+def _raw_validator(question_id, values, allow_other):
+    # 其他题型原样保存
+    return lambda value: (None, value)
+
+
+VALIDATORS = {
+    "single": _single_validator,
+    "multi": _multi_validator,
+    "text": _text_validator,
+    "multi-text": _multi_text_validator,
+}
+
+
+class CompiledQuestion:
+    __slots__ = (
+        "id",
+        "order",
+        "type",
+        "title",
+        "required",
+        "values",
+        "allow_other",
+        "config",
+        "logic",
+        "validate",
+        "show",
+        "required_if",
+        "jumps",
+    )
+
+    def __init__(self, question, options, logic):
+        self.id = question.id
+        self.order = question.order_no
+        self.type = question.type
+        self.title = question.title
+        self.required = question.is_required
+        self.values = frozenset(option.value for option in options)
+        # 带“其他”选项的选择题允许填选项以外的文本
+        self.allow_other = any(option.is_other for option in options)
+        self.config = question.config_json
+        self.logic = question.logic_json
+        factory = VALIDATORS.get(question.type, _raw_validator)
+        self.validate = factory(question.id, self.values, self.allow_other)
+        # 编译好的跳题逻辑（core/services/skip_logic.py）
+        self.show, self.required_if, self.jumps = logic
+
+
+class QuestionnaireSchema:
+    def __init__(self, questionnaire, questions, options_by_question):
+        self.questionnaire_id = questionnaire.id
+        self.version = questionnaire.version
+        orders = [question.order_no for question in questions]
+        ids_by_order = {question.order_no: question.id for question in questions}
+        self.questions = tuple(
+            CompiledQuestion(
+                question,
+                options_by_question.get(question.id, ()),
+                compile_logic(question.logic_json, index, orders, ids_by_order),
+            )
+            for index, question in enumerate(questions)
+        )
+        self.by_id = {question.id: question for question in self.questions}
+        # 填写页的题目列表（doc/api/API-问卷填写.md 的 SurveyFill.questions），只读共享
+        self.fill_questions = [
+            {
+                "id": str(question.id),
+                "type": question.type,
+                "title": question.title,
+                "description": question.description,
+                "options": [option.value for option in options_by_question.get(question.id, ())],
+                "allow_other": compiled.allow_other,
+                "required": question.is_required,
+                "order": question.order_no,
+                "logic": question.logic_json,
+            }
+            for question, compiled in zip(questions, self.questions)
+        ]
+        # LRU 按这个估算值计容量：题目列表编码后的长度，加上每题对象的固定开销
+        self.size = len(dumps(self.fill_questions)) + 512 * len(self.questions) + 512
+
+    def route(self, answers):
+        """
+        按跳题逻辑返回作答路径上的题目 [(CompiledQuestion, 是否必答)]
+
+        answers 为 {question_id: 值}；条件只看路径上已作答的题，空答案视为未作答。
+        """
+        questions = self.questions
+        count = len(questions)
+        reached = []
+        values = {}
+        index = 0
+        while index < count:
+            question = questions[index]
+            index += 1
+            if question.show is not None and not question.show(values):
+                continue
+            required = question.required if question.required_if is None else question.required_if(values)
+            reached.append((question, required))
+            value = answers.get(question.id)
+            if not _is_blank(value):
+                values[question.id] = value
+            for condition, target in question.jumps:
+                if condition(values):
+                    index = target
+                    break
+        return reached
+
+    def _parse(self, answers):
+        """把提交格式的 answers 转成 {question_id: 值}"""
+        if answers is None:
+            answers = []
+        if not isinstance(answers, list):
+            raise AnswerError("answers must be a list")
+        by_id = self.by_id
+        values = {}
+        for item in answers:
+            if not isinstance(item, dict):
+                raise AnswerError("answers must be a list of objects")
+            raw_id = item.get("question_id")
+            try:
+                question_id = int(raw_id)
+            except (TypeError, ValueError):
+                raise AnswerError(f"unknown question {raw_id}")
+            if question_id not in by_id:
+                raise AnswerError(f"unknown question {raw_id}")
+            if question_id in values:
+                raise AnswerError(f"duplicate answer for question {question_id}")
+            values[question_id] = item.get("value")
+        return values
+
+    def validate(self, answers):
+        """
+        校验 answers，返回按题目顺序排列的 [(question_id, value_text, value_json)]，不查库
+
+        只校验和保存作答路径上的题目，被跳过或隐藏的题目的答案直接丢弃。
+        """
+        values = self._parse(answers)
+        rows = []
+        for question, required in self.route(values):
+            value = values.get(question.id)
+            if _is_blank(value):
+                if required:
+                    raise AnswerError(f"question {question.id} is required")
+                continue
+            rows.append((question.id, *question.validate(value)))
+        return rows
+
+    def validate_draft(self, answers):
+        """
+        校验自动保存的部分答案，返回 [(question_id, value_text, value_json)]
+
+        不检查必填与跳题；空答案返回 (question_id, None, None)，表示清空该题。
+        """
+        rows = []
+        for question_id, value in self._parse(answers).items():
+            if _is_blank(value):
+                rows.append((question_id, None, None))
+            else:
+                rows.append((question_id, *self.by_id[question_id].validate(value)))
+        return rows
+
+
+def compile_schema(questionnaire):
+    """题目、选项各一次查询"""
+    questions = list(Question.objects.filter(questionnaire_id=questionnaire.id).order_by("order_no"))
+    options_by_question = {}
+    if questions:
+        options = QuestionOption.objects.filter(question__questionnaire_id=questionnaire.id).order_by(
+            "question_id", "order_no"
+        )
+        for option in options:
+            options_by_question.setdefault(option.question_id, []).append(option)
+    return QuestionnaireSchema(questionnaire, questions, options_by_question)
+
+
+class SchemaCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, questionnaire):
+        """返回 questionnaire 的编译结果；已发布的版本走缓存"""
+        if questionnaire.status != "published":
+            return compile_schema(questionnaire)
+        key = (questionnaire.id, questionnaire.version)
+        with self._lock:
+            schema = self._entries.get(key)
+            if schema is not None:
+                self._entries.move_to_end(key)
+                return schema
+        # 编译在锁外进行；并发编译同一版本时结果相同，后写入的覆盖即可
+        schema = compile_schema(questionnaire)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = schema
+            self._bytes += schema.size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return schema
+
+    def evict(self, questionnaire_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == questionnaire_id]:
+                self._bytes -= self._entries.pop(key).size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+schema_cache = SchemaCache(max_bytes=getattr(settings, "QUESTIONNAIRE_SCHEMA_CACHE_BYTES", 32 * 1024 * 1024))
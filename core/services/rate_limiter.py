@@ -0,0 +1,183 @@
+"""
+按身份维度（IP / 邮箱 / 用户）的滑动窗口限流
+
+每个维度一份额度（settings.RATE_LIMIT_SCOPES），各接口按权重消耗（settings.RATE_LIMIT_COSTS）。
+滑动窗口用“上一窗口计数 × 剩余比例 + 当前窗口计数”近似，每个键只需保存两个计数。
+一次请求涉及的维度先全部检查，都放行才一起扣减，被拦下的请求不消耗任何维度的额度。
+
+后端：
+- LocalBackend：进程内，LRU 淘汰，键数量不超过 RATE_LIMIT_MAX_KEYS
+- CacheBackend：Django 缓存（settings.RATE_LIMIT_CACHE_ALIAS），多进程共享，键按窗口过期
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _estimate(prev, curr, window, now):
+    return prev * (1 - (now % window) / window) + curr
+
+
+def _retry_after(prev, curr, limit, window, cost, now):
+    """还需要等待多少秒，窗口内剩余额度足够时按上一窗口计数衰减计算，否则等到窗口滚动"""
+    elapsed = now % window
+    room = limit - curr - cost
+    if room >= 0 and prev > 0:
+        wait = (1 - room / prev) * window - elapsed
+    else:
+        wait = window - elapsed
+    return max(1, math.ceil(wait))
+
+
+class LocalBackend:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _counter(self, key, window, now):
+        bucket = int(now // window)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = [bucket, 0, 0]
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        else:
+            self._counters.move_to_end(key)
+        if counter[0] != bucket:
+            counter[1] = counter[2] if counter[0] == bucket - 1 else 0
+            counter[2] = 0
+            counter[0] = bucket
+        return counter
+
+    def hit(self, entries, now, charge=True):
+        """entries 为 [(key, limit, window, cost)]；全部放行时（charge 为真）一起扣减，返回需要等待的秒数"""
+        with self._lock:
+            counters = [(self._counter(key, window, now), limit, window, cost) for key, limit, window, cost in entries]
+            wait = 0
+            for counter, limit, window, cost in counters:
+                if _estimate(counter[1], counter[2], window, now) + cost > limit:
+                    wait = max(wait, _retry_after(counter[1], counter[2], limit, window, cost, now))
+            if charge and not wait:
+                for counter, _, _, cost in counters:
+                    counter[2] += cost
+            return wait
+
+    def add(self, entries, now):
+        """不检查额度直接扣减"""
+        with self._lock:
+            for key, _, window, cost in entries:
+                self._counter(key, window, now)[2] += cost
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CacheBackend:
+    KEY_PREFIX = "rate_limit:"
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def _keys(self, key, window, now):
+        bucket = int(now // window)
+        return f"{self.KEY_PREFIX}{key}:{bucket - 1}", f"{self.KEY_PREFIX}{key}:{bucket}"
+
+    def hit(self, entries, now, charge=True):
+        cache = caches[self.alias]
+        keys = [self._keys(key, window, now) for key, _, window, _ in entries]
+        values = cache.get_many([name for pair in keys for name in pair])
+        wait = 0
+        for (prev_key, curr_key), (_, limit, window, cost) in zip(keys, entries):
+            prev, curr = values.get(prev_key, 0), values.get(curr_key, 0)
+            if _estimate(prev, curr, window, now) + cost > limit:
+                wait = max(wait, _retry_after(prev, curr, limit, window, cost, now))
+        if charge and not wait:
+            # 检查与累加之间不加锁，并发时可能略微超出额度
+            for (_, curr_key), (_, _, window, cost) in zip(keys, entries):
+                self._incr(cache, curr_key, window, cost)
+        return wait
+
+    def add(self, entries, now):
+        cache = caches[self.alias]
+        for key, _, window, cost in entries:
+            self._incr(cache, self._keys(key, window, now)[1], window, cost)
+
+    @staticmethod
+    def _incr(cache, curr_key, window, cost):
+        cache.add(curr_key, 0, timeout=window * 2)
+        try:
+            cache.incr(curr_key, cost)
+        except ValueError:
+            cache.set(curr_key, cost, timeout=window * 2)
+
+    def clear(self):
+        caches[self.alias].clear()
+
+
+class RateLimiter:
+    def __init__(self, backend, scopes, costs, enabled=True):
+        self.backend = backend
+        self.scopes = scopes
+        self.costs = costs
+        self.enabled = enabled
+
+    def _entries(self, endpoint, identities):
+        cost = self.costs.get(endpoint, 1)
+        entries = []
+        for scope, identity in identities.items():
+            if identity in (None, "") or scope not in self.scopes:
+                continue
+            limit, window = self.scopes[scope]
+            entries.append((f"{scope}:{str(identity).lower()}", limit, window, cost))
+        return entries
+
+    def check(self, endpoint, **identities):
+        """
+        按 identities（如 ip=..., email=...）检查各个维度，全部放行时才一起扣减
+
+        放行返回 0，否则返回客户端需要等待的秒数（取各维度最大值），此时不消耗任何额度。
+        """
+        if not self.enabled:
+            return 0
+        entries = self._entries(endpoint, identities)
+        return self.backend.hit(entries, time.time()) if entries else 0
+
+    def peek(self, endpoint, **identities):
+        """只检查不扣减，用于按结果计费的接口（如登录只对失败计数）"""
+        if not self.enabled:
+            return 0
+        entries = self._entries(endpoint, identities)
+        return self.backend.hit(entries, time.time(), charge=False) if entries else 0
+
+    def charge(self, endpoint, **identities):
+        """不检查额度直接扣减，与 peek 配合使用"""
+        if not self.enabled:
+            return
+        entries = self._entries(endpoint, identities)
+        if entries:
+            self.backend.add(entries, time.time())
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _build_backend():
+    alias = getattr(settings, "RATE_LIMIT_CACHE_ALIAS", "")
+    if alias:
+        return CacheBackend(alias)
+    return LocalBackend(max_keys=getattr(settings, "RATE_LIMIT_MAX_KEYS", 100000))
+
+
+rate_limiter = RateLimiter(
+    backend=_build_backend(),
+    scopes=getattr(settings, "RATE_LIMIT_SCOPES", {}),
+    costs=getattr(settings, "RATE_LIMIT_COSTS", {}),
+    enabled=getattr(settings, "RATE_LIMIT_ENABLED", True),
+)
@@ -0,0 +1,135 @@
+"""
+“换一批”加权随机抽样的候选池
+
+进程内保存最新发布的一批已发布卡片（默认 5000 张），按 match_scoring 的奖励率、截止紧迫度、
+剩余名额计算权重，并构建 Vose 别名表：每次抽一个样本只需 O(1)，一批 O(batch)，不需要 ORDER BY RAND()。
+每隔 refresh_interval 秒按 TaskCard.updated_at 增量合并变更并重建别名表，
+每隔 reload_interval 秒全量重新加载一次（淘汰过旧的卡片）。
+"""
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from core.managers.task_card_manager import TaskCardManager
+from core.services.match_scoring import Candidates, match_scorer
+
+# 每张卡片的最低权重，避免低分任务永远抽不到
+MIN_WEIGHT = 0.02
+# 增量查询向前多取一段，覆盖提交较晚、updated_at 较早的事务
+SINCE_OVERLAP = timedelta(seconds=2)
+
+
+def build_alias_table(weights):
+    """Vose 别名法：返回 (prob, alias)，抽样时取 i 的概率为 prob[i]，否则取 alias[i]"""
+    n = len(weights)
+    prob = np.zeros(n)
+    alias = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return prob, alias
+    scaled = np.asarray(weights, dtype=np.float64) * n / np.sum(weights)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+        (small if scaled[more] < 1.0 else large).append(more)
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class SamplingPool:
+    def __init__(self, limit=5000, refresh_interval=5, reload_interval=600, load_rows=TaskCardManager.pool_rows):
+        self.limit = limit
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        self.load_rows = load_rows
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._since = None
+        self._loaded_at = None
+        self._refreshed_at = None
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._prob = np.zeros(0)
+        self._alias = np.zeros(0, dtype=np.int64)
+
+    def _merge(self, rows):
+        for row in rows:
+            survey_id, status, updated_at = row[0], row[6], row[7]
+            if status == "published":
+                self._rows[survey_id] = row[:6]
+            else:
+                self._rows.pop(survey_id, None)
+            if self._since is None or updated_at > self._since:
+                self._since = updated_at
+
+    def _rebuild(self):
+        rows = list(self._rows.values())
+        candidates = Candidates.from_rows(rows, ())
+        scores, _ = match_scorer.score((), candidates, timezone.now())
+        self._prob, self._alias = build_alias_table(np.maximum(scores, MIN_WEIGHT))
+        self._ids = candidates.ids
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if force or self._loaded_at is None or now - self._loaded_at >= self.reload_interval:
+                self._rows = {}
+                self._since = None
+                self._merge(self.load_rows(limit=self.limit))
+                self._loaded_at = now
+            elif now - self._refreshed_at >= self.refresh_interval:
+                if self._since is None:
+                    # 上次加载时没有任何卡片，没有增量起点
+                    self._merge(self.load_rows(limit=self.limit))
+                else:
+                    self._merge(self.load_rows(since=self._since - SINCE_OVERLAP))
+            else:
+                return
+            self._refreshed_at = now
+            self._rebuild()
+
+    def sample(self, count, seen=(), rng=None):
+        """
+        按权重不放回地抽取最多 count 个不在 seen 中的 survey_id
+
+        每轮按别名表一次抽 count 的数倍，重复或已看过的丢弃，最多 4 轮，代价为 O(count)。
+        rng 为 numpy Generator，传入固定种子的 Generator 可复现结果。
+        """
+        self.refresh()
+        with self._lock:
+            ids, prob, alias = self._ids, self._prob, self._alias
+        if count <= 0 or len(ids) == 0:
+            return []
+        rng = rng if rng is not None else np.random.default_rng()
+        picked = []
+        chosen = set()
+        for _ in range(4):
+            draws = max(count * 4, 16)
+            slots = rng.integers(len(ids), size=draws)
+            rows = np.where(rng.random(draws) < prob[slots], slots, alias[slots])
+            for survey_id in ids[rows].tolist():
+                if survey_id in chosen or survey_id in seen:
+                    continue
+                chosen.add(survey_id)
+                picked.append(survey_id)
+                if len(picked) == count:
+                    return picked
+        return picked
+
+    def __len__(self):
+        return len(self._ids)
+
+
+sampling_pool = SamplingPool(
+    limit=getattr(settings, "TASK_HALL_SAMPLING_POOL_SIZE", 5000),
+    refresh_interval=getattr(settings, "TASK_HALL_SAMPLING_REFRESH", 5),
+    reload_interval=getattr(settings, "TASK_HALL_SAMPLING_RELOAD", 600),
+)
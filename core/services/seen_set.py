@@ -0,0 +1,97 @@
+"""
+任务大厅“换一批”的已展示集合（按用户 + 会话）
+
+每个会话一个定长布隆过滤器（默认 8192 位 = 1 KiB）加一个扫描游标，存放在 CACHES 别名
+（settings.TASK_HALL_SEEN_ALIAS）里，每次访问顺延 TTL。客户端不必再回传全部已展示 id，
+请求体和查询代价都与会话长短无关。布隆过滤器的误判只会让个别未展示的任务被跳过，
+全部任务都看过一轮后集合会清空重来。
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class BloomFilter:
+    def __init__(self, bits=8192, hashes=4, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray(data) if data is not None else bytearray((bits + 7) // 8)
+
+    def _positions(self, item):
+        # 双重哈希：h1 + i * h2
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.data[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.data[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class SeenState:
+    def __init__(self, bloom, cursor="", count=0):
+        self.bloom = bloom
+        self.cursor = cursor
+        self.count = count
+
+    def add(self, item):
+        self.bloom.add(item)
+        self.count += 1
+
+    def __contains__(self, item):
+        return item in self.bloom
+
+
+class SeenSets:
+    KEY_PREFIX = "task_hall_seen:"
+
+    def __init__(self, bits=8192, hashes=4, ttl=1800, alias="default"):
+        self.bits = bits
+        self.hashes = hashes
+        self.ttl = ttl
+        self.alias = alias
+
+    @property
+    def capacity(self):
+        # 超过约 bits/8 个元素后误判率明显上升（k=4 时约 2.4%），此时开始新一轮
+        return self.bits // 8
+
+    def _key(self, user_id, session):
+        session_hash = hashlib.sha256(session.encode("utf-8")).hexdigest()[:16]
+        return f"{self.KEY_PREFIX}{user_id}:{session_hash}"
+
+    def new(self):
+        return SeenState(BloomFilter(self.bits, self.hashes))
+
+    def load(self, user_id, session):
+        value = caches[self.alias].get(self._key(user_id, session))
+        if value is None:
+            return self.new()
+        data, cursor, count = value
+        if len(data) != (self.bits + 7) // 8 or count >= self.capacity:
+            # 位数配置变了或集合已满，旧集合作废
+            return self.new()
+        return SeenState(BloomFilter(self.bits, self.hashes, data), cursor, count)
+
+    def save(self, user_id, session, state):
+        caches[self.alias].set(
+            self._key(user_id, session),
+            (bytes(state.bloom.data), state.cursor, state.count),
+            self.ttl,
+        )
+
+    def clear(self, user_id, session):
+        caches[self.alias].delete(self._key(user_id, session))
+
+
+seen_sets = SeenSets(
+    bits=getattr(settings, "TASK_HALL_SEEN_BITS", 8192),
+    hashes=getattr(settings, "TASK_HALL_SEEN_HASHES", 4),
+    ttl=getattr(settings, "TASK_HALL_SEEN_TTL", 1800),
+    alias=getattr(settings, "TASK_HALL_SEEN_ALIAS", "default"),
+)
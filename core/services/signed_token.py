@@ -0,0 +1,110 @@
+"""
+无状态签名 access token
+
+格式：s1.<user_id>.<expires_ts>.<generation>.<signature>
+generation 是签发时写入的 AuthToken 记录 id（会话代号），AuthToken 表只作为吊销/审计记录，
+校验时只做 HMAC 比对 + 进程内吊销集合查询，不访问数据库。
+"""
+import base64
+import hashlib
+import hmac
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+TOKEN_PREFIX = "s1."
+_KEY_SALT = "core.services.signed_token"
+_signing_key = None
+
+
+def _key():
+    global _signing_key
+    if _signing_key is None:
+        _signing_key = hashlib.sha256((_KEY_SALT + settings.SECRET_KEY).encode("utf-8")).digest()
+    return _signing_key
+
+
+def _signature(payload):
+    digest = hmac.new(_key(), payload.encode("ascii"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def is_signed_token(token):
+    return token.startswith(TOKEN_PREFIX)
+
+
+def sign_token(user_id, expires_at, generation):
+    payload = f"{TOKEN_PREFIX}{user_id}.{int(expires_at.timestamp())}.{generation}"
+    return f"{payload}.{_signature(payload)}"
+
+
+def verify_token(token, now=None):
+    """校验签名与过期时间，成功返回 (user_id, expires_ts, generation)，否则 None"""
+    payload, _, signature = token.rpartition(".")
+    if not payload.startswith(TOKEN_PREFIX):
+        return None
+    if not hmac.compare_digest(signature, _signature(payload)):
+        return None
+    try:
+        user_id, expires_ts, generation = (int(part) for part in payload[len(TOKEN_PREFIX):].split("."))
+    except ValueError:
+        return None
+    if expires_ts <= (now if now is not None else time.time()):
+        return None
+    return user_id, expires_ts, generation
+
+
+class RevocationSet:
+    """
+    已吊销会话代号的进程内集合
+
+    只需要保存“已吊销且未过期”的记录，过期 token 本身就会被拒绝，所以集合很小。
+    本进程吊销的代号立即生效，其他进程吊销的代号在下一次定期刷新（refresh_interval 秒）后生效。
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._generations = frozenset()
+        self._local = {}
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, generation):
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        return generation in self._generations or generation in self._local
+
+    def add(self, generations):
+        added_at = time.monotonic()
+        with self._lock:
+            for generation in generations:
+                self._local[generation] = added_at
+
+    def refresh(self):
+        from core.models import AuthToken
+
+        started_at = time.monotonic()
+        with self._lock:
+            if started_at < self._next_refresh:
+                return
+            self._next_refresh = started_at + self.refresh_interval
+        generations = frozenset(
+            AuthToken.objects.filter(
+                revoked_at__isnull=False, expires_at__gt=timezone.now()
+            ).values_list("id", flat=True)
+        )
+        with self._lock:
+            self._generations = generations
+            # 查询开始前加入的本地记录已经落库，由 generations 覆盖（或已过期）
+            self._local = {
+                generation: added_at
+                for generation, added_at in self._local.items()
+                if added_at >= started_at
+            }
+
+
+revocations = RevocationSet(
+    refresh_interval=getattr(settings, "AUTH_TOKEN_REVOCATION_REFRESH", 30),
+)
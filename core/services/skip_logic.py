@@ -0,0 +1,183 @@
+"""
+跳题 / 显示条件（Question.logic_json）编译
+
+logic_json 的格式（均可省略）：
+
+    {
+      "show_if": <条件>,                       # 条件不成立时该题不显示
+      "required_if": <条件>,                   # 给出时以它代替 is_required
+      "jump": [{"if": <条件>, "to": 5}, ...]   # 作答后第一条成立的规则跳到 order_no >= 5 的题，"to": "end" 结束
+    }
+
+条件：
+    {"q": 3, "op": "eq", "value": "地铁"}     # q 为题目 order_no
+    {"all": [...]} / {"any": [...]} / {"not": <条件>}
+
+op：answered / not_answered / eq / ne / in / not_in / contains / gt / gte / lt / lte。
+条件只能看到已经显示并作答的题目，没显示、没作答或被跳过的题一律视为未作答。
+
+每个问卷版本编译一次（见 core/services/questionnaire_schema.py）：条件编译成闭包，
+跳转目标换算成题目下标，作答时只需按顺序执行，不再解析 JSON。格式不合法时抛出 LogicError。
+"""
+from bisect import bisect_left
+
+END = "end"
+
+
+class LogicError(ValueError):
+    pass
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _compare(compare):
+    def build(question_id, operand):
+        bound = _number(operand)
+        if bound is None:
+            raise LogicError(f"operand of a numeric comparison must be a number: {operand!r}")
+
+        def condition(values):
+            number = _number(values.get(question_id))
+            return number is not None and compare(number, bound)
+
+        return condition
+
+    return build
+
+
+def _answered(question_id, operand):
+    return lambda values: question_id in values
+
+
+def _not_answered(question_id, operand):
+    return lambda values: question_id not in values
+
+
+def _eq(question_id, operand):
+    return lambda values: values.get(question_id) == operand
+
+
+def _ne(question_id, operand):
+    return lambda values: values.get(question_id) != operand
+
+
+def _in(question_id, operand):
+    if not isinstance(operand, list):
+        raise LogicError("operand of in / not_in must be a list")
+    # 只对单值作答有意义；选项值都是字符串，用 frozenset 做 O(1) 判断
+    members = frozenset(item for item in operand if isinstance(item, (str, int, float)))
+
+    def condition(values):
+        value = values.get(question_id)
+        return isinstance(value, (str, int, float)) and value in members
+
+    return condition
+
+
+def _not_in(question_id, operand):
+    condition = _in(question_id, operand)
+    return lambda values: question_id in values and not condition(values)
+
+
+def _contains(question_id, operand):
+    def condition(values):
+        value = values.get(question_id)
+        return isinstance(value, (list, str)) and isinstance(operand, str) and operand in value
+
+    return condition
+
+
+OPERATORS = {
+    "answered": _answered,
+    "not_answered": _not_answered,
+    "eq": _eq,
+    "ne": _ne,
+    "in": _in,
+    "not_in": _not_in,
+    "contains": _contains,
+    "gt": _compare(lambda a, b: a > b),
+    "gte": _compare(lambda a, b: a >= b),
+    "lt": _compare(lambda a, b: a < b),
+    "lte": _compare(lambda a, b: a <= b),
+}
+
+
+def compile_condition(node, ids_by_order):
+    """把条件编译成 condition(values) -> bool，values 为 {question_id: 已作答的值}"""
+    if not isinstance(node, dict):
+        raise LogicError(f"condition must be an object: {node!r}")
+    if "all" in node or "any" in node:
+        key = "all" if "all" in node else "any"
+        children = node[key]
+        if not isinstance(children, list) or not children:
+            raise LogicError(f"{key} must be a non-empty list")
+        conditions = tuple(compile_condition(child, ids_by_order) for child in children)
+        if len(conditions) == 1:
+            return conditions[0]
+        if key == "all":
+            def all_of(values):
+                for condition in conditions:
+                    if not condition(values):
+                        return False
+                return True
+
+            return all_of
+
+        def any_of(values):
+            for condition in conditions:
+                if condition(values):
+                    return True
+            return False
+
+        return any_of
+    if "not" in node:
+        inner = compile_condition(node["not"], ids_by_order)
+        return lambda values: not inner(values)
+    operator = OPERATORS.get(node.get("op"))
+    if operator is None:
+        raise LogicError(f"unknown op: {node.get('op')!r}")
+    question_id = ids_by_order.get(node.get("q"))
+    if question_id is None:
+        raise LogicError(f"unknown question order: {node.get('q')!r}")
+    return operator(question_id, node.get("value"))
+
+
+def compile_logic(logic, index, orders, ids_by_order):
+    """
+    编译第 index 题的 logic_json，返回 (show, required, jumps)
+
+    show / required 为条件函数或 None；jumps 为 ((condition, 目标下标), ...)。
+    orders 为全部题目按顺序排列的 order_no。
+    """
+    if not logic:
+        return None, None, ()
+    if not isinstance(logic, dict):
+        raise LogicError("logic_json must be an object")
+    show = compile_condition(logic["show_if"], ids_by_order) if logic.get("show_if") else None
+    required = compile_condition(logic["required_if"], ids_by_order) if logic.get("required_if") else None
+    jumps = []
+    for rule in logic.get("jump") or ():
+        if not isinstance(rule, dict) or "if" not in rule or "to" not in rule:
+            raise LogicError("jump rules need if and to")
+        target = rule["to"]
+        if target == END:
+            target_index = len(orders)
+        elif isinstance(target, int) and not isinstance(target, bool):
+            target_index = bisect_left(orders, target)
+        else:
+            raise LogicError(f"invalid jump target: {target!r}")
+        if target_index <= index:
+            raise LogicError(f"jump from order {orders[index]} must go forward")
+        jumps.append((compile_condition(rule["if"], ids_by_order), target_index))
+    return show, required, tuple(jumps)
@@ -0,0 +1,69 @@
+"""
+任务大厅 SSE 的连接票据
+
+浏览器 EventSource 不能设置请求头，长期有效的 Bearer token 放进查询参数会留在访问日志和代理日志里。
+客户端先带 Bearer token 调 POST /task-hall/stream/ticket 换一张票据，再用 ?ticket= 建立连接：
+票据只能用一次，默认 30 秒内有效，落进日志也无法再用。
+票据存放在 CACHES 别名（settings.TASK_EVENTS_TICKET_CACHE_ALIAS）里，多进程部署时必须指向共享后端。
+
+票据背后是签发它的登录会话（StreamSession）。连接建立后推送循环定期调用 is_active() 复查会话，
+token 到期或被吊销（登出、改密、重新登录）时服务端主动断开。
+"""
+import hashlib
+import secrets
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from core.models import AuthToken
+from core.services.signed_token import revocations
+
+# token_id 为 AuthToken 记录 id；signed 为签名模式，吊销状态从进程内吊销集合读取
+StreamSession = namedtuple("StreamSession", ["user_id", "token_id", "expires_at", "signed"])
+
+
+class StreamTickets:
+    KEY_PREFIX = "stream_ticket:"
+
+    def __init__(self, ttl=30, alias="default"):
+        self.ttl = ttl
+        self.alias = alias
+
+    def _key(self, ticket):
+        return self.KEY_PREFIX + hashlib.sha256(ticket.encode("utf-8")).hexdigest()
+
+    def issue(self, session):
+        ticket = secrets.token_urlsafe(24)
+        caches[self.alias].set(self._key(ticket), session, self.ttl)
+        return ticket
+
+    def redeem(self, ticket):
+        """兑换票据，返回 StreamSession；票据无效、过期或已用过时返回 None"""
+        if not ticket:
+            return None
+        cache = caches[self.alias]
+        key = self._key(ticket)
+        # 先占用再读取，并发的两次兑换只有一次成功
+        if not cache.add(key + ":used", 1, self.ttl):
+            return None
+        session = cache.get(key)
+        cache.delete(key)
+        return session
+
+
+def is_active(session):
+    """会话仍然有效：没有过期，也没有被吊销"""
+    if session.expires_at and session.expires_at <= timezone.now():
+        return False
+    if session.signed:
+        return not revocations.is_revoked(session.token_id)
+    # opaque 模式吊销即删除记录
+    return AuthToken.objects.filter(id=session.token_id, revoked_at__isnull=True).exists()
+
+
+stream_tickets = StreamTickets(
+    ttl=getattr(settings, "TASK_EVENTS_TICKET_TTL", 30),
+    alias=getattr(settings, "TASK_EVENTS_TICKET_CACHE_ALIAS", "default"),
+)
@@ -0,0 +1,155 @@
+"""
+任务大厅推送：新任务 / 任务关闭事件的发布订阅
+
+信号（core/signals.py）在事务提交后调用 publish，事件交给后端（settings.TASK_EVENTS_BACKEND）。
+默认的 InProcessBackend 直接在本进程内分发；多进程部署时换成基于共享消息通道的后端，
+后端只需实现 publish(event)，并在收到其他进程的消息后调用构造时传入的 dispatch(event)。
+
+每个 SSE 连接对应一个 Subscription（一个有界 asyncio.Queue），事件在订阅者所在的事件循环里分发，
+SSE 报文在分发前只编码一次；连接空闲时不占线程，也没有定时任务以外的开销。
+队列满（客户端消费太慢）时丢弃积压并投递 reset 事件，客户端收到后重新拉取列表。
+
+新任务只推给有资格填写的用户（不推给发布者本人）；关闭事件推给所有连接。
+"""
+import asyncio
+import itertools
+import threading
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.serialization import dumps
+
+# message 为编码好的 SSE 报文；owner_id 仅用于资格过滤，不下发
+TaskEvent = namedtuple("TaskEvent", ["id", "type", "owner_id", "message"])
+
+RESET = TaskEvent(0, "reset", None, b"event: reset\ndata: {}\n\n")
+
+
+class InProcessBackend:
+    """只在本进程内分发，publish 可以在任意线程调用"""
+
+    def __init__(self, dispatch):
+        self.dispatch = dispatch
+
+    def publish(self, event):
+        self.dispatch(event)
+
+
+class Subscription:
+    __slots__ = ("user_id", "loop", "queue")
+
+    def __init__(self, user_id, loop, queue_size):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+
+class TaskEventBus:
+    def __init__(self, backend="core.services.task_events.InProcessBackend", queue_size=64, history=256):
+        self.queue_size = queue_size
+        self._ids = itertools.count(1)
+        self._history = deque(maxlen=history)
+        # 事件循环 -> 该循环上的订阅集合；集合只在所属循环的线程里读写
+        self._loops = {}
+        self._lock = threading.Lock()
+        self.backend = import_string(backend)(self.dispatch)
+
+    @staticmethod
+    def new_task(survey):
+        """已发布问卷的新任务事件；已过截止时间的返回 None"""
+        if survey.deadline is not None and survey.deadline <= timezone.now():
+            return None
+        return {
+            "type": "task.new",
+            "owner_id": survey.owner_id,
+            "data": {
+                "id": str(survey.id),
+                "title": survey.title,
+                "reward": survey.reward_points,
+                "estimated": survey.estimated_minutes or 0,
+                "deadline": survey.deadline,
+            },
+        }
+
+    @staticmethod
+    def closed_tasks(survey_ids):
+        return {"type": "task.closed", "owner_id": None, "data": {"ids": [str(pk) for pk in survey_ids]}}
+
+    def publish(self, event):
+        if event is not None:
+            self.backend.publish(event)
+
+    def dispatch(self, event):
+        """给事件编号、编码，再投递到各事件循环；可以在任意线程调用"""
+        with self._lock:
+            event_id = next(self._ids)
+            message = b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, event["type"].encode(), dumps(event["data"]))
+            task_event = TaskEvent(event_id, event["type"], event["owner_id"], message)
+            self._history.append(task_event)
+            loops = list(self._loops)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._deliver, loop, task_event)
+            except RuntimeError:
+                # 事件循环已关闭
+                with self._lock:
+                    self._loops.pop(loop, None)
+
+    @staticmethod
+    def _eligible(subscription, event):
+        return event.owner_id is None or event.owner_id != subscription.user_id
+
+    def _offer(self, subscription, event):
+        if not self._eligible(subscription, event):
+            return
+        queue = subscription.queue
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESET)
+
+    def _deliver(self, loop, event):
+        for subscription in self._loops.get(loop, ()):
+            self._offer(subscription, event)
+
+    def subscribe(self, user_id, last_event_id=None):
+        """在当前事件循环上订阅；带 last_event_id 时补发之后的事件，补不全则先投递 reset"""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, loop, self.queue_size)
+        with self._lock:
+            self._loops.setdefault(loop, set()).add(subscription)
+            history = list(self._history)
+        if last_event_id is not None:
+            newest = history[-1].id if history else 0
+            # 编号比最新的还大说明进程重启过，中间的事件已无从得知
+            if last_event_id > newest or (history and history[0].id > last_event_id + 1):
+                self._offer(subscription, RESET)
+            else:
+                for event in history:
+                    if event.id > last_event_id:
+                        self._offer(subscription, event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._loops.get(subscription.loop)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._loops[subscription.loop]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._loops.values())
+
+
+task_events = TaskEventBus(
+    backend=getattr(settings, "TASK_EVENTS_BACKEND", "core.services.task_events.InProcessBackend"),
+    queue_size=getattr(settings, "TASK_EVENTS_QUEUE_SIZE", 64),
+    history=getattr(settings, "TASK_EVENTS_HISTORY", 256),
+)
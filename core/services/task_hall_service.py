@@ -1,12 +1,28 @@
+import numpy as np
+
 from core.managers.task_hall_manager import TaskHallManager
+from core.services.overview_cache import overview_cache
+from core.services.sampling_pool import sampling_pool
+from core.services.seen_set import seen_sets
+from core.services.versions import versions
 
 
 class TaskHallService:
     @staticmethod
     def get_overview(user):
+        # 通知按用户区分，不缓存
         notices = TaskHallManager.get_notices(user)
-        summary = TaskHallManager.get_summary()
-        filters = TaskHallManager.get_filters()
+        # 高匹配数因人而异，按用户缓存；问卷集合或用户画像变化时版本号变化，自动换键
+        surveys_version, user_version = versions.get("surveys", f"user:{user.id}")
+        summary = {
+            **overview_cache.get("summary", TaskHallManager.get_summary),
+            "high_match_tasks": overview_cache.get_keyed(
+                "high_match",
+                f"{user.id}:{surveys_version}:{user_version}",
+                lambda: TaskHallManager.count_high_match(user),
+            ),
+        }
+        filters = overview_cache.get("filters", TaskHallManager.get_filters)
         return {
             "user": {
                 "id": str(user.id),
@@ -20,15 +36,70 @@ class TaskHallService:
 
     @staticmethod
     def list_tasks(user, filters):
-        items, total = TaskHallManager.list_tasks(filters)
-        return {
+        if filters.get("cursor") is not None:
+            items, next_cursor = TaskHallManager.list_tasks_by_cursor(filters, user)
+            return {
+                "items": items,
+                "page_size": filters.get("page_size", 20),
+                "next_cursor": next_cursor,
+            }
+        items, total = TaskHallManager.list_tasks(filters, user)
+        payload = {
             "items": items,
             "page": filters.get("page", 1),
             "page_size": filters.get("page_size", 20),
             "total": total,
         }
+        if filters.get("sort") == "recommend":
+            # 推荐排序只对最新发布的前 N 个任务打分，超出部分翻不到
+            payload["ranked_total"] = min(total, TaskHallManager.MATCH_CANDIDATE_LIMIT)
+        return payload
 
     @staticmethod
-    def refresh_batch(user, exclude_task_ids, batch_size):
-        items = TaskHallManager.refresh_batch(exclude_task_ids, batch_size)
+    def refresh_batch(user, session, exclude_task_ids, batch_size, mode="newest", seed=None):
+        seen = seen_sets.load(user.id, session)
+        # 兼容旧客户端：回传的 id 也记入已展示集合，不再进 SQL
+        for task_id in exclude_task_ids:
+            seen.add(task_id)
+        if mode == "sample":
+            items = TaskHallService._sample_batch(user, seen, batch_size, seed)
+            cursor = seen.cursor
+        else:
+            items, cursor = TaskHallService._newest_batch(user, seen, batch_size)
+        if len(items) < batch_size:
+            # 全部任务都已展示过，下次从头开始新一轮
+            seen = seen_sets.new()
+        seen.cursor = cursor or ""
+        seen_sets.save(user.id, session, seen)
         return {"items": items}
+
+    @staticmethod
+    def _newest_batch(user, seen, batch_size):
+        started_from_top = not seen.cursor
+        items, cursor = TaskHallManager.refresh_batch(seen, seen.cursor, batch_size, user)
+        for item in items:
+            seen.add(item["id"])
+        if cursor is None and len(items) < batch_size and not started_from_top:
+            # 扫到末尾，从头再扫一轮
+            more, cursor = TaskHallManager.refresh_batch(seen, "", batch_size - len(items), user)
+            for item in more:
+                seen.add(item["id"])
+            items += more
+        return items, cursor
+
+    @staticmethod
+    def _sample_batch(user, seen, batch_size, seed):
+        # 固定 seed 时抽样结果可复现
+        rng = np.random.default_rng(seed)
+        # 候选池是全站共享的，多抽一些，留出被资格过滤掉的余量
+        survey_ids = sampling_pool.sample(batch_size * 2, seen, rng)
+        eligible = TaskHallManager.cards_by_ids(survey_ids, user)
+        eligible_ids = {item["id"] for item in eligible}
+        items = eligible[:batch_size]
+        for item in items:
+            seen.add(item["id"])
+        # 不能填写的（自己发布的、已填写的、已截止的）也记入已展示，本会话内不再抽到
+        for survey_id in survey_ids:
+            if str(survey_id) not in eligible_ids:
+                seen.add(survey_id)
+        return items
@@ -0,0 +1,149 @@
+"""
+Token 解析缓存：Bearer token -> (user_id, 过期时间)，以及 user_id -> 用户快照
+
+两级结构：进程内 LRU（带 TTL）+ 可选的共享缓存后端（settings.AUTH_TOKEN_CACHE_ALIAS，
+对应 CACHES 中的别名，如 Redis/Memcached）。键为 token 的 sha256，内存和缓存里都不保存明文 token。
+用户快照带着读库前取到的用户版本号（core/services/versions.py 的 user:<id>），
+版本号变了就视为未命中：资料、积分的写入提交后都会递增版本号，其他进程随即读到新值。
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from core.models import AppUser
+
+# 快照保存的字段，按模型定义的顺序
+USER_FIELDS = [field.attname for field in AppUser._meta.concrete_fields]
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    KEY_PREFIX = "auth_token:"
+    USER_PREFIX = "auth_user:"
+
+    def __init__(self, max_size=10000, ttl=30, alias=""):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.alias = alias
+        self._entries = OrderedDict()
+        # user_id -> (version, 字段值, cached_until)
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_size > 0
+
+    def _shared(self):
+        return caches[self.alias] if self.alias else None
+
+    def get(self, token_hash):
+        """返回 (user_id, expires_at)，未命中返回 None"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is not None:
+                user_id, expires_at, cached_until = entry
+                if cached_until > now:
+                    self._entries.move_to_end(token_hash)
+                    return user_id, expires_at
+                del self._entries[token_hash]
+
+        shared = self._shared()
+        if shared is not None:
+            value = shared.get(self.KEY_PREFIX + token_hash)
+            if value is not None:
+                user_id, expires_at = value
+                self._store_local(token_hash, user_id, expires_at)
+                return user_id, expires_at
+        return None
+
+    def set(self, token_hash, user_id, expires_at):
+        if not self.enabled:
+            return
+        self._store_local(token_hash, user_id, expires_at)
+        shared = self._shared()
+        if shared is not None:
+            shared.set(self.KEY_PREFIX + token_hash, (user_id, expires_at), self.ttl)
+
+    def _store_local(self, token_hash, user_id, expires_at):
+        cached_until = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[token_hash] = (user_id, expires_at, cached_until)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_user(self, user_id, version):
+        """返回版本号为 version 的用户快照（未保存到库的 AppUser 实例），未命中返回 None"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        values = None
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                if entry[0] == version and entry[2] > now:
+                    self._users.move_to_end(user_id)
+                    values = entry[1]
+                else:
+                    del self._users[user_id]
+        if values is None:
+            shared = self._shared()
+            value = shared.get(f"{self.USER_PREFIX}{user_id}") if shared is not None else None
+            if value is None or value[0] != version:
+                return None
+            values = value[1]
+            self._store_user_local(user_id, version, values)
+        return AppUser.from_db(DEFAULT_DB_ALIAS, USER_FIELDS, values)
+
+    def set_user(self, user, version):
+        """version 须在读库之前取得：读库期间有写入时快照带着旧版本号，下次读取即失效"""
+        if not self.enabled:
+            return
+        values = tuple(getattr(user, name) for name in USER_FIELDS)
+        self._store_user_local(user.id, version, values)
+        shared = self._shared()
+        if shared is not None:
+            shared.set(f"{self.USER_PREFIX}{user.id}", (version, values), self.ttl)
+
+    def _store_user_local(self, user_id, version, values):
+        cached_until = time.monotonic() + self.ttl
+        with self._lock:
+            self._users[user_id] = (version, values, cached_until)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, token_hashes):
+        token_hashes = list(token_hashes)
+        if not token_hashes:
+            return
+        with self._lock:
+            for token_hash in token_hashes:
+                self._entries.pop(token_hash, None)
+        shared = self._shared()
+        if shared is not None:
+            shared.delete_many([self.KEY_PREFIX + token_hash for token_hash in token_hashes])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._users.clear()
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, "AUTH_TOKEN_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "AUTH_TOKEN_CACHE_TTL", 30),
+    alias=getattr(settings, "AUTH_TOKEN_CACHE_ALIAS", ""),
+)
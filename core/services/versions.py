@@ -0,0 +1,52 @@
+"""
+读接口的版本号（用于生成 ETag）
+
+- surveys：全站问卷集合版本，问卷 / 填写 / 问卷标签 / 标签有写入、发布者改昵称时递增
+- survey:<id>：单个问卷版本
+- user:<id>：用户版本，资料、画像标签、通知、填写记录变化时递增
+
+版本号存放在 CACHES 别名（settings.VERSION_CACHE_ALIAS）里，用 incr 原子递增。
+键被淘汰后以新的随机起点重建，几乎不可能回到之前出现过的值，客户端手里的旧 ETag 只会失配，不会误命中。
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class VersionCounters:
+    KEY_PREFIX = "version:"
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    @staticmethod
+    def _fresh():
+        return secrets.randbits(48)
+
+    def get(self, *names):
+        """返回各版本号组成的列表，不存在的就地初始化"""
+        cache = caches[self.alias]
+        keys = [self.KEY_PREFIX + name for name in names]
+        found = cache.get_many(keys)
+        values = []
+        for key in keys:
+            value = found.get(key)
+            if value is None:
+                cache.add(key, self._fresh(), None)
+                value = cache.get(key)
+            values.append(value)
+        return values
+
+    def bump(self, *names):
+        cache = caches[self.alias]
+        for name in names:
+            key = self.KEY_PREFIX + name
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, self._fresh(), None)
+                cache.incr(key)
+
+
+versions = VersionCounters(alias=getattr(settings, "VERSION_CACHE_ALIAS", "default"))
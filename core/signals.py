@@ -0,0 +1,169 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.managers.survey_counter_manager import SurveyCounterManager
+from core.managers.task_card_manager import TaskCardManager
+from core.models import (
+    AppUser,
+    Notification,
+    Question,
+    Questionnaire,
+    QuestionOption,
+    Response,
+    Survey,
+    SurveyTag,
+    Tag,
+    UserTag,
+)
+from core.services.overview_cache import overview_cache
+from core.services.questionnaire_schema import schema_cache
+from core.services.task_events import task_events
+from core.services.versions import versions
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(set(update_fields) & fields)
+
+
+@receiver(post_save, sender=AppUser)
+def sync_task_card_sender(sender, instance, created, update_fields=None, **kwargs):
+    if created or not _touches(update_fields, {"nickname"}):
+        return
+    # 卡片上显示发布者昵称，任务列表的 ETag 取决于 surveys 版本号
+    if TaskCardManager.sync_sender(instance.id, instance.nickname):
+        _bump_after_commit("surveys")
+
+
+@receiver(post_save, sender=Survey)
+def sync_task_card(sender, instance, update_fields=None, **kwargs):
+    # 只改了 active_questionnaire 等与卡片无关的字段时不必重建
+    if not _touches(update_fields, TaskCardManager.SURVEY_FIELDS):
+        return
+    TaskCardManager.sync([instance.id])
+
+
+@receiver(post_save, sender=Response)
+def count_task_card_fill(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        if instance.submitted_at is not None:
+            TaskCardManager.add_filled(instance.survey_id)
+        return
+    # 草稿转为提交等情况无法得知旧值，直接按源表重新计数
+    if _touches(update_fields, {"submitted_at"}):
+        TaskCardManager.sync_filled(instance.survey_id)
+
+
+@receiver(post_delete, sender=Response)
+def uncount_task_card_fill(sender, instance, **kwargs):
+    if instance.submitted_at is not None:
+        TaskCardManager.add_filled(instance.survey_id, -1)
+        SurveyCounterManager.remove_completed(instance.survey_id)
+
+
+@receiver(post_save, sender=SurveyTag)
+@receiver(post_delete, sender=SurveyTag)
+def sync_task_card_type(sender, instance, **kwargs):
+    TaskCardManager.sync_primary_type(instance.survey_id)
+
+
+@receiver(post_save, sender=Survey)
+def invalidate_overview_summary(sender, instance, created, update_fields=None, **kwargs):
+    # 发布（创建）和关闭（改 status）会改变大厅统计
+    if created or _touches(update_fields, {"status"}):
+        transaction.on_commit(lambda: overview_cache.invalidate("summary"))
+
+
+@receiver(post_delete, sender=Survey)
+def invalidate_overview_summary_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: overview_cache.invalidate("summary"))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_overview_filters(sender, instance, created=False, **kwargs):
+    if instance.type == Tag.TYPE_SURVEY:
+        transaction.on_commit(lambda: overview_cache.invalidate("filters"))
+
+
+# 已发布版本按不可变缓存（core/services/questionnaire_schema.py），原地修改时清掉本进程的编译结果
+@receiver(post_save, sender=Questionnaire)
+@receiver(post_delete, sender=Questionnaire)
+def evict_questionnaire_schema(sender, instance, **kwargs):
+    transaction.on_commit(lambda: schema_cache.evict(instance.id))
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def evict_question_schema(sender, instance, **kwargs):
+    transaction.on_commit(lambda: schema_cache.evict(instance.questionnaire_id))
+
+
+@receiver(post_save, sender=QuestionOption)
+@receiver(post_delete, sender=QuestionOption)
+def evict_option_schema(sender, instance, **kwargs):
+    # 提交后题目可能已被级联删除，先取出问卷 id
+    questionnaire_id = instance.question.questionnaire_id
+    transaction.on_commit(lambda: schema_cache.evict(questionnaire_id))
+
+
+def _publish_after_commit(event):
+    transaction.on_commit(lambda: task_events.publish(event))
+
+
+# 任务大厅推送（core/services/task_events.py）
+@receiver(post_save, sender=Survey)
+def push_task_event(sender, instance, created, update_fields=None, **kwargs):
+    # 整体 save() 不知道 status 是否变化，只有创建和显式更新 status 时推送
+    if not created and (update_fields is None or "status" not in update_fields):
+        return
+    if instance.status == "published":
+        _publish_after_commit(task_events.new_task(instance))
+    elif not created:
+        _publish_after_commit(task_events.closed_tasks([instance.id]))
+
+
+@receiver(post_delete, sender=Survey)
+def push_task_closed_on_delete(sender, instance, **kwargs):
+    _publish_after_commit(task_events.closed_tasks([instance.id]))
+
+
+def _bump_after_commit(*names):
+    transaction.on_commit(lambda: versions.bump(*names))
+
+
+# 以下版本号用于读接口的 ETag（core/conditional.py）
+@receiver(post_save, sender=Survey)
+@receiver(post_delete, sender=Survey)
+def bump_survey_version(sender, instance, **kwargs):
+    _bump_after_commit("surveys", f"survey:{instance.id}")
+
+
+@receiver(post_save, sender=Response)
+@receiver(post_delete, sender=Response)
+def bump_fill_version(sender, instance, **kwargs):
+    # 填写数会显示在卡片和问卷详情上，填写记录也决定填写者能看到哪些任务
+    _bump_after_commit("surveys", f"survey:{instance.survey_id}", f"user:{instance.user_id}")
+
+
+@receiver(post_save, sender=SurveyTag)
+@receiver(post_delete, sender=SurveyTag)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_survey_set_version(sender, instance, **kwargs):
+    _bump_after_commit("surveys")
+
+
+@receiver(post_save, sender=AppUser)
+@receiver(post_delete, sender=AppUser)
+def bump_user_version(sender, instance, **kwargs):
+    # 也是 token 缓存里用户快照（core/services/token_cache.py）的失效信号
+    _bump_after_commit(f"user:{instance.id}")
+
+
+@receiver(post_save, sender=UserTag)
+@receiver(post_delete, sender=UserTag)
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def bump_user_related_version(sender, instance, **kwargs):
+    _bump_after_commit(f"user:{instance.user_id}")
@@ -0,0 +1,1231 @@
+import base64
+import gzip
+import json
+import random
+import threading
+import unittest
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Q
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.benchmarks.fill_submission import _build_survey
+from core.benchmarks.skip_logic import _random_answers, _random_questions, _schema, reference_route
+from core.benchmarks.task_hall_sorts import _page_queryset, _plan_problems
+from core import serialization
+from core.controllers import task_hall_controller
+from core.managers.maintenance_manager import MaintenanceManager
+from core.managers.survey_counter_manager import SurveyCounterManager
+from core.managers.task_card_manager import TaskCardManager
+from core.managers.task_hall_manager import TaskHallManager
+from core.models import (
+    Answer,
+    AppUser,
+    AuthCredential,
+    AuthToken,
+    PasswordResetCode,
+    PointsLog,
+    Question,
+    QuestionOption,
+    Questionnaire,
+    Response,
+    Survey,
+    SurveyTag,
+    TaskCard,
+    Tag,
+    UserTag,
+)
+from core.pagination import decode_cursor, encode_cursor
+from core.services.deadline_scheduler import DeadlineScheduler, process_local_settings
+from core.services.fill_drafts import DraftStore
+from core.services.fill_submission import AlreadyFilled, submit_response
+from core.services.idempotency import idempotency
+from core.services.overview_cache import OverviewCache, overview_cache
+from core.services.password_hasher import HasherBusy, PasswordHashPool, password_hasher
+from core.services.questionnaire_schema import AnswerError, schema_cache
+from core.services.rate_limiter import CacheBackend, LocalBackend, RateLimiter, rate_limiter
+from core.services.sampling_pool import SamplingPool, build_alias_table, sampling_pool
+from core.services.seen_set import seen_sets
+from core.services.signed_token import RevocationSet, sign_token, verify_token
+from core.services.stream_tickets import stream_tickets
+from core.services.task_hall_service import TaskHallService
+from core.services.token_cache import token_cache
+from core.services.versions import versions
+from core.views import error, get_current_user, issue_token, revoke_tokens, submit_fill
+
+
+def _auth(token):
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = AppUser.objects.create(email="cache@example.com", nickname="cache", points=20)
+        self.token, _ = issue_token(self.user)
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_cache_hit_skips_database(self):
+        request = RequestFactory().get("/", **_auth(self.token))
+        self.assertEqual(get_current_user(request).points, 20)
+        with self.assertNumQueries(0):
+            user = get_current_user(request)
+        self.assertEqual((user.id, user.points), (self.user.id, 20))
+
+    def test_user_version_bump_refreshes_snapshot(self):
+        request = RequestFactory().get("/", **_auth(self.token))
+        get_current_user(request)
+        # 其他进程改了积分并在提交后递增版本号：下一次命中要读到最新值
+        AppUser.objects.filter(id=self.user.id).update(points=7)
+        versions.bump(f"user:{self.user.id}")
+        with self.assertNumQueries(1):
+            self.assertEqual(get_current_user(request).points, 7)
+
+    def test_saving_user_invalidates_snapshot(self):
+        request = RequestFactory().get("/", **_auth(self.token))
+        get_current_user(request)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.nickname = "renamed"
+            self.user.save(update_fields=["nickname"])
+        self.assertEqual(get_current_user(request).nickname, "renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertIsNone(get_current_user(request))
+
+    def test_publish_deducts_from_current_balance(self):
+        self.client.get("/api/v1/users/me", **_auth(self.token))
+        AppUser.objects.filter(id=self.user.id).update(points=5)
+        payload = json.dumps({"title": "t", "reward_points": 10})
+        response = self.client.post("/api/v1/surveys", payload, content_type="application/json", **_auth(self.token))
+        self.assertEqual(response.status_code, 422)
+
+        # 缓存命中期间另一个进程发放了积分，扣减不能覆盖它
+        AppUser.objects.filter(id=self.user.id).update(points=30)
+        response = self.client.post("/api/v1/surveys", payload, content_type="application/json", **_auth(self.token))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AppUser.objects.get(id=self.user.id).points, 20)
+        self.assertEqual(PointsLog.objects.filter(user=self.user, points_type="publish_cost").count(), 1)
+
+
+class SignedTokenTests(TestCase):
+    def test_signature_and_expiry_are_checked(self):
+        expires_at = timezone.now() + timedelta(hours=1)
+        token = sign_token(5, expires_at, 9)
+        self.assertEqual(verify_token(token), (5, int(expires_at.timestamp()), 9))
+        # 改动任何一段都会让签名失配
+        self.assertIsNone(verify_token(token.replace("s1.5.", "s1.6.", 1)))
+        self.assertIsNone(verify_token(token[:-1] + ("A" if token[-1] != "A" else "B")))
+        self.assertIsNone(verify_token(token, now=expires_at.timestamp()))
+
+    @override_settings(AUTH_TOKEN_MODE="signed")
+    def test_revoked_session_is_rejected(self):
+        user = AppUser.objects.create(email="signed@example.com", nickname="signed")
+        token, _ = issue_token(user)
+        request = RequestFactory().get("/", **_auth(token))
+        self.assertEqual(get_current_user(request), user)
+        # 重新登录吊销旧会话，本进程立即生效
+        issue_token(user)
+        self.assertIsNone(get_current_user(request))
+
+    def test_refresh_loads_revocations_from_other_processes(self):
+        user = AppUser.objects.create(email="revoked@example.com", nickname="revoked")
+        expires_at = timezone.now() + timedelta(hours=1)
+        revoked = AuthToken.objects.create(
+            user=user, token="revoked", expires_at=expires_at, revoked_at=timezone.now()
+        )
+        active = AuthToken.objects.create(user=user, token="active", expires_at=expires_at)
+        expired = AuthToken.objects.create(
+            user=user, token="expired", expires_at=timezone.now() - timedelta(seconds=1), revoked_at=timezone.now()
+        )
+        revocation_set = RevocationSet(refresh_interval=60)
+        self.assertTrue(revocation_set.is_revoked(revoked.id))
+        self.assertFalse(revocation_set.is_revoked(active.id))
+        # 已过期的吊销记录不必保留，过期 token 本身就会被拒绝
+        self.assertFalse(revocation_set.is_revoked(expired.id))
+        # 刷新间隔内不再查库
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation_set.is_revoked(active.id))
+
+
+class PasswordHashPoolTests(TestCase):
+    def test_full_queue_raises_busy(self):
+        pool = PasswordHashPool(workers=1, max_pending=1, timeout=5)
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        worker = threading.Thread(target=pool._run, args=(slow,))
+        worker.start()
+        try:
+            started.wait(5)
+            with self.assertRaises(HasherBusy):
+                pool.make_password("secret")
+        finally:
+            release.set()
+            worker.join()
+        # 名额在任务结束后归还
+        self.assertTrue(pool.check_password("secret", pool.make_password("secret"))[0])
+
+    def test_changed_iterations_rehash_on_check(self):
+        pool = PasswordHashPool(workers=1)
+        with override_settings(PASSWORD_HASH_ITERATIONS=2):
+            encoded = pool.make_password("secret")
+            self.assertEqual(pool.check_password("secret", encoded), (True, None))
+            self.assertEqual(pool.check_password("wrong", encoded), (False, None))
+        with override_settings(PASSWORD_HASH_ITERATIONS=3):
+            is_correct, new_hash = pool.check_password("secret", encoded)
+        self.assertTrue(is_correct)
+        self.assertTrue(new_hash.startswith("pbkdf2_sha256$3$"))
+
+    def test_busy_pool_returns_503(self):
+        payload = json.dumps({"email": "busy@example.com", "password": "secret", "nickname": "busy"})
+        with mock.patch.object(password_hasher, "make_password", side_effect=HasherBusy):
+            response = self.client.post("/api/v1/auth/register", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 503)
+
+
+class RateLimiterTests(TestCase):
+    def test_blocked_request_charges_no_scope(self):
+        for backend in (LocalBackend(), CacheBackend("default")):
+            with self.subTest(backend=type(backend).__name__):
+                backend.clear()
+                limiter = RateLimiter(backend, {"ip": (10, 60), "email": (5, 60)}, {"login": 5})
+                self.assertEqual(limiter.check("login", ip="a", email="x@example.com"), 0)
+                # 邮箱维度已满，IP b 不应被扣减
+                self.assertGreater(limiter.check("login", ip="b", email="x@example.com"), 0)
+                self.assertEqual(limiter.check("login", ip="b", email="y@example.com"), 0)
+                self.assertEqual(limiter.check("login", ip="b", email="z@example.com"), 0)
+                self.assertGreater(limiter.check("login", ip="b"), 0)
+                backend.clear()
+
+    def test_peek_does_not_charge(self):
+        limiter = RateLimiter(LocalBackend(), {"email": (5, 60)}, {"login_failure": 5})
+        for _ in range(3):
+            self.assertEqual(limiter.peek("login_failure", email="x@example.com"), 0)
+        limiter.charge("login_failure", email="x@example.com")
+        self.assertGreater(limiter.peek("login_failure", email="x@example.com"), 0)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1)
+class LoginRateLimitTests(TestCase):
+    def setUp(self):
+        rate_limiter.backend.clear()
+        self.user = AppUser.objects.create(email="login@example.com", nickname="login")
+        AuthCredential.objects.create(user=self.user, password_hash=make_password("secret1"))
+
+    def tearDown(self):
+        rate_limiter.backend.clear()
+
+    def _login(self, password, ip):
+        payload = json.dumps({"email": "login@example.com", "password": password})
+        return self.client.post("/api/v1/auth/login", payload, content_type="application/json", REMOTE_ADDR=ip)
+
+    def test_successful_logins_do_not_lock_the_email(self):
+        email_limit, _ = rate_limiter.scopes["email"]
+        for i in range(email_limit // rate_limiter.costs["login_failure"] + 2):
+            self.assertEqual(self._login("secret1", f"10.0.0.{i}").status_code, 200)
+
+    def test_failed_logins_lock_the_email(self):
+        email_limit, _ = rate_limiter.scopes["email"]
+        failures = email_limit // rate_limiter.costs["login_failure"]
+        for i in range(failures):
+            self.assertEqual(self._login("wrong", f"10.0.1.{i}").status_code, 401)
+        response = self._login("secret1", "10.0.2.1")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+
+class PurgeAuthRecordsTests(TestCase):
+    def setUp(self):
+        user = AppUser.objects.create(email="purge@example.com", nickname="purge")
+        now = timezone.now()
+        past, future = now - timedelta(hours=1), now + timedelta(hours=1)
+        # 主键稀疏：过期记录散落在很大的 id 范围里
+        for i, expires_at in enumerate([past, future, past, past, future, past, past]):
+            AuthToken.objects.create(id=1 + i * 100_000, user=user, token=f"t{i}", expires_at=expires_at)
+        PasswordResetCode.objects.create(email="purge@example.com", code="111111", expires_at=past)
+        PasswordResetCode.objects.create(email="purge@example.com", code="222222", expires_at=future, is_used=True)
+        PasswordResetCode.objects.create(email="purge@example.com", code="333333", expires_at=future)
+
+    def test_dry_run_counts_without_deleting(self):
+        summaries = MaintenanceManager.purge_auth_records(batch_size=2, sleep_seconds=0, dry_run=True)
+        self.assertEqual([(s["rows"], s["batches"]) for s in summaries], [(5, 3), (2, 1)])
+        self.assertEqual(AuthToken.objects.count(), 7)
+        self.assertEqual(PasswordResetCode.objects.count(), 3)
+
+    def test_batches_follow_matching_rows_not_id_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            summary = MaintenanceManager.purge_in_batches(
+                AuthToken, Q(expires_at__lte=timezone.now()), batch_size=2, sleep_seconds=0
+            )
+        self.assertEqual((summary["rows"], summary["batches"]), (5, 3))
+        self.assertEqual(set(AuthToken.objects.values_list("token", flat=True)), {"t1", "t4"})
+        # 每批一条取主键、一条删除，与主键跨度无关
+        self.assertEqual(len(queries), 6)
+
+    def test_purge_removes_used_and_expired_reset_codes(self):
+        MaintenanceManager.purge_auth_records(batch_size=2, sleep_seconds=0)
+        self.assertEqual(list(PasswordResetCode.objects.values_list("code", flat=True)), ["333333"])
+
+
+class TaskCardQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="cards@example.com", nickname="cards")
+        surveys = Survey.objects.bulk_create(
+            [Survey(owner=owner, title=f"survey {i}", status="published") for i in range(60)]
+        )
+        cls.tags = Tag.objects.bulk_create([Tag(name=f"类型{i}", type=Tag.TYPE_SURVEY) for i in range(5)])
+        SurveyTag.objects.bulk_create(
+            [SurveyTag(survey=survey, tag=cls.tags[i % len(cls.tags)]) for i, survey in enumerate(surveys)]
+        )
+        # bulk_create 不触发信号，手动生成卡片
+        TaskCardManager.sync([survey.id for survey in surveys])
+        cls.types = {survey.id: cls.tags[i % len(cls.tags)].name for i, survey in enumerate(surveys)}
+        cls.user = AppUser.objects.create(email="cards-filler@example.com", nickname="filler")
+        UserTag.objects.bulk_create([UserTag(user=cls.user, tag=tag) for tag in cls.tags[:2]])
+
+    def test_query_count_is_constant_across_page_sizes(self):
+        for user in (None, self.user):
+            with self.subTest(user=user and user.id):
+                with CaptureQueriesContext(connection) as queries:
+                    TaskHallManager.list_tasks({"page": 1, "page_size": 1}, user)
+                for page_size in (10, 20, 50):
+                    with self.assertNumQueries(len(queries)):
+                        items, total = TaskHallManager.list_tasks({"page": 1, "page_size": page_size}, user)
+                    self.assertEqual(len(items), page_size)
+                    self.assertEqual(total, 60)
+
+    def test_cards_carry_their_survey_type(self):
+        items, _ = TaskHallManager.list_tasks({"page": 1, "page_size": 50})
+        for item in items:
+            self.assertEqual(item["type"], self.types[int(item["id"])])
+
+
+def _cursor(values):
+    raw = json.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+class CursorTests(TestCase):
+    CRAFTED = [
+        ["2024-01-01T00:00:00+00:00", [1]],
+        ["2024-01-01T00:00:00+00:00", {"a": 1}],
+        ["2024-01-01T00:00:00+00:00", "abc"],
+        ["2024-01-01T00:00:00+00:00", None],
+        ["2024-01-01T00:00:00", 1],
+        [20240101, 1],
+        [["2024-01-01T00:00:00+00:00"], 1],
+        ["2024-01-01T00:00:00+00:00"],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = AppUser.objects.create(email="cursor@example.com", nickname="cursor")
+        cls.token, _ = issue_token(cls.user)
+        Survey.objects.create(owner=cls.user, title="t", status="published")
+
+    def test_round_trip(self):
+        survey = Survey.objects.get()
+        ordering = ["-created_at", "-id"]
+        self.assertEqual(decode_cursor(encode_cursor(survey, ordering), Survey, ordering), [survey.created_at, survey.id])
+
+    def test_pages_split_ties_on_id(self):
+        Survey.objects.bulk_create(
+            [Survey(owner=self.user, title=f"tie {i}", status="published") for i in range(4)]
+        )
+        # 同一时刻创建的问卷只能靠 id 区分先后，翻页边界落在并列的记录之间
+        Survey.objects.update(created_at=timezone.now())
+        expected = [str(pk) for pk in Survey.objects.order_by("-id").values_list("id", flat=True)]
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            payload = self.client.get("/api/v1/surveys", {"cursor": cursor, "page_size": 2}, **_auth(self.token)).json()
+            self.assertLessEqual(len(payload["items"]), 2)
+            seen += [item["id"] for item in payload["items"]]
+            cursor = payload["next_cursor"]
+        self.assertEqual(seen, expected)
+
+    def test_crafted_values_raise_value_error(self):
+        for values in self.CRAFTED:
+            with self.subTest(values=values), self.assertRaises(ValueError):
+                decode_cursor(_cursor(values), Survey, ["-created_at", "-id"])
+        # annotate 出来的相关度只接受数值
+        ordering = ["-relevance", "-created_at", "-survey_id"]
+        decode_cursor(_cursor([1.5, "2024-01-01T00:00:00+00:00", 1]), TaskCard, ordering)
+        with self.assertRaises(ValueError):
+            decode_cursor(_cursor(["x", "2024-01-01T00:00:00+00:00", 1]), TaskCard, ordering)
+
+    def test_crafted_cursor_is_rejected_by_list_endpoints(self):
+        for path in ("/api/v1/surveys", "/api/v1/task-hall/tasks"):
+            for values in self.CRAFTED:
+                with self.subTest(path=path, values=values):
+                    response = self.client.get(path, {"cursor": _cursor(values)}, **_auth(self.token))
+                    self.assertEqual(response.status_code, 422)
+
+
+class KeywordSearchTests(TransactionTestCase):
+    """MySQL 的 FULLTEXT 索引只收录已提交的行，这里用 TransactionTestCase"""
+
+    def setUp(self):
+        owner = AppUser.objects.create(email="search-owner@example.com", nickname="owner")
+        self.user = AppUser.objects.create(email="search@example.com", nickname="search")
+        texts = [
+            ("咖啡口味调查", ""),
+            ("早餐习惯", "顺便问问咖啡"),
+            ("通勤方式", ""),
+            ("咖啡店选址", "商圈"),
+            ("运动频率", "咖啡因摄入"),
+            ("睡眠质量", ""),
+            ("咖啡与茶", ""),
+        ]
+        surveys = [
+            Survey.objects.create(owner=owner, title=title, description=description, status="published")
+            for title, description in texts
+        ]
+        self.matching = {
+            str(survey.id) for survey, (title, description) in zip(surveys, texts) if "咖啡" in title + description
+        }
+        # 创建时间全部相同，翻页边界只能靠 survey_id 区分
+        TaskCard.objects.update(created_at=timezone.now())
+
+    def test_cursor_pages_cover_every_match_once(self):
+        seen = []
+        cursor = ""
+        for _ in range(10):
+            items, cursor = TaskHallManager.list_tasks_by_cursor(
+                {"keyword": "咖啡", "cursor": cursor, "page_size": 2}, self.user
+            )
+            self.assertLessEqual(len(items), 2)
+            seen += [item["id"] for item in items]
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), self.matching)
+
+    def test_offset_listing_filters_title_and_subtitle(self):
+        items, total = TaskHallManager.list_tasks({"keyword": "咖啡", "page_size": 50}, self.user)
+        self.assertEqual(total, len(self.matching))
+        self.assertEqual({item["id"] for item in items}, self.matching)
+        self.assertEqual(TaskHallManager.list_tasks({"keyword": "不存在的词"}, self.user), ([], 0))
+
+
+class TaskCardBackfillTests(TransactionTestCase):
+    BEFORE = [("core", "0013_task_card_updated_index")]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets or executor.loader.graph.leaf_nodes())
+        return executor.loader.project_state(targets).apps if targets else None
+
+    def test_migration_backfills_existing_surveys(self):
+        try:
+            # 历史模型不触发信号，模拟卡片表出现之前就有的问卷
+            apps = self._migrate(self.BEFORE)
+            owner = apps.get_model("core", "AppUser").objects.create(email="legacy@example.com", nickname="legacy")
+            Survey = apps.get_model("core", "Survey")
+            surveys = [
+                Survey.objects.create(owner=owner, title=f"legacy {i}", status="published", completed=i)
+                for i in range(3)
+            ]
+            tag = apps.get_model("core", "Tag").objects.create(name="调研", type="survey_type")
+            apps.get_model("core", "SurveyTag").objects.create(survey=surveys[0], tag=tag)
+            self.assertEqual(apps.get_model("core", "TaskCard").objects.count(), 0)
+        finally:
+            self._migrate(None)
+        self.assertEqual(TaskCard.objects.count(), 3)
+        self.assertEqual(TaskCard.objects.get(survey_id=surveys[0].id).primary_type, "调研")
+        self.assertEqual(TaskCardManager.find_drift(), [])
+
+
+class OverviewCacheTests(TestCase):
+    def setUp(self):
+        self.cache = OverviewCache(ttls={"block": 60})
+        self.compute = mock.Mock(side_effect=[1, 2, 3])
+        caches["default"].delete_many(["task_hall:block", "task_hall:block:gen", "task_hall:block:lock"])
+
+    def test_invalidate_forces_recompute(self):
+        self.assertEqual(self.cache.get("block", self.compute), 1)
+        self.assertEqual(self.cache.get("block", self.compute), 1)
+        self.cache.invalidate("block")
+        self.assertEqual(self.cache.get("block", self.compute), 2)
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_stale_value_served_while_another_request_recomputes(self):
+        self.cache.get("block", self.compute)
+        self.cache.invalidate("block")
+        # 另一个 worker 持有重算锁：其余请求直接返回旧值，不打数据库
+        caches["default"].add("task_hall:block:lock", 1, 10)
+        self.assertEqual(self.cache.get("block", self.compute), 1)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_publishing_invalidates_summary(self):
+        owner = AppUser.objects.create(email="overview@example.com", nickname="overview")
+        overview_cache.invalidate("summary")
+        before = overview_cache.get("summary", TaskHallManager.get_summary)["available_tasks"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Survey.objects.create(owner=owner, title="new", status="published")
+        self.assertEqual(overview_cache.get("summary", TaskHallManager.get_summary)["available_tasks"], before + 1)
+
+
+@unittest.skipUnless(connection.vendor == "mysql", "执行计划检查针对 MySQL")
+class TaskHallPlanTests(TransactionTestCase):
+    """每种排序配合各筛选条件都按索引顺序读取：无 filesort、无全表扫描"""
+
+    # 这些筛选只在卡片表上做条件过滤，不改变驱动表；类型筛选走 EXISTS 子查询，由优化器决定，不在此断言
+    FILTERS = [{}, {"difficulty": 3}, {"min_reward": 10}, {"max_minutes": 10}]
+
+    def setUp(self):
+        rng = random.Random(42)
+        now = timezone.now()
+        owner = AppUser.objects.create(email="plans@example.com", nickname="plans")
+        surveys = Survey.objects.bulk_create(
+            (Survey(owner=owner, title=f"survey {i}", status="published") for i in range(20000)),
+            batch_size=5000,
+        )
+        statuses = ["published"] * 8 + ["closed", "draft"]
+        TaskCard.objects.bulk_create(
+            (
+                TaskCard(
+                    survey=survey,
+                    owner=owner,
+                    title=survey.title,
+                    sender_nickname="plans",
+                    estimated_minutes=rng.choice([None, 3, 5, 8, 10, 15, 20]),
+                    difficulty=rng.randint(1, 5),
+                    reward=rng.randint(0, 50),
+                    filled_count=rng.randint(0, 200),
+                    target=200,
+                    deadline=rng.choice([None, now + timedelta(hours=rng.randint(1, 2000))]),
+                    status=rng.choice(statuses),
+                    created_at=now - timedelta(seconds=i),
+                )
+                for i, survey in enumerate(surveys)
+            ),
+            batch_size=5000,
+        )
+        # 刚写入的表统计信息不准，先更新再看执行计划（ANALYZE 会隐式提交，所以用 TransactionTestCase）
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE TABLE {TaskCard._meta.db_table}")
+            cursor.fetchall()
+
+    def test_sorts_read_in_index_order(self):
+        for sort in TaskHallManager.SORT_ORDERINGS:
+            for extra in self.FILTERS:
+                filters = {"status": "published", "sort": sort, **extra}
+                with self.subTest(filters=filters):
+                    plan = _page_queryset(filters).explain()
+                    self.assertEqual(_plan_problems(plan), [], plan)
+
+
+class RecommendOrderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="rank-owner@example.com", nickname="owner")
+        cls.user = AppUser.objects.create(email="rank@example.com", nickname="rank")
+        tags = [Tag.objects.create(name=f"兴趣{i}", type=Tag.TYPE_INTEREST) for i in range(2)]
+        for tag in tags:
+            UserTag.objects.create(user=cls.user, tag=tag)
+        # 从旧到新发布：最匹配的最先发布，默认的最新排序里排在最后
+        cls.matched = Survey.objects.create(
+            owner=owner, title="matched", status="published", reward_points=20, estimated_minutes=5, target=10
+        )
+        for tag in tags:
+            SurveyTag.objects.create(survey=cls.matched, tag=tag)
+        cls.rewarding = Survey.objects.create(
+            owner=owner, title="rewarding", status="published", reward_points=20, estimated_minutes=5, target=10
+        )
+        cls.plain = Survey.objects.create(owner=owner, title="plain", status="published", target=10)
+        cls.ranked = [str(survey.id) for survey in (cls.matched, cls.rewarding, cls.plain)]
+
+    def test_recommend_orders_by_match_score(self):
+        items, total = TaskHallManager.list_tasks({"sort": "recommend"}, self.user)
+        self.assertEqual([item["id"] for item in items], self.ranked)
+        self.assertEqual(total, 3)
+        self.assertEqual(items[0]["match_level"], "high")
+        self.assertIn("与你的标签匹配", items[0]["match_reason"])
+        newest, _ = TaskHallManager.list_tasks({}, self.user)
+        self.assertEqual(newest[0]["id"], str(self.plain.id))
+
+    def test_recommend_pages_do_not_overlap(self):
+        first, _ = TaskHallManager.list_tasks({"sort": "recommend", "page_size": 2}, self.user)
+        second, _ = TaskHallManager.list_tasks({"sort": "recommend", "page": 2, "page_size": 2}, self.user)
+        self.assertEqual([item["id"] for item in first + second], self.ranked)
+
+
+class HighMatchCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="match-owner@example.com", nickname="owner")
+        Survey.objects.bulk_create([Survey(owner=owner, title=f"survey {i}", status="published") for i in range(30)])
+        TaskCardManager.sync(list(Survey.objects.values_list("id", flat=True)))
+        cls.user = AppUser.objects.create(email="match@example.com", nickname="match")
+
+    def test_high_match_count_is_cached_per_user_version(self):
+        with mock.patch.object(
+            TaskHallManager, "count_high_match", wraps=TaskHallManager.count_high_match
+        ) as count_high_match:
+            first = TaskHallService.get_overview(self.user)["summary"]["high_match_tasks"]
+            second = TaskHallService.get_overview(self.user)["summary"]["high_match_tasks"]
+            self.assertEqual(first, second)
+            self.assertEqual(count_high_match.call_count, 1)
+            versions.bump(f"user:{self.user.id}")
+            TaskHallService.get_overview(self.user)
+            self.assertEqual(count_high_match.call_count, 2)
+            versions.bump("surveys")
+            TaskHallService.get_overview(self.user)
+            self.assertEqual(count_high_match.call_count, 3)
+
+    def test_recommend_reports_the_real_total(self):
+        with mock.patch.object(TaskHallManager, "MATCH_CANDIDATE_LIMIT", 10):
+            payload = TaskHallService.list_tasks(self.user, {"sort": "recommend", "page": 1, "page_size": 5})
+        self.assertEqual(payload["total"], 30)
+        self.assertEqual(payload["ranked_total"], 10)
+        self.assertEqual(len(payload["items"]), 5)
+
+
+class SeenSetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="seen-owner@example.com", nickname="owner")
+        Survey.objects.bulk_create([Survey(owner=owner, title=f"seen {i}", status="published") for i in range(40)])
+        cls.survey_ids = list(Survey.objects.values_list("id", flat=True))
+        TaskCardManager.sync(cls.survey_ids)
+        cls.user = AppUser.objects.create(email="seen@example.com", nickname="seen")
+
+    def test_saved_bloom_keeps_every_added_id(self):
+        seen_sets.clear(self.user.id, "bloom")
+        state = seen_sets.new()
+        for survey_id in range(1, 1001):
+            state.add(survey_id)
+        seen_sets.save(self.user.id, "bloom", state)
+        # 容量内的集合原样读回；布隆过滤器没有假阴性，加过的 id 一定还在
+        loaded = seen_sets.load(self.user.id, "bloom")
+        self.assertTrue(all(str(survey_id) in loaded for survey_id in range(1, 1001)))
+
+    def test_round_shows_every_task_exactly_once(self):
+        seen_sets.clear(self.user.id, "round")
+        shown = []
+        for _ in range(20):
+            items = TaskHallService.refresh_batch(self.user, "round", [], 6)["items"]
+            shown += [int(item["id"]) for item in items]
+            if len(items) < 6:
+                break
+        self.assertEqual(len(shown), len(set(shown)))
+        self.assertEqual(sorted(shown), sorted(self.survey_ids))
+        # 看完一轮后重新开始，最新的任务再次出现
+        items = TaskHallService.refresh_batch(self.user, "round", [], 6)["items"]
+        self.assertEqual([int(item["id"]) for item in items], shown[:6])
+
+    def test_sessions_are_tracked_separately(self):
+        for session in ("a", "b"):
+            seen_sets.clear(self.user.id, session)
+        first = TaskHallService.refresh_batch(self.user, "a", [], 5)["items"]
+        self.assertEqual(TaskHallService.refresh_batch(self.user, "b", [], 5)["items"], first)
+        self.assertNotEqual(TaskHallService.refresh_batch(self.user, "a", [], 5)["items"], first)
+
+
+class WeightedSamplingTests(TestCase):
+    def test_alias_table_reproduces_weights(self):
+        weights = np.array([1.0, 2.0, 3.0, 4.0, 0.5])
+        prob, alias = build_alias_table(weights)
+        # 取到 i 的概率：自己的槽位 prob[i]，加上别名指向 i 的槽位剩下的部分
+        chance = prob.copy()
+        np.add.at(chance, alias, 1.0 - prob)
+        np.testing.assert_allclose(chance / len(weights), weights / weights.sum())
+
+    def test_sample_follows_weights_and_skips_seen(self):
+        now = timezone.now()
+        rows = [(1, 100, 1, None, 0, 10, "published", now), (2, 0, 60, None, 10, 10, "published", now)]
+        rows += [(survey_id, 5, 5, None, 0, 10, "published", now) for survey_id in range(3, 11)]
+        pool = SamplingPool(load_rows=lambda since=None, limit=None: rows)
+        rng = np.random.default_rng(7)
+        counts = Counter(pool.sample(1, rng=rng)[0] for _ in range(3000))
+        # 奖励率高、名额充足的卡片远比奖励为 0、名额已满的卡片常见，后者仍有最低权重
+        self.assertGreater(counts[1], counts[5])
+        self.assertGreater(counts[5], counts[2])
+        self.assertGreater(counts[2], 0)
+        picked = pool.sample(6, seen={1, 3, 4}, rng=rng)
+        self.assertEqual(len(picked), len(set(picked)))
+        self.assertFalse({1, 3, 4} & set(picked))
+
+    def test_sample_mode_skips_own_and_filled_tasks(self):
+        owner = AppUser.objects.create(email="sample-owner@example.com", nickname="owner")
+        user = AppUser.objects.create(email="sample@example.com", nickname="sample")
+        Survey.objects.bulk_create(
+            [Survey(owner=owner if i % 3 else user, title=f"sample {i}", status="published") for i in range(30)]
+        )
+        survey_ids = list(Survey.objects.values_list("id", flat=True))
+        TaskCardManager.sync(survey_ids)
+        own = set(Survey.objects.filter(owner=user).values_list("id", flat=True))
+        filled = Survey.objects.filter(owner=owner).first()
+        questionnaire = Questionnaire.objects.create(survey=filled, status="published", title=filled.title)
+        Response.objects.create(
+            survey=filled, questionnaire=questionnaire, user=user, status="submitted", submitted_at=timezone.now()
+        )
+        sampling_pool.refresh(force=True)
+        seen_sets.clear(user.id, "sample")
+        shown = []
+        for seed in range(10):
+            items = TaskHallService.refresh_batch(user, "sample", [], 5, mode="sample", seed=seed)["items"]
+            shown += [int(item["id"]) for item in items]
+            if len(items) < 5:
+                break
+        # 一轮之内不重复，抽完全部可填写的任务才开始下一轮
+        self.assertEqual(len(shown), len(set(shown)))
+        self.assertEqual(set(shown), set(survey_ids) - own - {filled.id})
+
+
+class EligibilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="eligible-owner@example.com", nickname="owner")
+        cls.user = AppUser.objects.create(email="eligible@example.com", nickname="eligible")
+        past = timezone.now() - timedelta(hours=1)
+        cls.open, cls.own, cls.filled, cls.draft, cls.closed, cls.expired = [
+            Survey.objects.create(owner=user, title=title, status=status, deadline=deadline)
+            for user, title, status, deadline in [
+                (owner, "open", "published", None),
+                (cls.user, "own", "published", None),
+                (owner, "filled", "published", None),
+                (owner, "draft", "published", None),
+                (owner, "closed", "closed", None),
+                (owner, "expired", "published", past),
+            ]
+        ]
+        fills = [(cls.filled, "submitted", timezone.now()), (cls.draft, "in_progress", None)]
+        for survey, status, submitted_at in fills:
+            questionnaire = Questionnaire.objects.create(survey=survey, status="published", title=survey.title)
+            Response.objects.create(
+                survey=survey, questionnaire=questionnaire, user=cls.user, status=status, submitted_at=submitted_at
+            )
+        # 过期问卷由截止调度器关闭后才从大厅消失
+        DeadlineScheduler().run_once()
+
+    def _visible(self, items):
+        return {int(item["id"]) for item in items}
+
+    def test_listings_hide_own_filled_closed_and_expired(self):
+        expected = {self.open.id, self.draft.id}
+        items, total = TaskHallManager.list_tasks({}, self.user)
+        self.assertEqual((self._visible(items), total), (expected, 2))
+        items, _ = TaskHallManager.list_tasks_by_cursor({"cursor": ""}, self.user)
+        self.assertEqual(self._visible(items), expected)
+        items, _ = TaskHallManager.list_tasks({"sort": "recommend"}, self.user)
+        self.assertEqual(self._visible(items), expected)
+
+    def test_anti_join_cost_does_not_depend_on_fill_count(self):
+        # 已填写过滤是 NOT EXISTS 子查询，不先取出用户的全部填写记录：计数、取卡片、用户标签各一条
+        with CaptureQueriesContext(connection) as queries:
+            TaskHallManager.list_tasks({"page_size": 5}, self.user)
+        self.assertEqual(len(queries), 3)
+        self.assertIn("NOT EXISTS", queries[0]["sql"])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = AppUser.objects.create(email="etag-owner@example.com", nickname="before")
+        Survey.objects.create(owner=cls.owner, title="etag", status="published")
+        cls.user = AppUser.objects.create(email="etag@example.com", nickname="etag")
+        cls.token, _ = issue_token(cls.user)
+
+    def _get(self, etag=None, **extra):
+        if etag:
+            extra["HTTP_IF_NONE_MATCH"] = etag
+        return self.client.get("/api/v1/task-hall/tasks", **_auth(self.token), **extra)
+
+    def test_unchanged_list_returns_304(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        response = self._get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        # 弱比较：W/ 前缀也能命中
+        self.assertEqual(self._get("W/" + etag).status_code, 304)
+        self.assertEqual(self._get('"other"').status_code, 200)
+
+    def test_write_changes_etag(self):
+        etag = self._get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Survey.objects.create(owner=self.owner, title="another", status="published")
+        response = self._get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_owner_nickname_change_changes_etag(self):
+        etag = self._get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.nickname = "after"
+            self.owner.save(update_fields=["nickname"])
+        response = self._get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"][0]["sender"], "after")
+
+
+class SerializationTests(SimpleTestCase):
+    PAYLOAD = {
+        "title": "问卷",
+        "at": datetime(2026, 1, 1, 8, 0, tzinfo=dt_timezone(timedelta(hours=8))),
+        "day": date(2026, 1, 1),
+        "amount": Decimal("1.50"),
+        "ids": [1, 2],
+        "empty": None,
+    }
+    EXPECTED = '{"title":"问卷","at":"2026-01-01T00:00:00Z","day":"2026-01-01","amount":"1.50","ids":[1,2],"empty":null}'
+
+    def test_stdlib_fallback_matches_active_encoder(self):
+        self.assertEqual(serialization.json_dumps(self.PAYLOAD), self.EXPECTED.encode("utf-8"))
+        # 装了 orjson 时 dumps 是 orjson 实现，输出必须与标准库逐字节一致
+        self.assertEqual(serialization.dumps(self.PAYLOAD), self.EXPECTED.encode("utf-8"))
+        self.assertEqual(serialization.json_loads(self.EXPECTED.encode("utf-8"))["title"], "问卷")
+
+    def test_compresses_only_above_threshold(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        payload = {"items": ["x" * 50] * 10}
+        with override_settings(JSON_COMPRESS_MIN_BYTES=10_000):
+            response = serialization.json_response(payload, request=request)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        with override_settings(JSON_COMPRESS_MIN_BYTES=100):
+            response = serialization.json_response(payload, request=request)
+            refused = serialization.json_response(
+                payload, request=RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip;q=0")
+            )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.content)), payload)
+        self.assertFalse(refused.has_header("Content-Encoding"))
+
+
+class StreamTicketTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(email="stream@example.com", nickname="stream")
+        self.token, _ = issue_token(self.user)
+
+    def _ticket(self):
+        response = self.client.post("/api/v1/task-hall/stream/ticket", **_auth(self.token))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["ticket"]
+
+    def test_ticket_is_single_use(self):
+        ticket = self._ticket()
+        self.assertEqual(stream_tickets.redeem(ticket).user_id, self.user.id)
+        self.assertIsNone(stream_tickets.redeem(ticket))
+        self.assertIsNone(stream_tickets.redeem("forged"))
+
+    def test_ticket_requires_a_valid_token(self):
+        self.assertEqual(self.client.post("/api/v1/task-hall/stream/ticket").status_code, 401)
+        self.assertEqual(self.client.post("/api/v1/task-hall/stream/ticket", **_auth("forged")).status_code, 401)
+
+    async def test_stream_rejects_access_token_in_query(self):
+        response = await self.async_client.get("/api/v1/task-hall/stream", {"access_token": self.token})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_closes_when_the_token_is_revoked(self):
+        ticket = await sync_to_async(self._ticket)()
+        with mock.patch.object(task_hall_controller, "STREAM_HEARTBEAT", 0.05):
+            response = await self.async_client.get("/api/v1/task-hall/stream", {"ticket": ticket})
+            self.assertEqual(response.status_code, 200)
+            chunks = aiter(response.streaming_content)
+            self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+            self.assertEqual(await anext(chunks), b": ping\n\n")
+            await sync_to_async(revoke_tokens)(self.user)
+            self.assertEqual(await anext(chunks), task_hall_controller.SESSION_CLOSED)
+            with self.assertRaises(StopAsyncIteration):
+                await anext(chunks)
+        # 票据已用过，不能再连接
+        response = await self.async_client.get("/api/v1/task-hall/stream", {"ticket": ticket})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_closes_when_the_token_expires(self):
+        expires_at = timezone.now() + timedelta(milliseconds=300)
+        await AuthToken.objects.filter(user=self.user).aupdate(expires_at=expires_at)
+        ticket = await sync_to_async(self._ticket)()
+        response = await self.async_client.get("/api/v1/task-hall/stream", {"ticket": ticket})
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+        # 心跳间隔远大于剩余有效期，到期时刻一到就断开
+        self.assertEqual(await anext(chunks), task_hall_controller.SESSION_CLOSED)
+        self.assertGreaterEqual(timezone.now(), expires_at)
+
+
+class DeadlineRunnerTests(TestCase):
+    SHARED_CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://127.0.0.1:6379"},
+    }
+
+    def test_command_refuses_process_local_backends(self):
+        self.assertIn("VERSION_CACHE_ALIAS", process_local_settings())
+        with self.assertRaisesMessage(CommandError, "VERSION_CACHE_ALIAS"):
+            call_command("close_expired_surveys")
+
+    def test_shared_caches_are_not_reported(self):
+        with override_settings(CACHES=self.SHARED_CACHES, VERSION_CACHE_ALIAS="shared", TASK_HALL_CACHE_ALIAS="shared"):
+            self.assertEqual(process_local_settings(), ["TASK_EVENTS_BACKEND"])
+
+    def test_command_runner_does_not_start_in_web_process(self):
+        scheduler = DeadlineScheduler(runner="command")
+        scheduler.start()
+        self.assertIsNone(scheduler._thread)
+
+
+class FillSubmissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="submit-owner@example.com", nickname="owner")
+        cls.users = AppUser.objects.bulk_create(
+            [AppUser(email=f"submit-{i}@example.com", nickname=f"s{i}") for i in range(3)]
+        )
+        cls.small, small_body = _build_survey(owner, 4)
+        cls.large, large_body = _build_survey(owner, 20)
+        cls.answers = {
+            cls.small.id: json.loads(small_body)["answers"],
+            cls.large.id: json.loads(large_body)["answers"],
+        }
+
+    def _submit(self, survey, user, queries):
+        survey = Survey.objects.select_related("active_questionnaire").get(id=survey.id)
+        schema_cache.get(survey.active_questionnaire)
+        with self.assertNumQueries(queries):
+            return submit_response(survey, user, self.answers[survey.id], 60)
+
+    def test_submit_query_count_does_not_depend_on_question_count(self):
+        # 答卷一条 INSERT、全部答案一条 bulk INSERT，加上卡片计数、问卷计数与满额检查
+        for survey, count in ((self.small, 4), (self.large, 20)):
+            with self.subTest(questions=count):
+                response = self._submit(survey, self.users[0], 9)
+                self.assertEqual(Answer.objects.filter(response=response).count(), count)
+        self.assertEqual(Survey.objects.get(id=self.large.id).completed, 1)
+
+    def test_draft_is_converted_in_place(self):
+        store = DraftStore(background=False)
+        questionnaire = self.large.active_questionnaire
+        schema = schema_cache.get(questionnaire)
+        rows = schema.validate_draft(self.answers[self.large.id][:3])
+        store.save(self.users[1].id, self.large.id, questionnaire.id, rows)
+        store.flush()
+        draft = Response.objects.get(survey=self.large, user=self.users[1])
+        # 插入冲突后加锁读出草稿，原地改为提交并整体替换答案
+        response = self._submit(self.large, self.users[1], 14)
+        self.assertEqual((response.id, response.status), (draft.id, "submitted"))
+        self.assertEqual(Answer.objects.filter(response=response).count(), 20)
+
+    def test_duplicate_submit_raises_already_filled(self):
+        first = self._submit(self.small, self.users[2], 9)
+        survey = Survey.objects.select_related("active_questionnaire").get(id=self.small.id)
+        # 插入撞上唯一约束后只加锁读一次已有答卷，整个事务回滚
+        with self.assertNumQueries(8), self.assertRaises(AlreadyFilled) as raised:
+            submit_response(survey, self.users[2], self.answers[survey.id], 60)
+        self.assertEqual(raised.exception.response.id, first.id)
+        self.assertEqual(Survey.objects.get(id=self.small.id).completed, 1)
+        self.assertEqual(Answer.objects.filter(response=first).count(), 4)
+
+
+class SchemaCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="schema-owner@example.com", nickname="owner")
+        cls.survey, body = _build_survey(owner, 4)
+        cls.answers = json.loads(body)["answers"]
+
+    def setUp(self):
+        schema_cache.clear()
+        self.questionnaire = Questionnaire.objects.get(id=self.survey.active_questionnaire_id)
+        self.single = Question.objects.get(questionnaire=self.questionnaire, type="single")
+
+    def _cached(self):
+        return (self.questionnaire.id, self.questionnaire.version) in schema_cache._entries
+
+    def test_cached_schema_validates_without_queries(self):
+        # 首次编译：题目、选项各一次查询
+        with self.assertNumQueries(2):
+            schema = schema_cache.get(self.questionnaire)
+        with self.assertNumQueries(0):
+            self.assertIs(schema_cache.get(self.questionnaire), schema)
+            rows = schema.validate(self.answers)
+        self.assertEqual([row[0] for row in rows], [question.id for question in schema.questions])
+
+    def test_edits_evict_the_compiled_schema(self):
+        option = QuestionOption.objects.filter(question=self.single).first()
+        edits = [
+            lambda: self.questionnaire.save(update_fields=["title"]),
+            lambda: Question.objects.get(id=self.single.id).save(update_fields=["title"]),
+            lambda: option.save(update_fields=["label"]),
+        ]
+        for edit in edits:
+            schema_cache.get(self.questionnaire)
+            self.assertTrue(self._cached())
+            with self.captureOnCommitCallbacks(execute=True):
+                edit()
+            self.assertFalse(self._cached())
+
+    def test_missing_required_answer(self):
+        schema = schema_cache.get(self.questionnaire)
+        answers = [item for item in self.answers if item["question_id"] != str(self.single.id)]
+        with self.assertRaisesMessage(AnswerError, f"question {self.single.id} is required"):
+            schema.validate(answers)
+        # 草稿不检查必填
+        self.assertEqual(len(schema.validate_draft(answers)), 3)
+
+    def test_option_outside_the_choice_set(self):
+        schema = schema_cache.get(self.questionnaire)
+        multi = Question.objects.get(questionnaire=self.questionnaire, type="multi")
+        for question, value in ((self.single, "o9"), (multi, ["o1", "o9"])):
+            with self.subTest(type=question.type):
+                answers = [
+                    {**item, "value": value} if item["question_id"] == str(question.id) else item
+                    for item in self.answers
+                ]
+                with self.assertRaisesMessage(AnswerError, f"invalid option for question {question.id}"):
+                    schema.validate(answers)
+
+
+class SkipLogicFuzzTests(SimpleTestCase):
+    """随机问卷与随机作答下，编译后的闭包与直接解释 logic_json 的参考实现走出的路径逐一一致"""
+
+    def test_compiled_routes_match_the_reference(self):
+        rng = random.Random(20261018)
+        for _ in range(300):
+            questions = _random_questions(rng, rng.randint(1, 30))
+            schema = _schema(questions)
+            for _ in range(20):
+                answers = _random_answers(rng, questions)
+                compiled = [(question.id, required) for question, required in schema.route(answers)]
+                expected = reference_route(questions, answers)
+                self.assertEqual(
+                    compiled, expected, f"logic={[q.logic_json for q in questions]}\nanswers={answers}"
+                )
+
+
+class DraftStoreFlushTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="draft-owner@example.com", nickname="owner")
+        cls.user = AppUser.objects.create(email="draft@example.com", nickname="draft")
+        cls.survey, _ = _build_survey(owner, 4)
+        cls.questionnaire = Questionnaire.objects.get(id=cls.survey.active_questionnaire_id)
+
+    def setUp(self):
+        self.schema = schema_cache.get(self.questionnaire)
+        self.single, _, self.text, _ = self.schema.questions
+        self.store = DraftStore(background=False)
+
+    def _save(self, values):
+        answers = [{"question_id": str(question.id), "value": value} for question, value in values]
+        self.store.save(self.user.id, self.survey.id, self.questionnaire.id, self.schema.validate_draft(answers))
+
+    def _stored(self):
+        return dict(
+            Answer.objects.filter(response__survey=self.survey, response__user=self.user).values_list(
+                "question_id", "value_text"
+            )
+        )
+
+    def test_flush_upserts_and_clears_answers(self):
+        self._save([(self.single, "o1"), (self.text, "环境整洁")])
+        self.assertEqual(self.store.flush(), 1)
+        response = Response.objects.get(survey=self.survey, user=self.user)
+        self.assertEqual(response.status, "in_progress")
+        self.assertEqual(self._stored(), {self.single.id: "o1", self.text.id: "环境整洁"})
+
+        # 第二次落库走冲突更新：答卷不重复，改过的题覆盖，清空的题删除
+        self._save([(self.single, "o2"), (self.text, "")])
+        self.assertEqual(self.store.flush(), 1)
+        self.assertEqual(list(Response.objects.filter(survey=self.survey, user=self.user)), [response])
+        self.assertEqual(self._stored(), {self.single.id: "o2"})
+        self.assertEqual(self.store.flush(), 0)
+
+        restored = DraftStore(background=False).get(self.user.id, self.survey.id)
+        self.assertEqual(set(restored.answers), {self.single.id})
+
+    def test_conflict_target_only_where_supported(self):
+        model = mock.Mock()
+        for supported in (True, False):
+            with mock.patch.object(connection.features, "supports_update_conflicts_with_target", supported):
+                DraftStore._upsert(model, [], unique_fields=["user", "survey"], update_fields=["updated_at"])
+            self.assertEqual("unique_fields" in model.objects.bulk_create.call_args.kwargs, supported)
+
+
+class SurveyCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = AppUser.objects.create(email="counter-owner@example.com", nickname="owner", points=100)
+        cls.users = AppUser.objects.bulk_create(
+            [AppUser(email=f"counter-{i}@example.com", nickname=f"c{i}") for i in range(3)]
+        )
+
+    def setUp(self):
+        rate_limiter.backend.clear()
+
+    def _survey(self, target):
+        survey, body = _build_survey(self.owner, 4, target=target)
+        TaskCardManager.sync([survey.id])
+        return survey, json.loads(body)["answers"]
+
+    def _load(self, survey):
+        return Survey.objects.select_related("active_questionnaire").get(id=survey.id)
+
+    def test_add_completed_only_on_published(self):
+        survey, _ = self._survey(10)
+        self.assertTrue(SurveyCounterManager.add_completed(survey.id))
+        self.assertTrue(SurveyCounterManager.add_completed(survey.id))
+        self.assertEqual(Survey.objects.get(id=survey.id).completed, 2)
+        for status in ("draft", "closed"):
+            Survey.objects.filter(id=survey.id).update(status=status)
+            self.assertFalse(SurveyCounterManager.add_completed(survey.id))
+            self.assertEqual(Survey.objects.get(id=survey.id).completed, 2)
+
+    def test_closes_at_target_and_rolls_back_a_racing_fill(self):
+        survey, answers = self._survey(2)
+        # 三份提交开始时问卷都还是 published；第二份填满关闭后，第三份在计数这一步被拒绝
+        loaded = [self._load(survey) for _ in self.users]
+        for user, current in zip(self.users[:2], loaded):
+            with self.captureOnCommitCallbacks(execute=True):
+                submit_response(current, user, answers, 60)
+        survey.refresh_from_db()
+        self.assertEqual((survey.completed, survey.status), (2, "closed"))
+        self.assertEqual(TaskCard.objects.get(survey=survey).status, "closed")
+
+        with self.assertRaisesMessage(AnswerError, "survey not published"):
+            submit_response(loaded[2], self.users[2], answers, 60)
+        self.assertFalse(Response.objects.filter(survey=survey, user=self.users[2]).exists())
+        self.assertFalse(Answer.objects.filter(response__user=self.users[2]).exists())
+        self.assertEqual(Survey.objects.get(id=survey.id).completed, 2)
+
+    def test_uncapped_survey_stays_open(self):
+        survey, answers = self._survey(None)
+        for user in self.users:
+            submit_response(self._load(survey), user, answers, 60)
+        survey.refresh_from_db()
+        self.assertEqual((survey.completed, survey.status), (3, "published"))
+        self.assertEqual(SurveyCounterManager.close_full(), [])
+        self.assertEqual(TaskCard.objects.get(survey=survey).target, 0)
+
+    def test_publish_without_target_is_uncapped(self):
+        token, _ = issue_token(self.owner)
+        cases = [
+            ({"title": "no target"}, 200, None),
+            ({"title": "target", "target": "3"}, 200, None),
+            ({"title": "bad target", "target": "abc"}, 422, "invalid target"),
+            ({"title": "zero target", "target": 0}, 422, "target must be >= 1"),
+            ({"title": "bad reward", "reward_points": "ten"}, 422, "invalid reward_points"),
+            ({"title": "bool reward", "reward_points": True}, 422, "invalid reward_points"),
+        ]
+        for payload, status, message in cases:
+            with self.subTest(payload=payload):
+                response = self.client.post(
+                    "/api/v1/surveys", json.dumps(payload), content_type="application/json", **_auth(token)
+                )
+                self.assertEqual(response.status_code, status)
+                if message:
+                    self.assertEqual(response.json()["error"], message)
+        self.assertIsNone(Survey.objects.get(title="no target").target)
+        self.assertEqual(Survey.objects.get(title="target").target, 3)
+        self.assertFalse(Survey.objects.filter(title__in=["bad target", "zero target", "bad reward"]).exists())
+
+    def test_find_drift_and_repair(self):
+        survey, answers = self._survey(10)
+        submit_response(self._load(survey), self.users[0], answers, 60)
+        Survey.objects.filter(id=survey.id).update(completed=5)
+        self.assertEqual(SurveyCounterManager.find_drift(batch_size=1), [(survey.id, 5, 1)])
+        self.assertEqual(SurveyCounterManager.repair(survey.id), 1)
+        self.assertEqual(SurveyCounterManager.find_drift(), [])
+
+    def test_reconcile_closes_full_surveys_only_when_asked(self):
+        full, full_answers = self._survey(2)
+        uncapped, uncapped_answers = self._survey(None)
+        submit_response(self._load(full), self.users[0], full_answers, 60)
+        submit_response(self._load(uncapped), self.users[0], uncapped_answers, 60)
+        # 后台把目标份数改到已完成份数以下，另一个问卷的计数漂移
+        Survey.objects.filter(id=full.id).update(target=1)
+        Survey.objects.filter(id=uncapped.id).update(completed=5)
+
+        # 默认只修计数，不关闭问卷
+        call_command("reconcile_fill_counts", stdout=StringIO())
+        self.assertEqual(Survey.objects.get(id=uncapped.id).completed, 1)
+        self.assertEqual(Survey.objects.get(id=full.id).status, "published")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reconcile_fill_counts", "--close-full", stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Survey.objects.get(id=full.id).status, "closed")
+        self.assertEqual(TaskCard.objects.get(survey=full).status, "closed")
+        self.assertEqual(Survey.objects.get(id=uncapped.id).status, "published")
+
+
+class IdempotentFillTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = AppUser.objects.create(email="idem-owner@example.com", nickname="owner")
+        cls.user = AppUser.objects.create(email="idem@example.com", nickname="idem")
+        cls.survey, cls.body = _build_survey(owner, 4)
+
+    def setUp(self):
+        self.token, _ = issue_token(self.user)
+        self.key = f"fill-{self._testMethodName}"
+        idempotency.abandon("fill", self.user.id, self.key)
+
+    def _post(self, body=None):
+        # 直接调用视图，未处理的异常原样抛给测试
+        request = RequestFactory().post(
+            f"/api/v1/surveys/{self.survey.id}/fills",
+            body or self.body,
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=self.key,
+            **_auth(self.token),
+        )
+        return submit_fill(request, str(self.survey.id))
+
+    def test_retry_replays_the_first_result(self):
+        first = self._post()
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", first)
+        retry = self._post()
+        self.assertEqual((retry.status_code, retry.content), (200, first.content))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Response.objects.filter(survey=self.survey, user=self.user).count(), 1)
+
+    def test_key_reused_with_a_different_body(self):
+        self.assertEqual(self._post().status_code, 200)
+        body = json.loads(self.body)
+        body["duration_seconds"] = 1
+        response = self._post(json.dumps(body))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(json.loads(response.content)["error"], "idempotency key reused with a different request")
+
+    def test_request_in_flight(self):
+        self.assertIsNone(idempotency.begin("fill", self.user.id, self.key))
+        response = self._post()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(Response.objects.filter(survey=self.survey, user=self.user).exists())
+
+    def test_failed_attempts_release_the_key(self):
+        with mock.patch("core.views.submit_response", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self._post()
+        with mock.patch("core.views._submit_fill", return_value=error(503, "busy")):
+            self.assertEqual(self._post().status_code, 503)
+        retry = self._post()
+        self.assertEqual(retry.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", retry)
+        self.assertEqual(Response.objects.filter(survey=self.survey, user=self.user).count(), 1)
@@ -5,11 +5,14 @@ from .controllers import task_hall_controller
 urlpatterns = [
     path("auth/register", views.register),
     path("auth/login", views.login),
+    path("auth/logout", views.logout),
     path("auth/send-reset-code", views.send_reset_code),
     path("auth/reset-password", views.verify_reset_code),
     path("users/me", views.user_me),
     path("surveys", views.surveys),
     path("surveys/<str:survey_id>", views.survey_detail),
+    path("surveys/<str:survey_id>/fill", views.survey_fill),
+    path("surveys/<str:survey_id>/fill/draft", views.fill_draft),
     path("surveys/<str:survey_id>/close", views.close_survey),
     path("surveys/<str:survey_id>/fills", views.submit_fill),
     path("fills/<str:fill_id>/review", views.review_fill),
@@ -19,4 +22,6 @@ urlpatterns = [
     path("task-hall/overview", task_hall_controller.task_hall_overview),
     path("task-hall/tasks", task_hall_controller.task_hall_tasks),
     path("task-hall/batch/refresh", task_hall_controller.task_hall_refresh_batch),
+    path("task-hall/stream", task_hall_controller.task_hall_stream),
+    path("task-hall/stream/ticket", task_hall_controller.task_hall_stream_ticket),
 ]
@@ -1,14 +1,17 @@
-import json
 import secrets
-from datetime import datetime, time, timedelta
+from datetime import datetime, time, timedelta, timezone as dt_timezone
 
-from django.contrib.auth.hashers import check_password, make_password
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from django.http import HttpResponse
-from django.http import JsonResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
 from django.views.decorators.csrf import csrf_exempt
 
+from .conditional import conditional_response, make_etag
+from .pagination import keyset_page
+from .serialization import json_response, parse_json
 from .models import (
     AppUser,
     AuthCredential,
@@ -22,24 +25,35 @@ from .models import (
     Tag,
     UserTag,
 )
+from .services.fill_drafts import fill_drafts
+from .services.fill_submission import AlreadyFilled, AnswerError, submit_response
+from .services.idempotency import IN_FLIGHT, idempotency
+from .services.password_hasher import HasherBusy, password_hasher
+from .services.questionnaire_schema import schema_cache
+from .services.skip_logic import LogicError
+from .services.stream_tickets import StreamSession
+from .services.rate_limiter import client_ip, rate_limiter
+from .services.signed_token import is_signed_token, revocations, sign_token, verify_token
+from .services.token_cache import hash_token, token_cache
+from .services.versions import versions
 
 
-def now_iso(dt=None):
-    value = dt or timezone.now()
-    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+# 列表接口统一的排序；游标分页（传 cursor 参数）按这组字段定位下一页
+LIST_ORDERING = ["-created_at", "-id"]
 
 
-def parse_json(request):
-    if not request.body:
-        return {}
-    try:
-        return json.loads(request.body.decode("utf-8"))
-    except json.JSONDecodeError:
-        return {}
+def error(status, message):
+    return json_response({"error": message}, status=status)
 
 
-def error(status, message):
-    return JsonResponse({"error": message}, status=status)
+def retry_later(status, message, retry_after):
+    response = error(status, message)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def hasher_busy():
+    return retry_later(503, "server busy, please retry", 1)
 
 
 def parse_int_id(value):
@@ -57,14 +71,64 @@ def parse_int_id(value):
     return int(raw)
 
 
+def parse_int(value):
+    """请求体里的整数字段：接受整数或整数字符串，不合法时返回 None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            return None
+    return None
+
+
+def revoke_tokens(user, token=None):
+    """吊销用户的全部 token（或只吊销指定 token）"""
+    queryset = AuthToken.objects.filter(user=user, revoked_at__isnull=True)
+    if token is not None:
+        queryset = queryset.filter(token=token)
+    records = list(queryset.values_list("id", "token"))
+    if not records:
+        return
+    if settings.AUTH_TOKEN_MODE == "signed":
+        # 签名模式下 AuthToken 是吊销/审计记录，保留到过期后由清理任务删除
+        queryset.update(revoked_at=timezone.now())
+        revocations.add(record_id for record_id, _ in records)
+    else:
+        queryset.delete()
+    token_cache.invalidate(hash_token(value) for _, value in records)
+
+
 def issue_token(user):
-    AuthToken.objects.filter(user=user).delete()
-    token = secrets.token_urlsafe(24)
+    revoke_tokens(user)
     expires_at = timezone.now() + timedelta(seconds=3600)
+    if settings.AUTH_TOKEN_MODE == "signed":
+        record = AuthToken.objects.create(
+            user=user, token=secrets.token_urlsafe(24), expires_at=expires_at
+        )
+        token = sign_token(user.id, expires_at, record.id)
+        AuthToken.objects.filter(id=record.id).update(token=token)
+        return token, expires_at
+    token = secrets.token_urlsafe(24)
     AuthToken.objects.create(user=user, token=token, expires_at=expires_at)
     return token, expires_at
 
 
+def paginate(request, queryset, page, page_size):
+    """传了 cursor 参数时走游标分页（返回 next_cursor，不统计 total），否则按 page/page_size 分页"""
+    cursor = request.GET.get("cursor")
+    if cursor is not None:
+        records, next_cursor = keyset_page(queryset, LIST_ORDERING, cursor, page_size)
+        return records, {"page_size": page_size, "next_cursor": next_cursor}
+    total = queryset.count()
+    offset = (page - 1) * page_size
+    records = queryset[offset : offset + page_size]
+    return records, {"page": page, "page_size": page_size, "total": total}
+
+
 def parse_deadline(value):
     if not value:
         return None
@@ -74,7 +138,7 @@ def parse_deadline(value):
         if date_value:
             dt = datetime.combine(date_value, time.min)
     if dt and timezone.is_naive(dt):
-        dt = timezone.make_aware(dt, timezone=timezone.utc)
+        dt = timezone.make_aware(dt, timezone=dt_timezone.utc)
     return dt
 
 
@@ -99,19 +163,88 @@ def set_user_tags(user, tag_type, tags):
         UserTag.objects.create(user=user, tag=tag)
 
 
-def get_current_user(request):
+def get_bearer_token(request):
     auth = request.META.get("HTTP_AUTHORIZATION", "")
     if not auth.startswith("Bearer "):
         return None
-    token = auth.split(" ", 1)[1].strip()
+    return auth.split(" ", 1)[1].strip() or None
+
+
+def get_current_user(request, token=None):
+    token = token or get_bearer_token(request)
     if not token:
         return None
-    auth_token = AuthToken.objects.select_related("user").filter(token=token).first()
-    if not auth_token:
+    if is_signed_token(token):
+        return get_signed_token_user(token)
+    token_hash = hash_token(token)
+    cached = token_cache.get(token_hash)
+    if cached:
+        user_id, expires_at = cached
+        if expires_at and expires_at <= timezone.now():
+            token_cache.invalidate([token_hash])
+            return None
+        user = load_user(user_id)
+        if user is None:
+            token_cache.invalidate([token_hash])
+        return user
+    # 用户单独按 load_user 取，读库前先拿到版本号，之后的命中直接用快照
+    record = (
+        AuthToken.objects.filter(token=token, revoked_at__isnull=True)
+        .values_list("user_id", "expires_at")
+        .first()
+    )
+    if not record:
+        return None
+    user_id, expires_at = record
+    if expires_at and expires_at <= timezone.now():
+        return None
+    token_cache.set(token_hash, user_id, expires_at)
+    return load_user(user_id)
+
+
+def get_signed_token_user(token):
+    # 签名里已带 user_id，不需要 token 缓存
+    claims = verify_token(token)
+    if not claims or revocations.is_revoked(claims[2]):
+        return None
+    return load_user(claims[0])
+
+
+def load_user(user_id):
+    """按 id 取用户：用户版本号没变时直接用缓存的快照，不查库"""
+    # 先取版本号再读库，读库期间的写入会让这份快照随即失效
+    version = versions.get(f"user:{user_id}")[0]
+    user = token_cache.get_user(user_id, version)
+    if user is None:
+        user = AppUser.objects.filter(id=user_id).first()
+        if user is not None:
+            token_cache.set_user(user, version)
+    return user
+
+
+def get_token_session(token):
+    """
+    解析 token 并返回 (user, StreamSession)，无效时返回 None
+
+    与 get_current_user 不同，这里同时给出 token 对应的 AuthToken 记录，供长连接之后复查是否已吊销。
+    """
+    if not token:
         return None
-    if auth_token.expires_at and auth_token.expires_at <= timezone.now():
+    if is_signed_token(token):
+        claims = verify_token(token)
+        if not claims or revocations.is_revoked(claims[2]):
+            return None
+        user = AppUser.objects.filter(id=claims[0]).first()
+        expires_at = datetime.fromtimestamp(claims[1], tz=dt_timezone.utc)
+        return user and (user, StreamSession(user.id, claims[2], expires_at, True))
+    auth_token = (
+        AuthToken.objects.select_related("user")
+        .filter(token=token, revoked_at__isnull=True)
+        .first()
+    )
+    if not auth_token or (auth_token.expires_at and auth_token.expires_at <= timezone.now()):
         return None
-    return auth_token.user
+    return auth_token.user, StreamSession(auth_token.user_id, auth_token.id, auth_token.expires_at, False)
 
 
 def require_auth(request):
@@ -140,9 +273,11 @@ def survey_response(survey):
         "link": None,
         "reward_points": survey.reward_points,
         "estimated_minutes": survey.estimated_minutes,
-        "deadline": now_iso(survey.deadline) if survey.deadline else None,
+        "deadline": survey.deadline,
         "status": survey.status,
-        "created_at": now_iso(survey.created_at),
+        "completed": survey.completed,
+        "target": survey.target,
+        "created_at": survey.created_at,
         "owner_id": str(survey.owner_id),
     }
 
@@ -166,6 +301,10 @@ def register(request):
         return error(422, "email, password, nickname required")
     if AppUser.objects.filter(email=email).exists():
         return error(422, "email already registered")
+    try:
+        password_hash = password_hasher.make_password(password)
+    except HasherBusy:
+        return hasher_busy()
 
     user = AppUser.objects.create(
         email=email,
@@ -175,9 +314,9 @@ def register(request):
         activity_points=0,
         status="normal",
     )
-    AuthCredential.objects.create(user=user, password_hash=make_password(password))
+    AuthCredential.objects.create(user=user, password_hash=password_hash)
     token, _ = issue_token(user)
-    return JsonResponse(
+    return json_response(
         {
             "access_token": token,
             "expires_in": 3600,
@@ -195,18 +334,31 @@ def login(request):
     password = data.get("password", "").strip()
     if not email or not password:
         return error(422, "email and password required")
-
-    try:
-        user = AppUser.objects.get(email=email)
-    except AppUser.DoesNotExist:
+    # 每次尝试按 IP 计数；邮箱维度只计失败，知道邮箱的人不能靠正常登录把对方锁住
+    ip = client_ip(request)
+    wait = rate_limiter.peek("login_failure", email=email) or rate_limiter.check("login", ip=ip)
+    if wait:
+        return retry_later(429, "too many requests", wait)
+
+    user = AppUser.objects.filter(email=email).first()
+    credential = AuthCredential.objects.filter(user=user).first() if user else None
+    if not credential:
+        rate_limiter.charge("login_failure", ip=ip, email=email)
         return error(401, "invalid credentials")
-
-    credential = AuthCredential.objects.filter(user=user).first()
-    if not credential or not check_password(password, credential.password_hash):
+    try:
+        is_correct, new_hash = password_hasher.check_password(password, credential.password_hash)
+    except HasherBusy:
+        return hasher_busy()
+    if not is_correct:
+        rate_limiter.charge("login_failure", ip=ip, email=email)
         return error(401, "invalid credentials")
+    if new_hash:
+        # 哈希参数变更后透明升级
+        credential.password_hash = new_hash
+        credential.save(update_fields=["password_hash", "updated_at"])
 
     token, _ = issue_token(user)
-    return JsonResponse(
+    return json_response(
         {
             "access_token": token,
             "expires_in": 3600,
@@ -215,6 +367,17 @@ def login(request):
     )
 
 
+@csrf_exempt
+def logout(request):
+    if request.method != "POST":
+        return error(405, "Method not allowed")
+    user, err = require_auth(request)
+    if err:
+        return err
+    revoke_tokens(user, token=get_bearer_token(request))
+    return json_response({"message": "logged out"})
+
+
 @csrf_exempt
 def send_reset_code(request):
     """发送密码重置验证码"""
@@ -226,6 +389,9 @@ def send_reset_code(request):
     
     if not email:
         return error(422, "email required")
+    wait = rate_limiter.check("send_reset_code", ip=client_ip(request), email=email)
+    if wait:
+        return retry_later(429, "too many requests", wait)
     
     # 检查用户是否存在
     if not AppUser.objects.filter(email=email).exists():
@@ -250,7 +416,7 @@ def send_reset_code(request):
     
     # 在实际生产环境中，这里应该发送邮件
     # 开发环境下直接返回验证码（仅用于测试）
-    return JsonResponse({
+    return json_response({
         "message": "verification code sent",
         "debug_code": code,  # 生产环境应该删除这一行
         "expires_in": 900  # 15分钟 = 900秒
@@ -292,21 +458,25 @@ def verify_reset_code(request):
         return error(404, "user not found")
     
     # 更新密码
+    try:
+        password_hash = password_hasher.make_password(new_password)
+    except HasherBusy:
+        return hasher_busy()
     credential = AuthCredential.objects.filter(user=user).first()
     if credential:
-        credential.password_hash = make_password(new_password)
+        credential.password_hash = password_hash
         credential.save()
     else:
-        AuthCredential.objects.create(user=user, password_hash=make_password(new_password))
+        AuthCredential.objects.create(user=user, password_hash=password_hash)
     
     # 标记验证码为已使用
     reset_code.is_used = True
     reset_code.save()
     
     # 清除所有旧的 token（强制重新登录）
-    AuthToken.objects.filter(user=user).delete()
+    revoke_tokens(user)
     
-    return JsonResponse({
+    return json_response({
         "message": "password reset successful",
         "user": {"id": str(user.id), "nickname": user.nickname}
     })
@@ -318,7 +488,7 @@ def user_me(request):
     if err:
         return err
     if request.method == "GET":
-        return JsonResponse(user_response(user))
+        return json_response(user_response(user))
     if request.method != "PATCH":
         return error(405, "Method not allowed")
     data = parse_json(request)
@@ -331,7 +501,7 @@ def user_me(request):
         set_user_tags(user, "school", [school] if school else [])
     if tags is not None:
         set_user_tags(user, "interest", tags)
-    return JsonResponse(user_response(user))
+    return json_response(user_response(user))
 
 
 @csrf_exempt
@@ -340,44 +510,61 @@ def surveys(request):
         user, err = require_auth(request)
         if err:
             return err
+        wait = rate_limiter.check("survey_publish", ip=client_ip(request), user=user.id)
+        if wait:
+            return retry_later(429, "too many requests", wait)
         data = parse_json(request)
         title = data.get("title", "").strip()
-        reward_points = int(data.get("reward_points", 0) or 0)
+        reward_points = data.get("reward_points")
+        reward_points = 0 if reward_points in (None, "") else parse_int(reward_points)
+        # 不填目标份数表示不限份数，不会自动关闭
+        raw_target = data.get("target")
+        target = None if raw_target in (None, "") else parse_int(raw_target)
         if not title:
             return error(422, "title required")
+        if reward_points is None:
+            return error(422, "invalid reward_points")
         if reward_points < 0:
             return error(422, "reward_points must be >= 0")
-        if user.points < reward_points:
-            return error(422, "not enough points to publish survey")
-
-        survey = Survey.objects.create(
-            owner=user,
-            title=title,
-            description=data.get("description"),
-            reward_points=reward_points,
-            publish_cost_points=reward_points,
-            deadline=parse_deadline(data.get("deadline")),
-            estimated_minutes=data.get("estimated_minutes"),
-            status="published",
-        )
-        questionnaire = Questionnaire.objects.create(
-            survey=survey,
-            version=1,
-            status="published",
-            title=title,
-        )
-        survey.active_questionnaire = questionnaire
-        survey.save(update_fields=["active_questionnaire"])
-        if reward_points > 0:
-            user.points -= reward_points
-            user.save(update_fields=["points"])
-            PointsLog.objects.create(
-                user=user,
-                points_type="publish_cost",
-                delta=-reward_points,
-                reason="发布问卷消耗",
+        if raw_target not in (None, "") and target is None:
+            return error(422, "invalid target")
+        if target is not None and target < 1:
+            return error(422, "target must be >= 1")
+        with transaction.atomic():
+            # 条件扣减：余额在库里判断，并发发布或其他进程加减积分都不会被覆盖
+            if reward_points > 0 and not AppUser.objects.filter(id=user.id, points__gte=reward_points).update(
+                points=F("points") - reward_points
+            ):
+                return error(422, "not enough points to publish survey")
+            survey = Survey.objects.create(
+                owner=user,
+                title=title,
+                description=data.get("description"),
+                reward_points=reward_points,
+                publish_cost_points=reward_points,
+                deadline=parse_deadline(data.get("deadline")),
+                estimated_minutes=data.get("estimated_minutes"),
+                target=target,
+                status="published",
             )
-        return JsonResponse({"id": str(survey.id), "status": "active"})
+            questionnaire = Questionnaire.objects.create(
+                survey=survey,
+                version=1,
+                status="published",
+                title=title,
+            )
+            survey.active_questionnaire = questionnaire
+            survey.save(update_fields=["active_questionnaire"])
+            if reward_points > 0:
+                PointsLog.objects.create(
+                    user=user,
+                    points_type="publish_cost",
+                    delta=-reward_points,
+                    reason="发布问卷消耗",
+                )
+                # update() 不触发信号，积分显示在个人信息上，手动更新版本号
+                transaction.on_commit(lambda: versions.bump(f"user:{user.id}"))
+        return json_response({"id": str(survey.id), "status": "active"})
 
     if request.method != "GET":
         return error(405, "Method not allowed")
@@ -396,34 +583,119 @@ def surveys(request):
     if max_minutes:
         queryset = queryset.filter(estimated_minutes__lte=int(max_minutes))
 
-    total = queryset.count()
-    offset = (page - 1) * page_size
+    try:
+        records, pagination = paginate(request, queryset, page, page_size)
+    except ValueError:
+        return error(422, "invalid cursor")
     items = [
         {
             "id": str(survey.id),
             "title": survey.title,
             "reward_points": survey.reward_points,
             "estimated_minutes": survey.estimated_minutes,
-            "deadline": now_iso(survey.deadline) if survey.deadline else None,
+            "deadline": survey.deadline,
+            "completed": survey.completed,
+            "target": survey.target,
         }
-        for survey in queryset[offset : offset + page_size]
+        for survey in records
     ]
-    return JsonResponse(
-        {"items": items, "page": page, "page_size": page_size, "total": total}
-    )
+    return json_response({"items": items, **pagination}, request=request)
 
 
 def survey_detail(request, survey_id):
+    if request.method != "GET":
+        return error(405, "Method not allowed")
+    survey_pk = parse_int_id(survey_id)
+    if survey_pk is None:
+        return error(422, "invalid survey id")
+
+    def build():
+        try:
+            survey = Survey.objects.get(id=survey_pk)
+        except Survey.DoesNotExist:
+            return error(404, "survey not found")
+        return json_response(survey_response(survey))
+
+    etag = make_etag("survey", survey_pk, *versions.get(f"survey:{survey_pk}"))
+    return conditional_response(request, "survey_detail", etag, build, private=False)
+
+
+def survey_fill(request, survey_id):
+    """填写页：问卷信息与题目列表（编译结构命中缓存时只查问卷一次）"""
     if request.method != "GET":
         return error(405, "Method not allowed")
     survey_pk = parse_int_id(survey_id)
     if survey_pk is None:
         return error(422, "invalid survey id")
     try:
-        survey = Survey.objects.get(id=survey_pk)
+        survey = Survey.objects.select_related("active_questionnaire").get(id=survey_pk)
+    except Survey.DoesNotExist:
+        return error(404, "survey not found")
+    if survey.status != "published":
+        return error(422, "survey not published")
+    if survey.deadline is not None and survey.deadline <= timezone.now():
+        return error(422, "survey expired")
+    if survey.active_questionnaire is None:
+        return error(422, "survey has no questionnaire")
+    try:
+        schema = schema_cache.get(survey.active_questionnaire)
+    except LogicError as exc:
+        return error(422, f"invalid questionnaire logic: {exc}")
+    return json_response(
+        {
+            "id": str(survey.id),
+            "title": survey.title,
+            "subtitle": survey.description,
+            "version": schema.version,
+            "estimated_minutes": survey.estimated_minutes,
+            "deadline": survey.deadline,
+            "questions": schema.fill_questions,
+        },
+        request=request,
+    )
+
+
+@csrf_exempt
+def fill_draft(request, survey_id):
+    """填写草稿：GET 读取，PUT 自动保存（先在内存里合并，按间隔批量落库）"""
+    if request.method not in ("GET", "PUT"):
+        return error(405, "Method not allowed")
+    user, err = require_auth(request)
+    if err:
+        return err
+    survey_pk = parse_int_id(survey_id)
+    if survey_pk is None:
+        return error(422, "invalid survey id")
+    try:
+        survey = Survey.objects.select_related("active_questionnaire").get(id=survey_pk)
     except Survey.DoesNotExist:
         return error(404, "survey not found")
-    return JsonResponse(survey_response(survey))
+    questionnaire = survey.active_questionnaire
+
+    if request.method == "GET":
+        draft = fill_drafts.get(user.id, survey.id)
+        # 问卷换了版本，旧草稿作废
+        if draft is None or questionnaire is None or draft.questionnaire_id != questionnaire.id:
+            return json_response({"answers": [], "saved_at": None})
+        return json_response({"answers": draft.values(), "saved_at": draft.saved_at})
+
+    if survey.status != "published":
+        return error(422, "survey not published")
+    if survey.deadline is not None and survey.deadline <= timezone.now():
+        return error(422, "survey expired")
+    if survey.owner_id == user.id:
+        return error(422, "cannot fill your own survey")
+    if questionnaire is None:
+        return error(422, "survey has no questionnaire")
+    data = parse_json(request)
+    try:
+        rows = schema_cache.get(questionnaire).validate_draft(data.get("answers"))
+    except LogicError as exc:
+        return error(422, f"invalid questionnaire logic: {exc}")
+    except AnswerError as exc:
+        return error(422, str(exc))
+    draft = fill_drafts.save(user.id, survey.id, questionnaire.id, rows)
+    return json_response({"answers": len(draft.answers), "saved_at": draft.saved_at})
 
 
 @csrf_exempt
@@ -444,7 +716,7 @@ def close_survey(request, survey_id):
         return error(403, "not survey owner")
     survey.status = "closed"
     survey.save(update_fields=["status"])
-    return JsonResponse({"id": str(survey.id), "status": "closed"})
+    return json_response({"id": str(survey.id), "status": "closed"})
 
 
 @csrf_exempt
@@ -454,31 +726,62 @@ def submit_fill(request, survey_id):
     user, err = require_auth(request)
     if err:
         return err
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        return _submit_fill(request, user, survey_id)
+    if len(key) > 255:
+        return error(422, "invalid idempotency key")
+
+    # 重试（重复点击、超时重发）直接重放第一次的结果，不查库
+    fingerprint = idempotency.fingerprint(survey_id, request.body)
+    saved = idempotency.begin("fill", user.id, key)
+    if saved == IN_FLIGHT:
+        return retry_later(409, "request in progress", 1)
+    if saved is not None:
+        status, content, saved_fingerprint = saved
+        if saved_fingerprint != fingerprint:
+            return error(422, "idempotency key reused with a different request")
+        response = HttpResponse(content, status=status, content_type="application/json")
+        response["Idempotent-Replayed"] = "true"
+        return response
+    try:
+        response = _submit_fill(request, user, survey_id)
+    except Exception:
+        idempotency.abandon("fill", user.id, key)
+        raise
+    if response.status_code >= 500 or response.status_code == 429:
+        idempotency.abandon("fill", user.id, key)
+    else:
+        idempotency.finish("fill", user.id, key, fingerprint, response.status_code, response.content)
+    return response
+
+
+def _submit_fill(request, user, survey_id):
     data = parse_json(request)
     duration = data.get("duration_seconds")
     survey_pk = parse_int_id(survey_id)
     if survey_pk is None:
         return error(422, "invalid survey id")
     try:
-        survey = Survey.objects.get(id=survey_pk)
+        survey = Survey.objects.select_related("active_questionnaire").get(id=survey_pk)
     except Survey.DoesNotExist:
         return error(404, "survey not found")
     if survey.status != "published":
         return error(422, "survey not published")
+    # 截止调度器关闭问卷前有短暂延迟，这里直接按截止时间拦截
+    if survey.deadline is not None and survey.deadline <= timezone.now():
+        return error(422, "survey expired")
     if survey.owner_id == user.id:
         return error(422, "cannot fill your own survey")
-    if Response.objects.filter(survey=survey, user=user).exists():
-        return error(422, "already filled")
 
-    response = Response.objects.create(
-        survey=survey,
-        questionnaire=survey.active_questionnaire,
-        user=user,
-        duration_seconds=duration,
-        status="submitted",
-        submitted_at=timezone.now(),
-    )
-    return JsonResponse(
+    # 是否已经填过由 submit_response 插入时的唯一约束判断，并发的重复提交不会变成 500
+    try:
+        response = submit_response(survey, user, data.get("answers"), duration)
+    except AlreadyFilled:
+        return error(422, "already filled")
+    except AnswerError as exc:
+        return error(422, str(exc))
+    return json_response(
         {"id": str(response.id), "status": response.status, "points_awarded": 0}
     )
 
@@ -508,21 +811,27 @@ def review_fill(request, fill_id):
         return error(422, "record already reviewed")
 
     points_awarded = 0
-    if status == "approved":
-        points_awarded = record.survey.reward_points
-        record.user.points += points_awarded
-        record.user.activity_points += points_awarded
-        record.user.save(update_fields=["points", "activity_points"])
-        PointsLog.objects.create(
-            user=record.user,
-            points_type="reward",
-            delta=points_awarded,
-            reason="完成问卷",
+    with transaction.atomic():
+        # 状态按条件流转，并发的重复审核只有一次生效，积分不会重复发放
+        if not Response.objects.filter(id=record.id, status="submitted").update(status=status):
+            return error(422, "record already reviewed")
+        if status == "approved":
+            points_awarded = record.survey.reward_points
+            AppUser.objects.filter(id=record.user_id).update(
+                points=F("points") + points_awarded,
+                activity_points=F("activity_points") + points_awarded,
+            )
+            PointsLog.objects.create(
+                user_id=record.user_id,
+                points_type="reward",
+                delta=points_awarded,
+                reason="完成问卷",
+            )
+        # update() 不触发信号，手动更新审核状态与积分涉及的版本号
+        transaction.on_commit(
+            lambda: versions.bump("surveys", f"survey:{record.survey_id}", f"user:{record.user_id}")
         )
-
-    record.status = status
-    record.save(update_fields=["status"])
-    return JsonResponse(
+    return json_response(
         {"id": str(record.id), "status": status, "points_awarded": points_awarded}
     )
 
@@ -540,20 +849,20 @@ def my_fills(request):
     queryset = Response.objects.filter(user=user).order_by("-created_at")
     if status:
         queryset = queryset.filter(status=status)
-    total = queryset.count()
-    offset = (page - 1) * page_size
+    try:
+        records, pagination = paginate(request, queryset, page, page_size)
+    except ValueError:
+        return error(422, "invalid cursor")
     items = [
         {
             "id": str(record.id),
             "survey_id": str(record.survey_id),
             "status": record.status,
-            "created_at": now_iso(record.created_at),
+            "created_at": record.created_at,
         }
-        for record in queryset[offset : offset + page_size]
+        for record in records
     ]
-    return JsonResponse(
-        {"items": items, "page": page, "page_size": page_size, "total": total}
-    )
+    return json_response({"items": items, **pagination}, request=request)
 
 
 def points_logs(request):
@@ -572,11 +881,13 @@ def points_logs(request):
     elif log_type == "spend":
         queryset = queryset.filter(points_type__in=["publish_cost", "admin_adjust"])
     
-    total = queryset.count()
-    offset = (page - 1) * page_size
+    try:
+        records, pagination = paginate(request, queryset, page, page_size)
+    except ValueError:
+        return error(422, "invalid cursor")
     items = []
     
-    for log in queryset[offset : offset + page_size]:
+    for log in records:
         # Try to find associated survey or fill record for navigation
         related_id = None
         related_type = None
@@ -608,7 +919,7 @@ def points_logs(request):
             "id": str(log.id),
             "delta": log.delta,
             "reason": log.reason,
-            "created_at": now_iso(log.created_at),
+            "created_at": log.created_at,
             "related_id": related_id,
             "related_type": related_type,
         })
@@ -616,12 +927,10 @@ def points_logs(request):
     # Calculate honor status: credit_score >= 85 = qualified
     has_honor = user.credit_score >= 85
     
-    return JsonResponse(
+    return json_response(
         {
             "items": items,
-            "page": page,
-            "page_size": page_size,
-            "total": total,
+            **pagination,
             "user": {
                 "id": str(user.id),
                 "points": user.points,
@@ -629,7 +938,8 @@ def points_logs(request):
                 "activity_points": user.activity_points,
                 "has_honor": has_honor,
             },
-        }
+        },
+        request=request,
     )
 
 
@@ -666,4 +976,4 @@ def create_report(request):
         reason=reason,
         status="open",
     )
-    return JsonResponse({"id": str(report.id), "status": report.status})
+    return json_response({"id": str(report.id), "status": report.status})
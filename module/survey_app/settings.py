@@ -63,6 +63,132 @@ DATABASES = {
     }
 }
 
+# 缓存：默认进程内缓存；多进程部署时可增加一个共享后端（如 Redis），
+# 再通过下面各组件的 *_CACHE_ALIAS 配置指向它
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "sixth-element",
+    }
+}
+
+# Token 解析缓存（core/services/token_cache.py）
+# 缓存 token -> user_id 与用户快照，快照随用户版本号（user:<id>）失效；
+# TTL 同时是其他进程里吊销 token 的最长生效延迟，设为 0 关闭缓存
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("DJANGO_AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get("DJANGO_AUTH_TOKEN_CACHE_TTL", "30"))
+AUTH_TOKEN_CACHE_ALIAS = os.environ.get("DJANGO_AUTH_TOKEN_CACHE_ALIAS", "")
+
+# Token 模式：opaque（随机串，按表查询）/ signed（HMAC 签名，CPU 校验）
+AUTH_TOKEN_MODE = os.environ.get("DJANGO_AUTH_TOKEN_MODE", "opaque")
+# 签名模式下各进程刷新吊销集合的间隔（秒），即跨进程吊销的最长生效延迟
+AUTH_TOKEN_REVOCATION_REFRESH = int(os.environ.get("DJANGO_AUTH_TOKEN_REVOCATION_REFRESH", "30"))
+
+# 密码哈希：PBKDF2 迭代次数可配置（0 为 Django 默认），变更后用户下次登录时自动重新哈希
+PASSWORD_HASHERS = [
+    "core.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("DJANGO_PASSWORD_HASH_ITERATIONS", "0"))
+# 哈希线程池大小（0 为 CPU 核数）与排队上限（0 为线程数 * 4），超过上限直接返回 503
+PASSWORD_HASH_WORKERS = int(os.environ.get("DJANGO_PASSWORD_HASH_WORKERS", "0"))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("DJANGO_PASSWORD_HASH_MAX_PENDING", "0"))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get("DJANGO_PASSWORD_HASH_TIMEOUT", "5"))
+
+# 限流（core/services/rate_limiter.py）：各身份维度的额度为 (额度, 窗口秒数)，
+# 接口按权重消耗额度，被拦下的请求不消耗额度；RATE_LIMIT_CACHE_ALIAS 为空时使用进程内计数。
+# 登录每次尝试按 IP 消耗 login，失败时再按 IP 和邮箱消耗 login_failure，成功登录不占邮箱额度
+RATE_LIMIT_ENABLED = os.environ.get("DJANGO_RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_CACHE_ALIAS = os.environ.get("DJANGO_RATE_LIMIT_CACHE_ALIAS", "")
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("DJANGO_RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_SCOPES = {
+    "ip": (600, 60),
+    "email": (30, 600),
+    "user": (60, 60),
+}
+RATE_LIMIT_COSTS = {
+    "login": 5,
+    "login_failure": 5,
+    "send_reset_code": 10,
+    "survey_publish": 5,
+}
+
+# 任务大厅概览缓存（core/services/overview_cache.py），TTL 为 0 时该区块不缓存；
+# 过期后旧值最多再保留 STALE_TTL 秒，供重算期间的并发请求使用
+TASK_HALL_CACHE_ALIAS = os.environ.get("DJANGO_TASK_HALL_CACHE_ALIAS", "default")
+TASK_HALL_SUMMARY_TTL = int(os.environ.get("DJANGO_TASK_HALL_SUMMARY_TTL", "15"))
+TASK_HALL_FILTERS_TTL = int(os.environ.get("DJANGO_TASK_HALL_FILTERS_TTL", "300"))
+# 概览里的高匹配数按用户缓存，问卷集合或用户画像变化时自动换键；截止紧迫度随时间变化，TTL 不宜过长
+TASK_HALL_HIGH_MATCH_TTL = int(os.environ.get("DJANGO_TASK_HALL_HIGH_MATCH_TTL", "60"))
+TASK_HALL_CACHE_STALE_TTL = int(os.environ.get("DJANGO_TASK_HALL_CACHE_STALE_TTL", "300"))
+
+# 任务匹配度打分（core/services/match_scoring.py）
+# 权重依次为：标签重合、单位时间奖励、截止紧迫度、剩余名额；候选池为最新发布的前 N 张卡片
+MATCH_WEIGHTS = (0.4, 0.3, 0.15, 0.15)
+MATCH_HIGH_SCORE = 0.6
+MATCH_MEDIUM_SCORE = 0.35
+MATCH_CANDIDATE_LIMIT = int(os.environ.get("DJANGO_MATCH_CANDIDATE_LIMIT", "2000"))
+
+# “换一批”已展示集合（core/services/seen_set.py）：每个用户会话一个布隆过滤器，访问时顺延 TTL
+TASK_HALL_SEEN_ALIAS = os.environ.get("DJANGO_TASK_HALL_SEEN_ALIAS", "default")
+TASK_HALL_SEEN_TTL = int(os.environ.get("DJANGO_TASK_HALL_SEEN_TTL", "1800"))
+TASK_HALL_SEEN_BITS = 8192
+TASK_HALL_SEEN_HASHES = 4
+TASK_HALL_REFRESH_MAX_SCAN = 500
+
+# “换一批”加权抽样候选池（core/services/sampling_pool.py），单位为秒
+TASK_HALL_SAMPLING_POOL_SIZE = int(os.environ.get("DJANGO_TASK_HALL_SAMPLING_POOL_SIZE", "5000"))
+TASK_HALL_SAMPLING_REFRESH = 5
+TASK_HALL_SAMPLING_RELOAD = 600
+
+# 读接口 ETag 用的版本号与 304 统计（core/services/versions.py、core/conditional.py）
+# 多进程部署时必须指向共享后端，否则各进程的版本号互不相通
+VERSION_CACHE_ALIAS = os.environ.get("DJANGO_VERSION_CACHE_ALIAS", "default")
+
+# 任务大厅 SSE 推送（core/services/task_events.py，GET /task-hall/stream，需以 ASGI 方式部署）
+# 默认后端只在进程内分发，多进程部署时换成共享消息通道的后端；
+# 每个连接最多积压 QUEUE_SIZE 条事件，保留最近 HISTORY 条供断线重连补发，HEARTBEAT 为空闲心跳秒数
+TASK_EVENTS_BACKEND = os.environ.get("DJANGO_TASK_EVENTS_BACKEND", "core.services.task_events.InProcessBackend")
+TASK_EVENTS_QUEUE_SIZE = int(os.environ.get("DJANGO_TASK_EVENTS_QUEUE_SIZE", "64"))
+TASK_EVENTS_HISTORY = int(os.environ.get("DJANGO_TASK_EVENTS_HISTORY", "256"))
+TASK_EVENTS_HEARTBEAT = int(os.environ.get("DJANGO_TASK_EVENTS_HEARTBEAT", "25"))
+# 浏览器先用 Bearer token 换一次性连接票据，TICKET_TTL 秒内有效；多进程部署时票据缓存必须指向共享后端。
+# 连接期间每个心跳间隔复查一次登录会话，到期或被吊销时断开
+TASK_EVENTS_TICKET_TTL = int(os.environ.get("DJANGO_TASK_EVENTS_TICKET_TTL", "30"))
+TASK_EVENTS_TICKET_CACHE_ALIAS = os.environ.get("DJANGO_TASK_EVENTS_TICKET_CACHE_ALIAS", "default")
+
+# 问卷截止调度（core/services/deadline_scheduler.py）
+# RUNNER=web 时在 web 进程的后台线程里运行，适合单进程部署；多进程部署先把 VERSION_CACHE_ALIAS、
+# TASK_HALL_CACHE_ALIAS、TASK_EVENTS_BACKEND 换成共享后端，再设为 command 并单独运行
+# `python Main.py close_expired_surveys --loop`（后端仍是进程内的时该命令拒绝启动）。
+# 堆里只装 LOOKAHEAD 秒内到期的问卷，每 POLL_INTERVAL 秒从库里重载；每条 UPDATE 最多关闭 BATCH_SIZE 个
+SURVEY_DEADLINE_RUNNER = os.environ.get("DJANGO_SURVEY_DEADLINE_RUNNER", "web")
+SURVEY_DEADLINE_BATCH_SIZE = int(os.environ.get("DJANGO_SURVEY_DEADLINE_BATCH_SIZE", "500"))
+SURVEY_DEADLINE_LOOKAHEAD = int(os.environ.get("DJANGO_SURVEY_DEADLINE_LOOKAHEAD", "3600"))
+SURVEY_DEADLINE_POLL_INTERVAL = int(os.environ.get("DJANGO_SURVEY_DEADLINE_POLL_INTERVAL", "30"))
+
+# 已发布问卷的编译结构缓存（core/services/questionnaire_schema.py），每个进程一份，按估算字节数 LRU 淘汰
+QUESTIONNAIRE_SCHEMA_CACHE_BYTES = int(os.environ.get("DJANGO_QUESTIONNAIRE_SCHEMA_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# 填写草稿的合并写入（core/services/fill_drafts.py）：自动保存先进内存，每 FLUSH_INTERVAL 秒批量落库，
+# 进程崩溃最多丢失这段时间内的保存；未落库的草稿超过 MAX_DIRTY 份时同步落库，内存里最多保留 MAX_DRAFTS 份
+FILL_DRAFT_FLUSH_INTERVAL = float(os.environ.get("DJANGO_FILL_DRAFT_FLUSH_INTERVAL", "30"))
+FILL_DRAFT_MAX_DIRTY = int(os.environ.get("DJANGO_FILL_DRAFT_MAX_DIRTY", "1000"))
+FILL_DRAFT_MAX_DRAFTS = int(os.environ.get("DJANGO_FILL_DRAFT_MAX_DRAFTS", "10000"))
+
+# 提交答卷的 Idempotency-Key（core/services/idempotency.py）：结果在 CACHE_ALIAS 缓存里保留 TTL 秒供重试重放，
+# 多进程部署需要指向共享缓存；处理中的占位最多保留 LOCK_TTL 秒
+IDEMPOTENCY_CACHE_ALIAS = os.environ.get("DJANGO_IDEMPOTENCY_CACHE_ALIAS", "default")
+IDEMPOTENCY_TTL = int(os.environ.get("DJANGO_IDEMPOTENCY_TTL", "600"))
+IDEMPOTENCY_LOCK_TTL = int(os.environ.get("DJANGO_IDEMPOTENCY_LOCK_TTL", "30"))
+
+# JSON 响应（core/serialization.py）：响应体达到该字节数且客户端支持时压缩，0 为总是压缩；
+# 安装了 brotli 时优先 br，否则 gzip
+JSON_COMPRESS_MIN_BYTES = int(os.environ.get("DJANGO_JSON_COMPRESS_MIN_BYTES", "1024"))
+
 LANGUAGE_CODE = "zh-hans"
 TIME_ZONE = "Asia/Shanghai"
 USE_I18N = True
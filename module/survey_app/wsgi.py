@@ -14,3 +14,8 @@ for path in (str(module_dir), str(project_root)):
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "survey_app.settings")
 
 application = get_wsgi_application()
+
+# SURVEY_DEADLINE_RUNNER=web 时截止调度在 web 进程里运行
+from core.services.deadline_scheduler import deadline_scheduler  # noqa: E402
+
+deadline_scheduler.start()
@@ -2,9 +2,11 @@
 UserProfile Controller - 控制器层
 处理HTTP请求/响应、参数验证、调用Service层
 """
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from core.views import parse_json, error, require_auth
+from core.conditional import conditional_response, make_etag
+from core.serialization import json_response, parse_json
+from core.services.versions import versions
+from core.views import error, require_auth
 from ..services.profile_service import UserProfileService
 
 
@@ -42,9 +44,14 @@ def get_user_profile(request):
         return err
     
     try:
-        # 调用Service获取画像
-        profile_data = profile_service.get_profile(user)
-        return JsonResponse(profile_data, status=200)
+        # 画像只随用户版本变化，If-None-Match 命中时不查画像
+        etag = make_etag("profile", user.id, *versions.get(f"user:{user.id}"))
+        return conditional_response(
+            request,
+            "user_profile",
+            etag,
+            lambda: json_response(profile_service.get_profile(user), status=200, request=request),
+        )
     
     except Exception as e:
         import traceback
@@ -74,11 +81,11 @@ def update_user_profile(request):
     try:
         # 调用Service更新画像
         profile_data = profile_service.update_profile(user, data)
-        return JsonResponse(profile_data, status=200)
+        return json_response(profile_data, status=200)
     
     except ValueError as e:
         # 数据验证失败
-        return JsonResponse({
+        return json_response({
             "error": {
                 "code": "validation_error",
                 "message": "参数校验失败",
@@ -132,11 +139,11 @@ def replace_user_profile(request):
     try:
         # 调用Service执行完整替换
         profile_data = profile_service.replace_profile(user, data)
-        return JsonResponse(profile_data, status=200)
+        return json_response(profile_data, status=200)
     
     except ValueError as e:
         # 数据验证失败
-        return JsonResponse({
+        return json_response({
             "error": {
                 "code": "validation_error",
                 "message": "参数校验失败",
@@ -189,7 +196,7 @@ def search_matching_profiles(request):
     try:
         # 调用Service搜索匹配画像
         matches = profile_service.search_matching_profiles(user, criteria)
-        return JsonResponse({'matches': matches}, status=200)
+        return json_response({'matches': matches}, status=200)
     
     except Exception as e:
         return error(500, f"Internal server error: {str(e)}")
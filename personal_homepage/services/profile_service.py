@@ -3,7 +3,6 @@ UserProfile Service - 业务逻辑层
 处理用户画像相关的业务逻辑、数据验证和格式转换（基于Tag系统）
 """
 
-from django.utils import timezone
 from ..mapper.profile_mapper import UserProfileMapper
 
 
@@ -32,13 +31,7 @@ class UserProfileService:
         from core.models import UserTag
 
         latest_tag = UserTag.objects.filter(user_id=user.id).order_by("-created_at").first()
-        profile["updated_at"] = (
-            latest_tag.created_at.astimezone(timezone.UTC)
-            .isoformat()
-            .replace("+00:00", "Z")
-            if latest_tag
-            else None
-        )
+        profile["updated_at"] = latest_tag.created_at if latest_tag else None
 
         return profile
 